@@ -60,10 +60,10 @@ function ConversationLog({ messages }: ConversationLogProps) {
           // Determine sender and alignment based on message type
           let sender = '';
           let align = '';
-          if (msg.type === 'text_stt' || msg.type === 'timestamp_stt') {
+          if (msg.type === 'text_stt' || msg.type === 'timestamp_vad' || msg.type === 'timestamp_stt') {
             sender = 'You';
             align = 'left';
-          } else if (msg.type === 'text_tts' || msg.type === 'timestamp_tts' || msg.type === 'timestamp_llm') {
+          } else if (msg.type === 'text_tts' || msg.type.startsWith('timestamp_')) {
             sender = 'Bot';
             align = 'right';
           } else if (msg.type === 'text_output') {
@@ -63,6 +63,7 @@ const DataStreamer = forwardRef<DataStreamerHandle, DataStreamerProps>(({
     const pendingAudioRef = useRef<ArrayBuffer | null>(null); // Store initial chatbot audio, before user presses mic
     const conversationStarted = useRef(false); // flag to check if conversation has started
     const isEnded = useRef(false); // flag to check if conversation has ended, so not to allow reconnection
+    const keepaliveRef = useRef<number | null>(null); // interval sending keepalives while the mic is not streaming
 
     // data variables
     const sampleRate = 16000; // sample rate for audio processing
@@ -104,12 +105,28 @@ const DataStreamer = forwardRef<DataStreamerHandle, DataStreamerProps>(({
           console.log('Sending config to backend:', config);
           WebSocketMsgProtocol.sendWebsocketConfigMsg(socket, config); // send config to backend
         }
+        // while the mic is paused no audio is sent, keep the session from being reclaimed as idle
+        keepaliveRef.current = window.setInterval(() => {
+          if (!processorRef.current) {
+            WebSocketMsgProtocol.sendWebsocketKeepaliveMsg(socket);
+          }
+        }, WebSocketMsgProtocol.KEEPALIVE_INTERVAL_MS);
       }
       socket.onmessage = handleIncomingMessage;
-      socket.onclose = () => console.log('WebSocket closed')
+      socket.onclose = () => {
+        stopKeepalive();
+        console.log('WebSocket closed')
+      }
       socket.onerror = (error) => { console.error('WebSocket error:', error)}
     }
 
+    const stopKeepalive = () => {
+      if (keepaliveRef.current !== null) {
+        window.clearInterval(keepaliveRef.current);
+        keepaliveRef.current = null;
+      }
+    }
+
     // disconnect from backend service
     // if passive mode, only close the connection, but dont stop streaming
 
@@ -128,6 +145,7 @@ const DataStreamer = forwardRef<DataStreamerHandle, DataStreamerProps>(({
       }
 
       // close websocket connection
+      stopKeepalive();
       if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
         socketRef.current.close();
       }
@@ -1,14 +1,14 @@
 import * as Constants from '../constants/index.ts'
 
 export interface ProcessedMessage {
-    type: 'text_stt' | 'text_tts' | 'text_output' | 'timestamp_stt' | 'timestamp_llm' | 'timestamp_tts';
+    type: 'text_stt' | 'text_tts' | 'text_output' | 'text_latency' | 'timestamp_vad' | 'timestamp_stt' | 'timestamp_llm_first_token' | 'timestamp_llm' | 'timestamp_tts_first_byte' | 'timestamp_tts' | 'timestamp_audio';
     value: string;
 }
   
 //data from backend, that isn't related to audio streaming, formats that payload can assume
 export interface BackendMessage {
     type: 'text' | 'timestamp';
-    subtype: 'stt' | 'tts' | 'output' | 'llm';
+    subtype: 'stt' | 'tts' | 'output' | 'latency' | 'vad' | 'llm_first_token' | 'llm' | 'tts_first_byte' | 'audio';
     value: string | number;
 }
   
@@ -22,6 +22,8 @@ export function processWebsocketDataMsg(message: BackendMessage): ProcessedMessa
           return { type: 'text_tts', value: `TTS: ${message.value}` };
         case 'output':
           return { type: 'text_output', value: `Output: ${message.value}` };
+        case 'latency':
+          return { type: 'text_latency', value: `Latency: ${message.value}` };
         default:
           console.warn(`Unknown text subtype: ${message.subtype}`);
           return null;
@@ -31,12 +33,20 @@ export function processWebsocketDataMsg(message: BackendMessage): ProcessedMessa
         ? `${message.value.toFixed(2)}s`
         : String(message.value);
       switch (message.subtype) {
+        case 'vad':
+          return { type: 'timestamp_vad', value: `VAD Timestamp: ${formattedTime}` };
         case 'stt':
           return { type: 'timestamp_stt', value: `STT Timestamp: ${formattedTime}` };
+        case 'llm_first_token':
+          return { type: 'timestamp_llm_first_token', value: `LLM First Token Timestamp: ${formattedTime}` };
         case 'llm':
           return { type: 'timestamp_llm', value: `LLM Timestamp: ${formattedTime}` };
+        case 'tts_first_byte':
+          return { type: 'timestamp_tts_first_byte', value: `TTS First Byte Timestamp: ${formattedTime}` };
         case 'tts':
           return { type: 'timestamp_tts', value: `TTS Timestamp: ${formattedTime}` };
+        case 'audio':
+          return { type: 'timestamp_audio', value: `First Audio Timestamp: ${formattedTime}` };
         default:
           console.warn(`Unknown timestamp subtype: ${message.subtype}`);
           return null;
@@ -60,4 +70,15 @@ export function sendWebsocketConfigMsg(websocket: WebSocket, config: Constants.C
   }
   
   websocket.send(JSON.stringify(configMessage));
-}
\ No newline at end of file
+}
+
+// tells the backend the connection is alive while no audio is streamed (mic paused, or not pressed yet)
+// so SESSION_IDLE_TIMEOUT on the backend only reclaims clients that are really gone
+export const KEEPALIVE_INTERVAL_MS = 10000;
+
+export function sendWebsocketKeepaliveMsg(websocket: WebSocket) {
+  if (!websocket || websocket.readyState !== WebSocket.OPEN) {
+    return;
+  }
+  websocket.send(JSON.stringify({ type: 'keepalive' }));
+}
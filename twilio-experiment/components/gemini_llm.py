@@ -80,15 +80,28 @@ class GeminiLLM(LLMBase):
         
         self.dados_pedidos_gcs = carregar_dados_pedidos_do_gcs(GCS_BUCKET_NAME, GCS_BLOB_NAME, project_id="voicefuture")
         
-        if self.client: 
-            self.initial_response = self.initialize_chat()
-        else:
-            self.initial_response = "Desculpe, o assistente não pôde ser inicializado corretamente."
+        # greeting is generated on first use, or seeded from the greeting cache (seed_greeting)
+        # the webhook rebuilds the llm on every request, so this keeps requests after the greeting from calling the llm
+        self.initial_response = None
+        self.initial_response_ok = False
 
 
     def get_initial_response(self) -> str:
+        if self.initial_response is None:
+            if self.client:
+                self.initial_response = self.initialize_chat()
+            else:
+                self.initial_response = "Desculpe, o assistente não pôde ser inicializado corretamente."
         return self.initial_response
 
+    # use a previously generated greeting, as if initialize_chat had produced it, without calling the llm
+    def seed_greeting(self, text: str):
+        if self.initial_response is not None:
+            return
+        self.conversation_history.append(types.Content(role="model", parts=[types.Part.from_text(text=text)]))
+        self.initial_response = text
+        self.initial_response_ok = True
+
     def process(self, text: str, is_interim: bool = False) -> tuple[bool, str, str]:
         if not self.client: 
             print("ERRO: Cliente genai não inicializado. Não é possível processar.")
@@ -182,6 +195,7 @@ class GeminiLLM(LLMBase):
                     parts=[types.Part.from_text(text=response_text_val)]
                 )
             )
+            self.initial_response_ok = hasattr(response, 'text') and bool(response.text)
             return response_text_val
         except Exception as e:
             print(f"ERRO ao inicializar chat: {e}")
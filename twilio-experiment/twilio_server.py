@@ -17,12 +17,16 @@ from components.eleven_labs_tts import ElevenLabsTTS
 from components.azure_tts import AzureTTS
 from components.google_cloud_tts import GoogleCloudTTS
 from components.chatgpt_llm import AzureGPT4oLLM
+from greeting_cache import GreetingCache
 app = Flask(__name__)
 
 # Directory to store audio files
 AUDIO_DIR = "audio_files"
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+# greeting text + audio, generated once per (prompt, model, voice) instead of on every call
+greeting_cache = GreetingCache(AUDIO_DIR)
+
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 
@@ -118,18 +122,23 @@ def handle_twilio_voice():
     if not transcription:
         # First interaction: Greet the user and start the conversation
         append_transcript_llm(call_sid, "greeting")
-        greeting = llm.process("INtroduza-se ao cliente")
-        greeting_audio = tts.synthesize(greeting)
-        greeting_path = os.path.join(AUDIO_DIR, "greeting.mp3")
-        with open(greeting_path, "wb") as f:
-            f.write(greeting_audio)
+        greeting = greeting_cache.get_greeting(llm, tts, "mp3") # AzureTTS synthesizes mp3
+        save_llm_to_redis(call_sid, llm) # history now ends with the greeting that is played
+        greeting_key = greeting_cache.key_for(llm, tts)
+        greeting_path = greeting_cache.audio_path(greeting_key, "mp3")
+        if greeting and greeting["audio"] and not os.path.exists(greeting_path):
+            with open(greeting_path, "wb") as f:
+                f.write(greeting["audio"])
         gather = response.gather(
             input="speech",
             action="/twilio/voice",
             speechTimeout="auto",
             language="pt-PT"
         )
-        gather.play("https://twilio-backend-fragrant-brook-169.fly.dev/audio/greeting.mp3")
+        if greeting and greeting["audio"]:
+            gather.play(f"https://twilio-backend-fragrant-brook-169.fly.dev/audio/{os.path.basename(greeting_path)}")
+        elif greeting:
+            gather.say(greeting["text"])
         flask_response = make_response(str(response))
         flask_response.headers['X-LLM-Duration'] = str(llm_duration_server) 
         flask_response.headers['X-TTS-Duration'] = str(tts_duration_server) 
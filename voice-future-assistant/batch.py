@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+from typing import List
+from pipeline_manager import PipelineManager
+from provider_executor import EXECUTOR
+from vad_service import USE_SHARED_VAD, VAD_SERVICE
+from components.file_audio_source import FileAudioSource
+from components.null_audio_sink import NullAudioSink
+from components.null_finish import NullFinish
+
+##
+#  Module to run the pipeline headless over recorded calls, for offline QA and throughput measurements
+#  every entry of the calls directory is one call: a wav/pcm file with the whole customer side, or a directory
+#  with one file per turn (see components/file_audio_source.py). up to --parallel calls run at once in this process,
+#  each with its own PipelineManager, and every finished call is written as one json line to the results file:
+#  transcript, final json summary, per turn latency. a last line has the totals, including calls per hour per cpu
+#
+#  usage: python main.py batch --calls recordings/ --parallel 8 --output results.jsonl [--pacing virtual] [--stt 6 --llm 2 --tts 6]
+##
+
+def list_calls(path: str) -> List[str]:
+    return [os.path.join(path, entry) for entry in sorted(os.listdir(path))
+            if os.path.isdir(os.path.join(path, entry)) or entry.endswith((".wav", ".pcm", ".raw"))]
+
+# api classes by frontend index (modelConfigs.COMPONENT_MAPPINGS), or the defaults
+def pick_apis(args) -> dict:
+    from modelConfigs import COMPONENT_MAPPINGS, MODEL_MAPPINGS # imports every provider sdk, only needed to pick them
+    default = MODEL_MAPPINGS["default"]
+    return {
+        kind: COMPONENT_MAPPINGS[kind][index] if index is not None else default[kind]
+        for kind, index in (("stt", args.stt), ("llm", args.llm), ("tts", args.tts))
+    }
+
+# build a call's providers, blocking (sdk clients, model loads): runs in a worker thread, like SessionPool.build,
+# so calls starting in parallel don't stall the others on the event loop
+def build_providers(apis: dict) -> dict:
+    return {kind: apis[kind]() for kind in ("stt", "llm", "tts")}
+
+async def run_call(path: str, args, apis: dict) -> dict:
+    sink = None
+    finish = NullFinish()
+
+    def make_sink(audio_source=None):
+        nonlocal sink
+        sink = NullAudioSink(audio_source)
+        return sink
+
+    start = time.monotonic()
+    result = {"type": "call", "call": os.path.basename(path)}
+    pipeline = None
+    try:
+        providers = await asyncio.to_thread(build_providers, apis)
+        # the source and sink start their tasks on the loop, so the pipeline itself is built here, once the providers are ready
+        config = {
+            "audio_source": lambda: FileAudioSource(path, pacing=args.pacing),
+            "stt": lambda: providers["stt"],
+            "llm": lambda: providers["llm"],
+            "tts": lambda: providers["tts"],
+            "audio_sink": make_sink,
+            "finish": lambda: finish,
+        }
+        pipeline = PipelineManager(config)
+        await asyncio.wait_for(pipeline.run(), timeout=args.call_timeout)
+    except asyncio.TimeoutError:
+        result["error"] = f"timeout after {args.call_timeout}s"
+    except Exception as e:
+        traceback.print_exc()
+        result["error"] = str(e)
+    finally:
+        if pipeline:
+            await pipeline.stop()
+
+    result["wall_seconds"] = round(time.monotonic() - start, 3)
+    if pipeline:
+        result.update({
+            "end_reason": pipeline.end_reason,
+            "audio_seconds": round(pipeline.audio_source.timeline.now(), 2),
+            "transcript": pipeline.transcript,
+            "summary": finish.summary(),
+            "latency": pipeline.metrics.summary(),
+            "outputs": [{key: value for key, value in output.items() if key != "audio"} for output in sink.outputs] if sink else [],
+        })
+    return result
+
+async def run_batch(args):
+    calls = list_calls(args.calls)
+    if not calls:
+        print(f"No calls found in {args.calls}")
+        return
+    apis = pick_apis(args)
+    print(f"Batch: {len(calls)} calls, {args.parallel} at a time, {args.pacing} pacing, "
+          f"STT: {apis['stt'].__name__}, LLM: {apis['llm'].__name__}, TTS: {apis['tts'].__name__}")
+
+    if USE_SHARED_VAD:
+        VAD_SERVICE.start()
+
+    semaphore = asyncio.Semaphore(args.parallel)
+    done = 0
+    errors = 0
+    audio_seconds = 0.0
+    wall_start = time.monotonic()
+    cpu_start = time.process_time()
+
+    with open(args.output, "w", encoding="utf-8") as output:
+        async def run_one(path: str):
+            nonlocal done, errors, audio_seconds
+            async with semaphore:
+                result = await run_call(path, args, apis)
+            done += 1
+            errors += "error" in result
+            audio_seconds += result.get("audio_seconds", 0.0)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+            print(f"[{done}/{len(calls)}] {result['call']}: {result.get('end_reason') or result.get('error')} in {result['wall_seconds']}s")
+
+        await asyncio.gather(*(run_one(path) for path in calls))
+
+        wall_seconds = time.monotonic() - wall_start
+        cpu_seconds = time.process_time() - cpu_start
+        totals = {
+            "type": "summary",
+            "calls": len(calls),
+            "errors": errors,
+            "parallel": args.parallel,
+            "pacing": args.pacing,
+            "audio_seconds": round(audio_seconds, 1),
+            "wall_seconds": round(wall_seconds, 1),
+            "cpu_seconds": round(cpu_seconds, 1),
+            "calls_per_hour": round(len(calls) / wall_seconds * 3600, 1),
+            "calls_per_cpu_hour": round(len(calls) / cpu_seconds * 3600, 1) if cpu_seconds else None,
+        }
+        output.write(json.dumps(totals) + "\n")
+
+    print(f"Batch finished: {json.dumps(totals)}")
+    print(f"Results written to {args.output}")
+    await VAD_SERVICE.stop()
+    EXECUTOR.shutdown()
+
+def start_batch(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Run the pipeline over recorded calls")
+    parser.add_argument("--calls", required=True, help="directory of recorded calls (files, or one directory per call)")
+    parser.add_argument("--output", default="batch_results.jsonl", help="results file (json lines)")
+    parser.add_argument("--parallel", type=int, default=os.cpu_count() or 1, help="calls running at the same time")
+    parser.add_argument("--pacing", choices=("realtime", "virtual"), default="virtual")
+    parser.add_argument("--call-timeout", type=float, default=1800, help="seconds before a call is abandoned")
+    parser.add_argument("--stt", type=int, default=None, help="STT index (see modelConfigs), default api if omitted")
+    parser.add_argument("--llm", type=int, default=None, help="LLM index")
+    parser.add_argument("--tts", type=int, default=None, help="TTS index")
+    asyncio.run(run_batch(parser.parse_args(argv)))
@@ -0,0 +1,95 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Iterable
+
+##
+#  Time source of a session: the audio source, sink, endpointing and latency metrics read the time and wait through
+#  the session's clock (audio_source.clock) instead of the event loop, so a recorded call can be replayed in virtual time
+#
+#  RealClock: the event loop clock, sleeps take as long as they say (live calls)
+#  VirtualClock: time is driven by the audio fed into the session (advance), plus the real time the pipeline spends
+#  on a turn (hold), sleeps return right away (simulated playback ends instantly). a replay runs as fast as the VAD
+#  and the providers allow, and the audio timing the pipeline sees is the same as in the live call
+##
+
+# turn tracking shared by both clocks: a session holds its clock while it works on a turn (hold), so whoever feeds it
+# audio from a recording can wait for it (released)
+class Clock:
+    virtual = False
+
+    def __init__(self):
+        self.holds = 0 # turns in progress
+        self.released = asyncio.Event() # set while no turn is in progress
+        self.released.set()
+        self.paused = 0.0 # seconds the audio feed was paused for turns in total (a live stream never pauses)
+
+    @contextmanager
+    def hold(self):
+        if self.holds == 0:
+            self.released.clear()
+            self.on_hold()
+        self.holds += 1
+        try:
+            yield
+        finally:
+            self.holds -= 1
+            if self.holds == 0:
+                self.on_release()
+                self.released.set()
+
+    def on_hold(self):
+        pass
+
+    def on_release(self):
+        pass
+
+    # audio fed by a replay, no effect in real time
+    def advance(self, seconds: float):
+        pass
+
+class RealClock(Clock):
+    def time(self) -> float:
+        return asyncio.get_event_loop().time()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    # wait until one of the tasks is done, or timeout seconds pass
+    async def wait(self, tasks: Iterable[asyncio.Future], timeout: float):
+        await asyncio.wait(set(tasks), timeout=timeout)
+
+class VirtualClock(Clock):
+    virtual = True
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self.hold_start = None # loop time when the turn in progress started
+
+    # while a turn is held, the real time spent on it counts (so stage latencies are real)
+    def time(self) -> float:
+        if self.hold_start is None:
+            return self.now
+        return self.now + asyncio.get_event_loop().time() - self.hold_start
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(0)
+
+    async def wait(self, tasks: Iterable[asyncio.Future], timeout: float):
+        await asyncio.sleep(0)
+
+    def on_hold(self):
+        self.hold_start = asyncio.get_event_loop().time()
+
+    def on_release(self):
+        now = self.time() # read once, so the pause and the new time agree
+        self.paused += now - self.now # no audio was fed while held
+        self.now = now
+        self.hold_start = None
+
+    # seconds of audio were fed
+    def advance(self, seconds: float):
+        self.now += seconds
+
+# shared by every live session (nothing waits on its holds)
+REAL_CLOCK = RealClock()
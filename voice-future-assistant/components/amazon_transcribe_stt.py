@@ -1,9 +1,10 @@
 import time
 from typing import Optional
 import boto3
-import tempfile
+import io
 import os
-from pipeline import STT
+import uuid
+from pipeline import STT, AudioClip
 import requests
 
 os.environ["AWS_SHARED_CREDENTIALS_FILE"] = os.path.join(os.getcwd(), "api_keys/voice-future-aws.json")
@@ -15,29 +16,22 @@ class AmazonTranscribe(STT):
         self.bucket_name = 'voice-future-recordings-lgp'
         self.chunk_size = 10 * 1024 * 1024  # 10 MB
 
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
-        temp_filename = tempfile.mktemp(suffix='.wav')
-        with open(temp_filename, 'wb') as f:
-            f.write(audio_data)
-
-        
-        s3_uri = self._upload_to_s3(temp_filename)
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
+        s3_uri = self._upload_to_s3(audio_data.to_wav())
         if not s3_uri:
-            os.unlink(temp_filename)
             print("Failed to upload to S3.")
             return None
             
         transcription = self._transcribe_audio(s3_uri)
-            
-        os.unlink(temp_filename)
         return transcription if transcription else "Desculpe, pode continuar."
 
         
-    def _upload_to_s3(self, file_path: str) -> Optional[str]:
+    # upload the wav from memory
+    def _upload_to_s3(self, wav_data: bytes) -> Optional[str]:
         s3_client = boto3.client('s3', region_name='eu-west-2')
         try:
-            object_name = os.path.basename(file_path)
-            s3_client.upload_file(file_path, self.bucket_name, object_name)
+            object_name = f"{uuid.uuid4().hex}.wav"
+            s3_client.upload_fileobj(io.BytesIO(wav_data), self.bucket_name, object_name)
             return f"s3://{self.bucket_name}/{object_name}"
         except Exception as e:
             print(f"Error with S3: {str(e)}")
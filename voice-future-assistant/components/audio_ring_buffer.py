@@ -0,0 +1,64 @@
+import numpy as np
+
+##
+#  Preallocated ring buffer of 16-bit PCM audio, in chunks of a fixed number of samples
+#  chunks are addressed by sequence number (chunk n is the n-th chunk ever appended, and starts at sample n * chunk),
+#  chunk n lives in slot n % capacity. nothing is allocated per chunk
+#  the sequence number is the clock of the audio (see audio_timeline.py), chunks carry no arrival time
+##
+
+class AudioRingBuffer:
+    def __init__(self, capacity: int, chunk: int):
+        self.capacity = capacity # in chunks
+        self.chunk = chunk # samples per chunk
+        self.samples = np.zeros(capacity * chunk, dtype=np.int16)
+        self.seq = 0 # chunks appended so far, and sequence number of the next one
+
+    def __len__(self) -> int:
+        return min(self.seq, self.capacity)
+
+    # sequence number of the oldest chunk still in the buffer
+    def oldest(self) -> int:
+        return max(0, self.seq - self.capacity)
+
+    # copy a chunk of pcm bytes into its slot, chunks of another size are ignored
+    def append(self, data: bytes) -> bool:
+        if len(data) != self.chunk * 2:
+            return False
+        slot = self.seq % self.capacity
+        self.samples[slot * self.chunk:(slot + 1) * self.chunk] = np.frombuffer(data, dtype=np.int16)
+        self.seq += 1
+        return True
+
+    # seconds from the start of the stream to the start of chunk seq
+    def chunk_time(self, seq: int, rate: int) -> float:
+        return seq * self.chunk / rate
+
+    # slot ranges covering chunks [start, end), two when the range wraps around the end of the buffer
+    def slot_ranges(self, start: int, end: int) -> list:
+        start = max(start, self.oldest())
+        count = max(0, min(end, self.seq) - start)
+        first = start % self.capacity
+        if first + count <= self.capacity:
+            return [(first, first + count)]
+        return [(first, self.capacity), (0, first + count - self.capacity)]
+
+    # int16 samples of chunks [start, end): a view into the buffer, or a copy when the range wraps around
+    # views are only valid until the chunks are overwritten, copy them to keep them
+    def read(self, start: int, end: int) -> np.ndarray:
+        views = [self.samples[a * self.chunk:b * self.chunk] for a, b in self.slot_ranges(start, end)]
+        return views[0] if len(views) == 1 else np.concatenate(views)
+
+    # chunks [start, end) normalized to [-1, 1] float32, written in place into out (shape (n, chunk))
+    # returns the filled rows of out
+    def read_float(self, start: int, end: int, out: np.ndarray) -> np.ndarray:
+        flat = out.reshape(-1)
+        row = 0
+        for a, b in self.slot_ranges(start, end):
+            np.multiply(self.samples[a * self.chunk:b * self.chunk], np.float32(1 / 32768.0),
+                        out=flat[row * self.chunk:(row + b - a) * self.chunk], dtype=np.float32, casting="unsafe")
+            row += b - a
+        return out[:row]
+
+    def clear(self):
+        self.seq = 0
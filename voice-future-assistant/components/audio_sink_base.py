@@ -1,16 +1,20 @@
 from abc import ABC, abstractmethod
 import asyncio
 import traceback
+from io import BytesIO
 from typing import Optional
 from pipeline import AudioSource, AudioSink, TTSOutputType
+from clock import REAL_CLOCK
 
 # base class for audio sink, that can be used to output audio to different sinks, like speakers, websites, etc.
 class AudioSinkBase(AudioSink):
     def __init__(self, audio_source: Optional[AudioSource] = None, isWebsocket: bool = False):
         self.audio_source = audio_source
         self.is_speaking = False
+        self.interrupted = False # set when the last output_audio was cut short by user speech
         self.interruption_delay = 1 # seconds to wait before stopping playback if user starts speaking
         self.isWebsocket = isWebsocket # flag tos ignal if we are using a websocket connection or not, to handle updates to frontend
+        self.clock = getattr(audio_source, 'clock', REAL_CLOCK) # playback runs on the session's clock (instant in replays)
 
     # setup source of audio data, can be microphone, website, voip api, etc.
     @abstractmethod
@@ -29,32 +33,48 @@ class AudioSinkBase(AudioSink):
         try:
             #load response audio playback
             self.is_speaking = True
+            self.interrupted = False
             await self.play_audio(audio_data, output_type)
             
             if self.audio_source:
-                speech_start_time = None
-                while await self.is_playing() and self.is_speaking: # while playback is active
-                    if await self.audio_source.detect_speech(): # if we detect new speech from user
-                        # if user only started speaking now, we start a timer
-                        if speech_start_time is None:
-                            speech_start_time = asyncio.get_event_loop().time()
-                            print("User speech detected during playback...")
-                        # if user has been talking for more than x seconds, we stop playback, and let him talk
-                        elif asyncio.get_event_loop().time() - speech_start_time > self.interruption_delay:
-                            print("Stopping playback due to client interruption...")
-                            await self.stop_playback()
-                            self.is_speaking = False
-                            print("Chatbot interrupted by user speech")
-                            break
-                    else: # if user is not talking, we reset the timer, and wait for a bit to check again
-                        speech_start_time = None
-                    await asyncio.sleep(0.1)
+                await self.wait_playback_or_interruption()
             self.is_speaking = False
 
         except Exception as e:
             print(f"Error to play the audio: {str(e)}")
             traceback.print_exc()
     
+    # wait until playback ends, or until the user has been speaking over it for interruption_delay seconds,
+    # then stop it. woken up by the playback end and the source's speech start event, nothing is polled
+    async def wait_playback_or_interruption(self):
+        playback = asyncio.create_task(self.wait_playback_end())
+        speech = asyncio.create_task(self.audio_source.detect_speech())
+        try:
+            await asyncio.wait({playback, speech}, return_when=asyncio.FIRST_COMPLETED)
+            if playback.done() or not speech.result(): # playback ended, or the source closed
+                return
+
+            # if user only started speaking now, we give them interruption_delay seconds before stopping playback
+            print("User speech detected during playback...")
+            await self.clock.wait({playback}, self.interruption_delay)
+            if playback.done() or not self.is_speaking:
+                return
+
+            print("Stopping playback due to client interruption...")
+            await self.stop_playback()
+            self.is_speaking = False
+            self.interrupted = True
+            print("Chatbot interrupted by user speech")
+        finally:
+            playback.cancel()
+            speech.cancel()
+
+    # wait until the audio stops playing. sinks that know when playback ends override this,
+    # the default checks is_playing (e.g. local speakers, where the mixer can't signal it)
+    async def wait_playback_end(self):
+        while await self.is_playing() and self.is_speaking:
+            await asyncio.sleep(0.1)
+
     async def stop(self):
         print("Stopping call received")
         if self.is_speaking:
@@ -64,3 +84,23 @@ class AudioSinkBase(AudioSink):
 
     async def quit(self):
         await self.stop()
+
+    #returns clip duration efficiently, or 0 on fail (for sinks that only simulate playback)
+    def audio_clip_duration(self, audio_data: bytes, output_type: TTSOutputType) -> float:
+        try:
+            from mutagen.mp3 import MP3
+            from mutagen.wave import WAVE
+            audio_file = BytesIO(audio_data)
+            print(f"Audio file size: {len(audio_data)} bytes with output type {output_type}")
+            if output_type == TTSOutputType.mp3:
+                audio = MP3(audio_file)
+            else:  # assume WAV
+                audio = WAVE(audio_file)
+            return audio.info.length
+        except Exception as e:
+            print(f"Failed to calculate audio clip duration")
+            traceback.print_exc()
+
+            # fallback for 16-bit PCM, 16kHz mono
+            return len(audio_data) / (16000 * 2)
+
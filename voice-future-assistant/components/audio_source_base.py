@@ -1,17 +1,38 @@
 import asyncio
-from abc import ABC, abstractmethod
-from collections import deque
-import wave
-import tempfile
 import os
+from abc import ABC, abstractmethod
 import numpy as np
-from typing import Optional, List
-from pipeline import AudioSource
-import torch 
-import torchaudio
+from typing import Optional, List, AsyncIterator
+from pipeline import AudioSource, AudioClip
+from components.audio_ring_buffer import AudioRingBuffer
+from components.audio_timeline import AudioTimeline
+from clock import REAL_CLOCK
+from vad_service import USE_SHARED_VAD, VAD_SERVICE
+from endpointing import EndpointDetector
+
+# seconds without any message from the client (audio or keepalive) before the connection is considered dead
+# 0 (default) disables it, the socket closing ends the session. The web client sends a keepalive every 10 s
+# while its mic is paused, so a timeout well above that (e.g. 120) only reclaims clients that vanished
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "0"))
+
+# load a Silero VAD model, returns (model, utils), or (None, None) on failure
+# torch is imported lazily, only for per-session models (VAD_SHARED=0), the shared VAD service runs the ONNX model without it
+def load_vad_model() -> tuple:
+    try: 
+        import torch
+        # Prefer CPU for VAD unless GPU is specifically needed and configured
+        vad_model, vad_utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
+                                              model='silero_vad',
+                                              force_reload=False, # Set to True first time or for updates
+                                              onnx=False) # Set to True if using ONNX runtime
+        print("Silero VAD model loaded successfully.")
+        return vad_model, vad_utils
+    except Exception as e:
+        print(f"Error loading Silero VAD model: {e}")
+        return None, None
 
 # base class for audio source, that can be used to get audio from different sources
-# handles buffer management, speech detection, clip capture, WAV creation
+# handles buffer management, speech detection, clip capture
 class AudioSourceBase(AudioSource):
 
     # setup source of audio data, can be microphone, website, voip api, etc.
@@ -24,117 +45,132 @@ class AudioSourceBase(AudioSource):
     def get_sample_width(self):
         pass
 
-    def __init__(self):
+    def __init__(self, vad: Optional[tuple] = None, clock=None):
+        # time source of the session (see clock.py), the sink, endpointing and metrics use it too
+        self.clock = clock or REAL_CLOCK
+
         # audio format constants
         self.channels = 1
         self.rate = 16000
         self.chunk = 512
 
-        # speech detection thresholds
-        self.noise_threshold = 5000
-        self.silence_threshold = 500 # silence threshold
+        # speech detection thresholds (16-bit sample units)
+        self.noise_threshold = 5000 # peak that always opens the energy gate
+        self.silence_threshold = 500 # minimum rms that opens the energy gate
         self.consecutive_frames = 1
         self.max_seconds = 15 # max recording time
-        self.silence_timeout = 1 # seconds of silence before stopping
+        self.silence_timeout = 1 # seconds of silence before stopping, when endpointing is fixed
         self.min_speech_chunks = int(0.2 * self.rate / self.chunk) # minimum speech chunks to consider speech detected (0.2 seconds of audio)
         self.pre_buffer_seconds = 0.5 # seconds of audio to pre-buffer before starting audio clip
         
         #buffer and state
-        self.buffer = deque(maxlen=int(self.rate / self.chunk * (self.max_seconds + 1)))  # buffer to store audio data at all times # it has enough space for max_chunks + 1 seconds of audio data
+        self.buffer = AudioRingBuffer(int(self.rate / self.chunk * (self.max_seconds + 1)), self.chunk)  # buffer to store audio data at all times # it has enough space for max_chunks + 1 seconds of audio data
         self.running = False # flag to break up recording continuously
         self.recording_task = None # task that records audio continuously, needed to shut it down at the end
+        self.monitor_task = None # VAD task (monitor_audio), started by the derived class with the recording
+        self.frame_waiters = set() # one event per stream_frames consumer, set when chunks are appended
+
+        # connection state: closed is set once the source is done, for any reason (close_reason):
+        # "disconnected" (client went away), "idle" (nothing received for idle_timeout seconds) or "stopped" (session ended)
+        self.closed = asyncio.Event()
+        self.close_reason = None
+        self.idle_timeout = SESSION_IDLE_TIMEOUT or None # None: wait for the client forever
+        self.pcm_carry = bytearray() # incomplete chunk left over by append_pcm, completed by the next data
+        self.timeline = AudioTimeline(self.rate) # sample clock of the stream, mapped to wall clock for latency metrics
+        self.timeline_paused = 0.0 # clock.paused when the last packet arrived
+        self.feed_start = None # clock time at which feed_pcm started the stream (real time pacing)
+        self.recorder = None # session recorder (see session_recorder.py), set by the pipeline when recording
 
         # Event-based state
         self.speech_start_event = asyncio.Event() # event to signal when speech starts
         self.speech_stop_event = asyncio.Event() # event to signal when speech stops
+        # speech start and silence start are in stream seconds (sample clock), end and last voice in wall time (for metrics)
         self.current_speech_start = None
         self.current_speech_end = None
+        self.current_speech_last_voice = None # last chunk with speech, before the silence that ended it
+        self.current_speech_start_seq = None # same positions, as chunk sequence numbers in the buffer
+        self.current_speech_end_seq = None
+        self.current_speech_segments = [] # (start_seq, end_seq) chunk ranges with speech, of the last utterance
+        self.speech_segments = [] # segments of the utterance in progress
+        self.segment_start_seq = None # start of the speech segment in progress, None during silence
+        self.speech_active = False
+        self.silence_start_time = None
 
-        try: 
-            # Prefer CPU for VAD unless GPU is specifically needed and configured
-            self.vad_model, self.vad_utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
-                                                            model='silero_vad',
-                                                            force_reload=False, # Set to True first time or for updates
-                                                            onnx=False) # Set to True if using ONNX runtime
+        # picks the silence that ends each utterance (see endpointing.py), can be replaced per session
+        self.endpointer = EndpointDetector(fixed_timeout=self.silence_timeout)
+
+        # VAD cursor over the buffer: sequence number of the next chunk to score
+        self.vad_cursor = 0
+        self.vad_scored_chunks = 0 # chunks that went through the VAD state machine (gated or not)
+        self.vad_dropped_chunks = 0 # chunks that left the buffer before being scored
+        self.vad_progress = asyncio.Event() # set after every scoring pass, for replays waiting on the VAD
+        self.vad_scratch = np.empty((int(self.rate / self.chunk), self.chunk), dtype=np.float32) # float audio scored per pass, up to 1 second
 
+        # energy pre-gate: clearly silent chunks skip the neural VAD and count as silence
+        self.energy_gate = os.getenv("VAD_ENERGY_GATE", "1") == "1"
+        self.gate_open = False
+        self.gate_hangover_chunks = int(0.3 * self.rate / self.chunk) # quiet chunks still scored after the energy drops
+        self.gate_hangover = 0
+        self.noise_floor = self.silence_threshold / 2 # running rms estimate of the line noise
+        self.vad_gated_chunks = 0 # chunks skipped by the energy gate
+
+        # VAD: a stream of the process wide VAD service (one model, batched across sessions),
+        # or an own model, preloaded by the session pool if available (loading it takes a while)
+        self.vad_threshold = 0.5
+        self.vad_stream = VAD_SERVICE.register() if USE_SHARED_VAD else None
+        self.vad_model, self.vad_utils = (None, None) if self.vad_stream else (vad if vad else load_vad_model())
+        if self.vad_model:
             (self.get_speech_timestamps,
              self.save_audio,
              self.read_audio,
              self.VADIterator,
              self.collect_chunks) = self.vad_utils
-
-            self.vad_threshold = 0.5
-            print("Silero VAD model loaded successfully.")
-        except Exception as e:
-            print(f"Error loading Silero VAD model: {e}")
-            self.vad_model = None 
             
-    async def get_audio(self) -> bytes:
-        # Check for speech
+    async def get_audio(self) -> Optional[AudioClip]:
+        # Check for speech (returns False if the source closed)
         if not await self.detect_speech():
-            return b""  
+            return None
         
         print("Speech detected, start capturing clip...")
-        # record audio with silence detection
-        temp_filename = tempfile.mktemp(dir=f'{os.getcwd()}/temp', suffix='.wav')
-
-        frames = await self.capture_audio_clip()
-        if not frames:
+        # record audio with silence detection, the clip stays in memory and goes straight to the stt api
+        clip = await self.capture_audio_clip()
+        if not clip:
             print("Capturing clip failed or was cancelled.")
-            return b""
-
-        # write the clip to a temp file
-        wf = wave.open(temp_filename, 'wb')
-        wf.setnchannels(self.channels)
-        wf.setsampwidth(self.get_sample_width())
-        wf.setframerate(self.rate)
-        wf.writeframes(b''.join(frames))
-        wf.close()
-
-        print(f"Audio clip saved to {temp_filename}")
-        # read the recorded audio data bytes, formatted for wav, and delete the temp file, send as bytes to stt api
-        with open(temp_filename, 'rb') as f:
-            audio_data = f.read()
-
-        os.unlink(temp_filename)
-        return audio_data
+            return None
+        return clip
 
     #extract audio clip from the continuously filled buffer
-    async def capture_audio_clip(self) -> Optional[bytes]:
+    async def capture_audio_clip(self) -> Optional[AudioClip]:
         print("\nListening... (Press Ctrl+C to stop recording)")
         try: 
             # wait for speech to start
-            await self.speech_start_event.wait()
-            start_timestamp = self.current_speech_start
-            # print(f"Speech started at timestamp {start_timestamp}")
+            if not await self.wait_for(self.speech_start_event):
+                return None
+            start_seq = self.current_speech_start_seq
+            # print(f"Speech started at timestamp {self.current_speech_start}")
             self.speech_start_event.clear()  # Reset for next capture
 
             # wait for speech to end
-            await self.speech_stop_event.wait()
-            end_timestamp = self.current_speech_end
-            # print(f"Speech stopped at timestamp {end_timestamp}")
+            if not await self.wait_for(self.speech_stop_event):
+                return None
+            end_seq = self.current_speech_end_seq
+            # print(f"Speech stopped at timestamp {self.current_speech_end}")
             self.speech_stop_event.clear()  # reset for next capture
 
-            #extract clip from buffer, between start and end timestamps
-            pre_buffer_start = start_timestamp - self.pre_buffer_seconds
-            frames = []
-            found_start = False
-
-            for data, timestamp in self.buffer:
-                if timestamp >= pre_buffer_start and not found_start:
-                    found_start = True
-                if found_start and timestamp <= end_timestamp:
-                    if len(data) == self.chunk * self.get_sample_width():
-                        frames.append(data)
-                elif timestamp > end_timestamp:
-                    break
-
-            if len(frames) < self.min_speech_chunks:
+            #extract clip from buffer, between start (minus the pre-buffer) and end chunks
+            clip_start = max(self.buffer.oldest(), start_seq - int(self.pre_buffer_seconds * self.rate / self.chunk))
+            clip_end = end_seq + 1
+            if clip_end - clip_start < self.min_speech_chunks:
                 print("Not enough audio captured")
                 return None
 
-            print(f"Captured {len(frames)} chunks, total duration: {len(frames) * self.chunk / self.rate:.2f} seconds")
-            return frames
+            print(f"Captured {clip_end - clip_start} chunks, total duration: {(clip_end - clip_start) * self.chunk / self.rate:.2f} seconds")
+            # speech segments found by the VAD, in seconds from the start of the clip
+            seconds_per_chunk = self.chunk / self.rate
+            segments = [(max(0, start - clip_start) * seconds_per_chunk, (min(end, clip_end) - clip_start) * seconds_per_chunk)
+                        for start, end in self.current_speech_segments if end > clip_start]
+            # copied out of the ring buffer, the clip outlives the chunks it holds
+            return AudioClip(self.buffer.read(clip_start, clip_end).tobytes(), self.rate, self.get_sample_width(), self.channels, segments)
         
         except KeyboardInterrupt:
             print("\nRecording stopped by user.")
@@ -143,87 +179,294 @@ class AudioSourceBase(AudioSource):
             print(f"\nRecording error: {str(e)}")
             return False
         
-    # helper to append data with timestamp
+    # helper to append a chunk, every chunk gets the next sequence number (chunks of another size are ignored)
     def append_to_buffer(self, data):
-        timestamp = asyncio.get_event_loop().time()
-        self.buffer.append((data, timestamp))
-    
+        if self.buffer.append(data):
+            for waiter in self.frame_waiters:
+                waiter.set()
+
+    # append pcm of any length, as it arrives: the packet advances the stream's timeline (arrival time only feeds the
+    # jitter/gap stats and the wall clock mapping). whole chunks go to the buffer as memoryview slices of data (the buffer
+    # copies them once, into place), an incomplete tail is carried over and completed by the next call instead of being padded with silence
+    def append_pcm(self, data: bytes):
+        chunk_bytes = self.chunk * self.get_sample_width()
+        paused = self.clock.paused - self.timeline_paused # the replay paused the feed for turns (virtual clock)
+        self.timeline_paused = self.clock.paused
+        self.timeline.arrive(len(data) // self.get_sample_width(), self.clock.time(), paused)
+        if self.recorder:
+            self.recorder.audio(data)
+        view = memoryview(data)
+        if self.pcm_carry:
+            needed = chunk_bytes - len(self.pcm_carry)
+            self.pcm_carry += view[:needed]
+            view = view[needed:]
+            if len(self.pcm_carry) < chunk_bytes:
+                return
+            self.append_to_buffer(self.pcm_carry)
+            self.pcm_carry = bytearray()
+
+        whole = len(view) - len(view) % chunk_bytes
+        for offset in range(0, whole, chunk_bytes):
+            self.append_to_buffer(view[offset:offset + chunk_bytes])
+        self.pcm_carry += view[whole:]
+
+    # feed recorded pcm as if it was arriving live, in packets of packet_bytes (the frontend sends 2048)
+    # real clock: paced in real time, each packet once it would have been recorded, counted from the first packet ever fed
+    # (so consecutive calls, e.g. one packet of silence at a time, don't drift behind)
+    # virtual clock: as fast as the VAD scores it, paused while the session is working on a turn (clock.hold)
+    async def feed_pcm(self, data: bytes, packet_bytes: int = 2048):
+        if self.feed_start is None:
+            self.feed_start = self.clock.time() - self.timeline.now()
+        for offset in range(0, len(data), packet_bytes):
+            if not self.running:
+                return
+            packet = data[offset:offset + packet_bytes]
+            seconds = len(packet) / self.get_sample_width() / self.rate
+            if self.clock.virtual:
+                if not await self.wait_for(self.clock.released) or not await self.wait_for_vad():
+                    return
+                # an utterance just ended: let the pipeline pick it up (and hold the clock) before feeding more
+                while self.speech_stop_event.is_set() and self.running:
+                    await asyncio.sleep(0)
+                self.clock.advance(seconds)
+            else:
+                await self.clock.sleep(max(0.0, self.feed_start + self.timeline.now() + seconds - self.clock.time()))
+            self.append_pcm(packet)
+
+    # wait until the VAD scored everything in the buffer, returns False if the source closed
+    # (so speech is detected at the same point of the audio however fast it is fed)
+    async def wait_for_vad(self) -> bool:
+        monitor = self.monitor_task
+        while self.vad_cursor < self.buffer.seq:
+            if monitor is None or monitor.done(): # no VAD running, nothing to wait for
+                return True
+            self.vad_progress.clear()
+            if not await self.wait_for(self.vad_progress):
+                return False
+        return True
+
+    # live audio: yields the pcm of the chunks appended from now on, as they arrive (for streaming stt)
+    # every chunk is yielded once, chunks that arrived together are yielded together. a consumer that falls
+    # more than the buffer behind skips the chunks that left it
+    async def stream_frames(self) -> AsyncIterator[bytes]:
+        waiter = asyncio.Event()
+        self.frame_waiters.add(waiter)
+        cursor = self.buffer.seq
+        try:
+            while self.running:
+                if cursor == self.buffer.seq:
+                    await waiter.wait()
+                    waiter.clear()
+                    continue
+                end = self.buffer.seq
+                frames = self.buffer.read(cursor, end).tobytes()
+                cursor = end
+                yield frames
+        finally:
+            self.frame_waiters.discard(waiter)
+
+    # range [start, end) of chunks appended since the VAD cursor, at most limit chunks
+    # chunks that already left the buffer are counted as dropped
+    def pending_chunks(self, limit: int) -> tuple:
+        start = self.vad_cursor
+        if start < self.buffer.oldest():
+            self.vad_dropped_chunks += self.buffer.oldest() - start
+            start = self.buffer.oldest()
+        end = min(self.buffer.seq, start + limit)
+        self.vad_cursor = end
+        return start, end
+
     # return if speech is present, based on when start_event is called from monitor_audio
     async def detect_speech(self) -> bool:
         # Wait for the speech start event
-        await self.speech_start_event.wait()
-        return True
+        return await self.wait_for(self.speech_start_event)
+
+    # wait for an event of this source, returns False instead if the source closes first
+    async def wait_for(self, event: asyncio.Event) -> bool:
+        if event.is_set():
+            return True
+        if self.closed.is_set():
+            return False
+        event_task = asyncio.create_task(event.wait())
+        closed_task = asyncio.create_task(self.closed.wait())
+        try:
+            await asyncio.wait({event_task, closed_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            event_task.cancel()
+            closed_task.cancel()
+        return event.is_set()
+
+    # mark the source as done: recording stops and everything waiting on it (get_audio, stream_frames, monitor) returns
+    def close(self, reason: str):
+        if self.closed.is_set():
+            return
+        print(f"Audio source closed: {reason}")
+        self.close_reason = reason
+        self.running = False
+        self.closed.set()
+        for waiter in self.frame_waiters: # wake up stream_frames consumers, so they see the source stopped
+            waiter.set()
     
+    # speech probability of each chunk, in order. Silero is recurrent (its state carries over from chunk to chunk),
+    # so the chunks of one stream are scored sequentially, but the backlog is scored in a single no-grad pass
+    # audio: float32 array of shape (n, chunk), normalized to [-1, 1]
+    def score_chunks(self, audio: np.ndarray) -> list:
+        import torch
+        audio_tensor = torch.from_numpy(audio)
+        with torch.inference_mode():
+            return [self.vad_model(window, self.rate).item() for window in audio_tensor]
+
+    # speech start/stop state machine, fed with the speech probability of every chunk and its stream time
+    # all timing runs on the sample clock, so bursts of late packets end an utterance exactly like real time audio
+    def update_speech_state(self, speech_prob: float, timestamp: float, seq: int):
+        is_speech = speech_prob >= self.vad_threshold
+
+        if is_speech and not self.speech_active:
+            self.speech_active = True
+            self.current_speech_start = timestamp
+            self.current_speech_start_seq = seq
+            self.speech_segments = []
+            self.segment_start_seq = seq
+            self.endpointer.reset()
+            self.endpointer.observe(speech_prob)
+            self.speech_start_event.set()
+            self.silence_start_time = None
+            if self.recorder:
+                self.recorder.record("speech_start", stream_time=round(timestamp, 3))
+
+        elif not is_speech and self.speech_active:
+            if self.silence_start_time is None:
+                self.silence_start_time = timestamp
+                self.speech_segments.append((self.segment_start_seq, seq))
+                self.segment_start_seq = None
+
+            utterance_seconds = self.silence_start_time - self.current_speech_start
+            # partial transcripts are stamped in wall time
+            timeout, cues = self.endpointer.timeout(utterance_seconds, self.timeline.wall_time(timestamp))
+            if (timestamp - self.silence_start_time) >= timeout:
+                self.endpointer.log_endpoint(timeout, cues, utterance_seconds)
+                if self.recorder:
+                    self.recorder.record("speech_end", stream_time=round(timestamp, 3), timeout=round(timeout, 3))
+                self.speech_active = False
+                self.current_speech_last_voice = self.timeline.wall_time(self.silence_start_time)
+                self.current_speech_end = self.timeline.wall_time(timestamp)
+                self.current_speech_end_seq = seq
+                self.current_speech_segments = self.speech_segments
+                self.speech_stop_event.set()
+                self.silence_start_time = None
+
+        elif is_speech and self.speech_active:
+            self.silence_start_time = None
+            self.endpointer.observe(speech_prob)
+            if self.segment_start_seq is None:
+                self.segment_start_seq = seq
+
+    # wall time the user last spoke, for turns that start before VAD declares the end of speech (streaming stt)
+    # in the silence that may end the utterance: its start. still speaking: the latest audio. otherwise: the last utterance
+    def last_voice_time(self) -> Optional[float]:
+        if self.speech_active:
+            return self.timeline.wall_time(self.silence_start_time if self.silence_start_time is not None else self.timeline.now())
+        return self.current_speech_last_voice
+
+    # which chunks go through the neural VAD. rms above the open threshold (which follows the noise floor) or a loud peak
+    # opens the gate, it closes after gate_hangover_chunks chunks below half the open threshold (hysteresis)
+    # audio: float32 array of shape (n, chunk), normalized to [-1, 1]
+    def energy_gate_mask(self, audio: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.einsum('ij,ij->i', audio, audio) / self.chunk) * 32768
+        peak = np.maximum(audio.max(axis=1), -audio.min(axis=1)) * 32768
+        mask = np.empty(len(audio), dtype=bool)
+
+        for i in range(len(audio)):
+            open_threshold = max(self.silence_threshold, 3 * self.noise_floor)
+            if rms[i] >= open_threshold or peak[i] >= self.noise_threshold:
+                self.gate_open = True
+                self.gate_hangover = self.gate_hangover_chunks
+            elif rms[i] < open_threshold / 2:
+                if self.gate_hangover > 0:
+                    self.gate_hangover -= 1
+                else:
+                    self.gate_open = False
+            mask[i] = self.gate_open
+
+            # noise floor: falls quickly to quiet chunks, rises slowly (speech barely moves it, a steady noise does)
+            self.noise_floor += (0.3 if rms[i] < self.noise_floor else 0.002) * (rms[i] - self.noise_floor)
+        return mask
+
+    # speech probability of each chunk: gated chunks are silence (0), the others are scored by the VAD model
+    async def speech_probabilities(self, audio: np.ndarray) -> list:
+        mask = self.energy_gate_mask(audio) if self.energy_gate else None
+        if mask is None or mask.all():
+            return await self.vad_stream.score(audio) if self.vad_stream else self.score_chunks(audio)
+
+        speech_probs = [0.0] * len(audio)
+        self.vad_gated_chunks += int(len(audio) - mask.sum())
+        if mask.any():
+            scored = audio[mask]
+            indices = np.flatnonzero(mask)
+            probs = await self.vad_stream.score(scored) if self.vad_stream else self.score_chunks(scored)
+            for i, prob in zip(indices, probs):
+                speech_probs[i] = prob
+        return speech_probs
+
+    # VAD counters of this session
+    def vad_stats(self) -> dict:
+        return {
+            "chunks": self.vad_scored_chunks,
+            "gated": self.vad_gated_chunks,
+            "gated_fraction": round(self.vad_gated_chunks / self.vad_scored_chunks, 3) if self.vad_scored_chunks else 0.0,
+            "dropped": self.vad_dropped_chunks,
+            "noise_floor": round(float(self.noise_floor), 1),
+            "endpoint": self.endpointer.stats(),
+        }
+
     # continuously monitor the audio stream for speech detection, updating the speech start and stop events
+    # every chunk is scored exactly once, the ones that arrived since the last pass are scored together
+    # sleeps until new chunks are appended, so an idle session doesn't wake up
     async def monitor_audio(self):
-        if not self.vad_model:
-            print("Silero VAD not loaded, falling back to basic energy detection (or implement fallback).")
+        if not self.vad_model and not self.vad_stream:
+            print("Silero VAD not loaded, no speech can be detected")
+            self.close("vad unavailable")
             return
         
-        silent_chunks = 0
-        speech_active = False
-        silence_start_time = None
-        vad_state = None 
-        
+        new_chunks = asyncio.Event()
+        self.frame_waiters.add(new_chunks)
         while self.running:
-            if not self.buffer:
-                await asyncio.sleep(0.1) 
-                continue
-            
             try:
-                data, timestamp = self.buffer[-1] 
-                if len(data) != self.chunk * self.get_sample_width():
-                    print(f"Skipping invalid chunk size: {len(data)}")
-                    await asyncio.sleep(0.01)
+                new_chunks.clear() # before reading the cursor, so chunks appended during scoring wake the next pass
+                start, end = self.pending_chunks(len(self.vad_scratch))
+                if start == end:
+                    await new_chunks.wait()
                     continue
 
-                audio_int16 = np.frombuffer(data, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0 # Normalize to [-1, 1]
-                audio_tensor = torch.from_numpy(audio_float32)
-
-                
-                speech_prob = self.vad_model(audio_tensor, self.rate).item()
-
-                is_speech = speech_prob >= self.vad_threshold
-
-                
-                if is_speech and not speech_active:
-                    speech_active = True
-                    self.current_speech_start = timestamp
-                    self.speech_start_event.set()
-                    silent_chunks = 0
-                    silence_start_time = None
-
-                elif not is_speech and speech_active:
-                    if silence_start_time is None:
-                        silence_start_time = timestamp
-
-                    if (timestamp - silence_start_time) >= self.silence_timeout:
-                        speech_active = False
-                        self.current_speech_end = timestamp
-                        self.speech_stop_event.set()
-                        silent_chunks = 0
-                        silence_start_time = None
-                    else:
-                        silent_chunks += 1 
-                
-                elif is_speech and speech_active:
-                    silent_chunks = 0
-                    silence_start_time = None
+                # float conversion in place, in the scratch buffer reused on every pass
+                audio = self.buffer.read_float(start, end, self.vad_scratch)
+                speech_probs = await self.speech_probabilities(audio)
+                for seq, speech_prob in enumerate(speech_probs, start):
+                    self.update_speech_state(speech_prob, self.buffer.chunk_time(seq, self.rate), seq)
+                self.vad_scored_chunks += end - start
+                self.vad_progress.set()
                 
             except Exception as e:
                 print(f"Monitor audio error: {str(e)}")
+                if self.vad_stream and self.vad_stream.service.load_error:
+                    # shared VAD model couldn't be loaded by any backend, no turn would ever be detected
+                    self.close("vad unavailable")
+                    break
                 await asyncio.sleep(0.01) 
                 continue
 
-            await asyncio.sleep(0.01)  
+        self.frame_waiters.discard(new_chunks)
         
     async def stop(self):
-        self.running = False
-        if self.recording_task: 
-            await asyncio.sleep(0.1)  # Give task a chance to exit
-            self.recording_task.cancel()
-            try:
-                await self.recording_task
-            except asyncio.CancelledError:
-                print("Recording task cancelled.")
\ No newline at end of file
+        self.close("stopped")
+        print(f"VAD stats: {self.vad_stats()}")
+        print(f"Audio timeline: {self.timeline.stats()}")
+        if self.vad_stream:
+            self.vad_stream.close()
+
+        # cancel the recording and VAD tasks, and wait until they have finished (e.g. a pending websocket receive)
+        tasks = [task for task in (self.recording_task, self.monitor_task) if task and task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print("Recording and monitor tasks stopped.")
\ No newline at end of file
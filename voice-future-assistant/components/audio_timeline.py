@@ -0,0 +1,82 @@
+import os
+from typing import Optional
+
+##
+#  Sample clock of an audio stream: the position of every sample is the number of samples received before it,
+#  so timing inside the stream (speech start, silence length, clip duration) doesn't depend on when packets arrived
+#  the stream is mapped to wall clock (event loop time) only at the edges, e.g. to measure latency from the end of speech:
+#  sample 0 sits at origin, the earliest arrival the packets allow (the least delayed packet defines it)
+#
+#  packets arriving later than the clock says are late by `lateness` seconds, the spread of that is the jitter
+#  (interarrival jitter, as in RTP). a packet late by more than AUDIO_GAP_THRESHOLD seconds means the stream stopped
+#  for a while (client paused or network stall): the gap is counted and the clock is re-anchored at that packet,
+#  a stall followed by a burst of the held back audio pulls the origin back again
+#  a pause the feeder announces (a replay stops feeding while a turn is processed, see clock.py) re-anchors the
+#  clock the same way, but isn't a gap and doesn't count towards the jitter
+##
+
+AUDIO_GAP_THRESHOLD = float(os.getenv("AUDIO_GAP_THRESHOLD", "0.5"))
+
+class AudioTimeline:
+    def __init__(self, rate: int, gap_threshold: float = AUDIO_GAP_THRESHOLD):
+        self.rate = rate
+        self.gap_threshold = gap_threshold
+        self.samples = 0 # samples received so far
+        self.origin: Optional[float] = None # wall time of sample 0
+        self.last_implied_origin: Optional[float] = None
+
+        # stats
+        self.packets = 0
+        self.jitter = 0.0
+        self.max_lateness = 0.0
+        self.gaps = 0
+        self.gap_seconds = 0.0
+
+    # a packet of `samples` samples arrived at wall time `arrival`, `paused` seconds after the feed was deliberately
+    # paused (seconds since the previous packet)
+    def arrive(self, samples: int, arrival: float, paused: float = 0.0):
+        self.samples += samples
+        self.packets += 1
+        # where sample 0 would be if this packet had arrived without delay
+        implied_origin = arrival - self.samples / self.rate
+
+        if self.origin is None or implied_origin < self.origin:
+            self.origin = implied_origin
+        lateness = implied_origin - self.origin
+        if lateness > self.gap_threshold and lateness - paused <= self.gap_threshold:
+            self.origin = implied_origin
+            self.last_implied_origin = implied_origin
+            return
+        if lateness > self.gap_threshold:
+            self.gaps += 1
+            self.gap_seconds += lateness - paused
+            print(f"Audio gap: stream {lateness:.2f}s behind the clock at {self.samples / self.rate:.2f}s, re-anchoring")
+            self.origin = implied_origin
+        else:
+            self.max_lateness = max(self.max_lateness, lateness)
+
+        if self.last_implied_origin is not None:
+            self.jitter += (abs(implied_origin - self.last_implied_origin) - self.jitter) / 16
+        self.last_implied_origin = implied_origin
+
+    # seconds from the start of the stream to sample n
+    def seconds(self, sample: int) -> float:
+        return sample / self.rate
+
+    # stream seconds -> wall time
+    def wall_time(self, stream_seconds: float) -> Optional[float]:
+        return None if self.origin is None else self.origin + stream_seconds
+
+    # stream seconds of everything received so far
+    def now(self) -> float:
+        return self.samples / self.rate
+
+    def stats(self) -> dict:
+        return {
+            "seconds": round(self.now(), 2),
+            "packets": self.packets,
+            "jitter_ms": round(self.jitter * 1000, 1),
+            "max_lateness_ms": round(self.max_lateness * 1000, 1),
+            "gaps": self.gaps,
+            "gap_seconds": round(self.gap_seconds, 2),
+        }
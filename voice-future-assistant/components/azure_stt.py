@@ -1,8 +1,7 @@
 import os
-import tempfile
 from typing import Optional
 import azure.cognitiveservices.speech as speechsdk
-from pipeline import STT
+from pipeline import STT, AudioClip
 
 os.environ["AZURE_CREDENTIALS_PATH"] = os.path.join(os.getcwd(), "api_keys/voice-future-azure.json")
 
@@ -24,13 +23,16 @@ class AzureSTT(STT):
         self.speech_config = speechsdk.SpeechConfig(subscription=self.subscription, region=self.region)
         self.speech_config.speech_recognition_language = self.language
 
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
-        temp_filename = tempfile.mktemp(suffix=".wav")
-        with open(temp_filename, 'wb') as f:
-            f.write(audio_data)
-
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
         try:
-            audio_input = speechsdk.AudioConfig(filename=temp_filename)
+            # push the pcm from memory, the stream is closed so recognition knows where the audio ends
+            stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=audio_data.sample_rate,
+                                                              bits_per_sample=audio_data.sample_width * 8,
+                                                              channels=audio_data.channels)
+            push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+            push_stream.write(audio_data.pcm)
+            push_stream.close()
+            audio_input = speechsdk.AudioConfig(stream=push_stream)
             recognizer = speechsdk.SpeechRecognizer(speech_config=self.speech_config, audio_config=audio_input)
 
             result = recognizer.recognize_once_async().get()
@@ -50,6 +52,3 @@ class AzureSTT(STT):
         except Exception as e:
             print(f"Azure STT error: {e}")
             return None
-
-        finally:
-            os.unlink(temp_filename)
@@ -1,8 +1,7 @@
 import os
-import tempfile
 import requests
 from typing import Optional
-from pipeline import STT
+from pipeline import STT, AudioClip
 
 class ElevenLabsSTT(STT):
     def __init__(self):
@@ -10,12 +9,7 @@ class ElevenLabsSTT(STT):
         self.endpoint = "https://api.elevenlabs.io/v1/speech-to-text"
         self.model_id = "scribe_v1"  # Ensure this is a valid model ID
 
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
-        # Save raw audio data to a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_audio_file:
-            temp_audio_file.write(audio_data)
-            temp_audio_file_path = temp_audio_file.name
-
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
         try:
             # Construct the xi-api-key header
             headers = {
@@ -23,16 +17,16 @@ class ElevenLabsSTT(STT):
             }
             print(f"xi-api-key Header: {headers['xi-api-key']}")  # Debugging the header
 
-            # Prepare the file and data payload
+            # Prepare the file and data payload, the wav is built in memory and uploaded as multipart
             files = {
-                "file": open(temp_audio_file_path, "rb")  # Open the audio file in binary mode
+                "file": ("audio.wav", audio_data.to_wav(), "audio/wav")
             }
             data = {
                 "model_id": self.model_id
             }
 
             # Send the POST request
-            print(f"Sending audio file: {temp_audio_file_path}")
+            print(f"Sending audio clip: {audio_data.duration():.2f} seconds")
             response = requests.post(self.endpoint, headers=headers, files=files, data=data)
             response.raise_for_status()
 
@@ -47,8 +41,4 @@ class ElevenLabsSTT(STT):
             print(f"Error in Eleven Labs STT: {str(e)}")
             if e.response is not None:
                 print(f"Response content: {e.response.text}")
-            return None
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_audio_file_path):
-                os.remove(temp_audio_file_path)
\ No newline at end of file
+            return None
\ No newline at end of file
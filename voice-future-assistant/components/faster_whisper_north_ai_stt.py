@@ -1,9 +1,8 @@
-import os
-import tempfile
+import numpy as np
 import torch
 from typing import Optional
 from faster_whisper import WhisperModel
-from pipeline import STT
+from pipeline import STT, AudioClip
 
 #benchmarks for faster-whisper custom pt models: https://github.com/TigreGotico/stt-benchmarks/blob/dev/README.md
 # this is the best performing model
@@ -14,6 +13,7 @@ class FasterWhisperMyNorthAISTT(STT):
         self.compute_type = "float16" if self.device == "cuda" else "int8"
         self.model_size = "Jarbas/faster-whisper-small-pt-MyNorthAI" # can be "Jarbas/faster-whisper-small-pt-MyNorthAI", "Jarbas/faster-whisper-medium-pt-MyNorthAI","Jarbas/faster-whisper-large-v3-pt-MyNorthAI" , among others (these are northAI specific models)
         self.beam_size = 1 # higher is better, but slower
+        self.segment_padding = 0.3 # seconds of audio kept around each VAD speech segment
         print(f"Loading Whisper model '{self.model_size}' on {self.device} ({self.compute_type})")
 
         try:
@@ -26,18 +26,19 @@ class FasterWhisperMyNorthAISTT(STT):
             print(f"Failed to load Whisper model: {e}")
             raise
 
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp.write(audio_data)
-            tmp_path = tmp.name
-
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
         try:
-            # integrates the Silero VAD model to filter out parts of the audio without speech:
+            # whisper takes 16kHz float32 samples directly, no file needed
+            audio = np.frombuffer(audio_data.pcm, dtype=np.int16).astype(np.float32) / 32768.0
+            # our VAD already found the speech segments, so whisper's own VAD pass is skipped and only those are decoded
+            # (padded like whisper's VAD pads its own segments, so words at the edges aren't clipped)
+            clip_timestamps = [t for segment in audio_data.padded_speech_segments(self.segment_padding) for t in segment] or "0"
             segments, info = self.model.transcribe(
-                tmp_path,
+                audio,
                 beam_size=self.beam_size,
                 language=self.language,
-                vad_filter=True
+                vad_filter=False,
+                clip_timestamps=clip_timestamps
             )
 
             result = " ".join([segment.text for segment in segments])
@@ -46,6 +47,4 @@ class FasterWhisperMyNorthAISTT(STT):
         
         except Exception as e:
             print(f"WhisperSTT error: {e}")
-            return None
-        finally:
-            os.remove(tmp_path)
\ No newline at end of file
+            return None
\ No newline at end of file
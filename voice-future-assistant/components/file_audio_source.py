@@ -0,0 +1,60 @@
+import asyncio
+import os
+from typing import Optional
+from components.audio_source_base import AudioSourceBase
+from clock import RealClock, VirtualClock
+from pcm_files import SAMPLE_WIDTH, load_pcm_files
+
+##
+#  Audio source that streams recorded 16kHz mono 16-bit audio into the pipeline, for benchmarks, soak tests and batch runs
+#  path: a wav/pcm file (a whole recorded call) or a directory of them (one file per user turn, in name order)
+#  every turn is followed by turn_gap seconds of silence, the pause the user leaves for the response, and the next turn
+#  starts once the response is done (a live mic keeps sending silence meanwhile). the source closes ("end of input")
+#  once everything was fed and answered
+#
+#  FILE_SOURCE_PACING: realtime (default, like a live call) or virtual (as fast as the pipeline goes, see clock.py)
+##
+
+FILE_SOURCE_PACING = os.getenv("FILE_SOURCE_PACING", "realtime")
+
+class FileAudioSource(AudioSourceBase):
+    def __init__(self, path: str, pacing: str = FILE_SOURCE_PACING, turn_gap: float = 2.0,
+                 packet_bytes: int = 2048, vad: Optional[tuple] = None):
+        super().__init__(vad, VirtualClock() if pacing == "virtual" else RealClock())
+        self.path = path
+        self.turns = load_pcm_files(path)
+        self.turn_gap = turn_gap
+        self.packet_bytes = packet_bytes # bytes per packet, the frontend sends 2048
+        print(f"FileAudioSource: {len(self.turns)} turn(s) from {path}, {pacing} pacing")
+        self.start_recording()
+
+    def start_recording(self):
+        self.running = True
+        self.recording_task = asyncio.create_task(self.record_audio_continuously())
+        self.monitor_task = asyncio.create_task(self.monitor_audio())
+
+    async def record_audio_continuously(self):
+        try:
+            silence = bytes(int(self.turn_gap * self.rate) * SAMPLE_WIDTH)
+            for turn in self.turns:
+                await self.wait_for_response()
+                await self.feed_pcm(turn, self.packet_bytes)
+                await self.feed_pcm(silence, self.packet_bytes)
+                if not self.running:
+                    return
+            await self.wait_for_response()
+            self.close("end of input")
+        except Exception as e:
+            print(f"FileAudioSource error: {e}")
+            self.close("end of input")
+
+    # wait until the session is done with the turn in progress (greeting or response)
+    async def wait_for_response(self):
+        while self.clock.holds and self.running:
+            if self.clock.virtual:
+                await self.wait_for(self.clock.released)
+            else:
+                await self.feed_pcm(bytes(self.packet_bytes), self.packet_bytes)
+
+    def get_sample_width(self):
+        return SAMPLE_WIDTH
@@ -2,8 +2,9 @@ import unicodedata
 from google.cloud import storage 
 from google import genai
 from google.genai import types
-from typing import Optional
+from typing import Optional, Iterator
 from components.llm_base import LLMBase 
+from pipeline import StreamingLLM
 import os
 import time
 import json 
@@ -32,7 +33,7 @@ def carregar_dados_pedidos_do_gcs(bucket_name, blob_name, project_id="voicefutur
         print(f"ERRO: Erro ao carregar dados dos pedidos do GCS: {e}")
         return {} 
 
-class GeminiLLM(LLMBase):
+class GeminiLLM(LLMBase, StreamingLLM):
     def __init__(self):
         super().__init__() 
         try:
@@ -66,30 +67,42 @@ class GeminiLLM(LLMBase):
             response_modalities=["TEXT"],
         )
         
-        self.interim_config = types.GenerateContentConfig(
-            temperature=0.7,
-            top_p=0.95,
-            max_output_tokens=256,
-            response_modalities=["TEXT"],
-        )
-        
-        self.interim_conversation = None
-        self.last_interim_text = ""
-        self.last_interim_time = 0
-        self.interim_cooldown = 2.0
+        self.stream_result = (False, "", "") # result of the last process_stream call
         
         self.dados_pedidos_gcs = carregar_dados_pedidos_do_gcs(GCS_BUCKET_NAME, GCS_BLOB_NAME, project_id="voicefuture")
         
-        if self.client: 
-            self.initial_response = self.initialize_chat()
-        else:
-            self.initial_response = "Desculpe, o assistente não pôde ser inicializado corretamente."
+        # greeting is generated on first use, or seeded from the greeting cache (seed_greeting)
+        self.initial_response = None
+        self.initial_response_ok = False
+
 
+    # release the client's http connections, at the end of the session (older google-genai clients have no close)
+    def close(self):
+        if self.client and hasattr(self.client, 'close'):
+            self.client.close()
 
     def get_initial_response(self) -> str:
+        if self.initial_response is None:
+            if self.client:
+                self.initial_response = self.initialize_chat()
+            else:
+                self.initial_response = "Desculpe, o assistente não pôde ser inicializado corretamente."
         return self.initial_response
 
-    def process(self, text: str, is_interim: bool = False) -> tuple[bool, str, str]:
+    # use a previously generated greeting, as if initialize_chat had produced it, without calling the llm
+    def seed_greeting(self, text: str):
+        if self.initial_response is not None:
+            return
+        self.conversation_history.append(
+            types.Content(
+                role="model",
+                parts=[types.Part.from_text(text=text)]
+            )
+        )
+        self.initial_response = text
+        self.initial_response_ok = True
+
+    def process(self, text: str) -> tuple[bool, str, str]:
         if not self.client: 
             print("ERRO: Cliente genai não inicializado. Não é possível processar.")
             return (False, "Desculpe, estou com um problema técnico no momento.", "")
@@ -97,69 +110,8 @@ class GeminiLLM(LLMBase):
         if self.should_exit_conversation(text):
             return (True, "Terminando teste segundo pedido", "")
         
-        if is_interim:
-            return self.process_interim(text)
-        else:
-            return self.generate_response(text)
-            
-    def process_interim(self, text: str) -> tuple[bool, str, str]:
-        current_time = time.time()
-        
-        if current_time - self.last_interim_time < self.interim_cooldown:
-            return (False, "", "")
-            
-        if self._is_similar_text(text, self.last_interim_text):
-            return (False, "", "")
+        return self.generate_response(text)
             
-        if self.interim_conversation is None:
-            if not hasattr(self, 'interim_system_prompt'):
-                self.interim_system_prompt = "Responda brevemente."
-            self.interim_conversation = [
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=self.interim_system_prompt)]
-                ),
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text="Compreendido.")]
-                )
-            ]
-            
-        self.interim_conversation.append(
-            types.Content(
-                role="user",
-                parts=[types.Part.from_text(text=text)]
-            )
-        )
-        
-        try:
-            response = self.client.models.generate_content( 
-                model=self.model,
-                contents=self.interim_conversation,
-                config=self.interim_config, 
-            )
-            
-            self.last_interim_text = text
-            self.last_interim_time = current_time
-            
-            response_text_val = getattr(response, 'text', "") 
-
-            self.interim_conversation.append(
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=response_text_val)]
-                )
-            )
-            
-            if len(self.interim_conversation) > 6: 
-                self.interim_conversation = self.interim_conversation[:2] + self.interim_conversation[-4:]
-                
-            return (False, response_text_val, "")
-            
-        except Exception as e:
-            print(f"Error in interim processing: {str(e)}")
-            return (False, "", "")
-
     def initialize_chat(self):
         if not self.client:
             print("ERRO: Cliente genai não inicializado. Não é possível inicializar chat.")
@@ -182,6 +134,7 @@ class GeminiLLM(LLMBase):
                     parts=[types.Part.from_text(text=response_text_val)]
                 )
             )
+            self.initial_response_ok = hasattr(response, 'text') and bool(response.text)
             return response_text_val
         except Exception as e:
             print(f"ERRO ao inicializar chat: {e}")
@@ -329,10 +282,8 @@ class GeminiLLM(LLMBase):
             print(f"INFO: Nenhum pedido associado ao email {email} foi encontrado.")
             return None
     
-    def generate_response(self, user_input: str) -> tuple[bool, str, str]:
-        if self.should_exit_conversation(user_input):
-            return(True, "Terminando teste segundo pedido", "")
-        
+    # builds the prompt for the user input, with order/email context if identified
+    def build_prompt(self, user_input: str) -> str:
         contexto_adicional_pedido = ""
 
         email, cleaned_email_user_input = self.extract_email_in_sentence_pt(user_input)
@@ -361,7 +312,9 @@ class GeminiLLM(LLMBase):
         prompt_para_llm = user_input + contexto_adicional_pedido 
         
         print("DEBUG: Prompt para LLM:", prompt_para_llm)
+        return prompt_para_llm
 
+    def trim_history(self):
         MAX_HISTORY_TURNS = 100
         MAX_CONVERSATION_ITEMS = 1 + (MAX_HISTORY_TURNS * 2) 
         if len(self.conversation_history) >= MAX_CONVERSATION_ITEMS :
@@ -369,13 +322,24 @@ class GeminiLLM(LLMBase):
             if itens_recentes_a_manter < 0: itens_recentes_a_manter = 0
             self.conversation_history = self.conversation_history[:1] + self.conversation_history[-itens_recentes_a_manter:]
 
+    # builds the prompt for the user input and appends it to the conversation history
+    def prepare_turn(self, user_input: str) -> str:
+        prompt_para_llm = self.build_prompt(user_input)
+        self.trim_history()
         self.conversation_history.append(
             types.Content(
                 role="user",
                 parts=[types.Part.from_text(text=prompt_para_llm)] 
             )
         )
-        
+        return prompt_para_llm
+
+    def generate_response(self, user_input: str) -> tuple[bool, str, str]:
+        if self.should_exit_conversation(user_input):
+            return(True, "Terminando teste segundo pedido", "")
+
+        prompt_para_llm = self.prepare_turn(user_input)
+
         try:
             response = self.client.models.generate_content( 
                 model=self.model,
@@ -398,10 +362,112 @@ class GeminiLLM(LLMBase):
             )
             return (False, "Desculpe, ocorreu um erro ao processar o seu pedido.", "")
 
-        self.interim_conversation = None
-        
         final_response_flag, filtered_response, json_block = self.check_final_response(response_text_val)
         print(f"\nPrompt (com RAG se aplicável): {prompt_para_llm}")
         print("Assistant Response: ", filtered_response)
         
-        return (final_response_flag, filtered_response, json_block)
\ No newline at end of file
+        return (final_response_flag, filtered_response, json_block)
+
+    def process_stream(self, text: str) -> Iterator[str]:
+        if not self.client:
+            print("ERRO: Cliente genai não inicializado. Não é possível processar.")
+            self.stream_result = (False, "Desculpe, estou com um problema técnico no momento.", "")
+            yield self.stream_result[1]
+            return
+
+        if self.should_exit_conversation(text):
+            self.stream_result = (True, "Terminando teste segundo pedido", "")
+            yield self.stream_result[1]
+            return
+
+        yield from self.generate_response_stream(text)
+
+    def get_stream_result(self) -> tuple[bool, str, str]:
+        return self.stream_result
+
+    # same as generate_response, but yields text deltas as gemini generates them
+    # the final (flag, response, json_block) is available in get_stream_result() once the generator is exhausted
+    def generate_response_stream(self, user_input: str) -> Iterator[str]:
+        prompt_para_llm = self.prepare_turn(user_input)
+        response_chunks = []
+
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=self.conversation_history,
+                config=self.config,
+            ):
+                delta = getattr(chunk, 'text', None)
+                if delta:
+                    response_chunks.append(delta)
+                    yield delta
+
+            response_text_val = "".join(response_chunks) or "Não foi possível obter uma resposta."
+
+            self.conversation_history.append(
+                types.Content(
+                    role="model",
+                    parts=[types.Part.from_text(text=response_text_val)]
+                )
+            )
+        except Exception as e:
+            print(f"ERRO ao chamar generate_content_stream do Gemini: {e}")
+            self.conversation_history.append(
+                 types.Content(role="model", parts=[types.Part.from_text(text="Erro ao gerar resposta.")])
+            )
+            self.stream_result = (False, "Desculpe, ocorreu um erro ao processar o seu pedido.", "")
+            if not response_chunks:
+                yield self.stream_result[1]
+            return
+
+        self.stream_result = self.check_final_response(response_text_val)
+        print(f"\nPrompt (com RAG se aplicável): {prompt_para_llm}")
+        print("Assistant Response (stream): ", self.stream_result[1])
+
+    # speculative generation on a stable interim transcript, with the full conversation context
+    # the conversation history is only updated in commit_speculation, so a discarded speculation leaves no trace
+    def speculate(self, user_input: str) -> Optional[dict]:
+        if not self.client or self.should_exit_conversation(user_input):
+            return None
+
+        prompt_para_llm = self.build_prompt(user_input)
+        history_length = len(self.conversation_history)
+        contents = self.conversation_history + [
+            types.Content(role="user", parts=[types.Part.from_text(text=prompt_para_llm)])
+        ]
+
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=self.config,
+            )
+        except Exception as e:
+            print(f"ERRO na geração especulativa do Gemini: {e}")
+            return None
+
+        return {
+            "text": user_input,
+            "prompt": prompt_para_llm,
+            "response": getattr(response, 'text', "Não foi possível obter uma resposta."),
+            "history_length": history_length, # the speculation is only valid for the history it was generated on
+        }
+
+    # add a speculation to the conversation history, returns the same as process(), or None if it is stale
+    def commit_speculation(self, speculation: dict) -> Optional[tuple[bool, str, str]]:
+        if speculation["history_length"] != len(self.conversation_history):
+            print("INFO: Especulação descartada, o histórico mudou entretanto.")
+            return None
+
+        self.trim_history()
+        self.conversation_history.append(
+            types.Content(role="user", parts=[types.Part.from_text(text=speculation["prompt"])])
+        )
+        self.conversation_history.append(
+            types.Content(role="model", parts=[types.Part.from_text(text=speculation["response"])])
+        )
+
+        final_response_flag, filtered_response, json_block = self.check_final_response(speculation["response"])
+        print(f"\nPrompt (especulativo, com RAG se aplicável): {speculation['prompt']}")
+        print("Assistant Response: ", filtered_response)
+        return (final_response_flag, filtered_response, json_block)
@@ -1,9 +1,9 @@
 import os
-import tempfile
+import uuid
 from google.cloud import speech
 from google.cloud import storage
 from typing import Optional
-from pipeline import STT
+from pipeline import STT, AudioClip
 
 
 ### 
@@ -21,28 +21,25 @@ class GoogleCloudSTT(STT):
         self.bucket_name = 'voice-future-recordings'
         self.chunk_size = 10 * 1024 * 1024  # 10 MB
 
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
+    # close the grpc channel of the client, at the end of the session
+    def close(self):
+        self.client.transport.close()
 
-        temp_filename = tempfile.mktemp(suffix='.wav')
-        with open(temp_filename, 'wb') as f:
-            f.write(audio_data)
-
-        file_size = os.path.getsize(temp_filename)
-        if file_size > self.chunk_size:
-            gcs_uri = self._upload_to_gcs(temp_filename)
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
+        # raw LINEAR16 pcm goes inline in the request, large clips are uploaded from memory to GCS first
+        if len(audio_data.pcm) > self.chunk_size:
+            gcs_uri = self._upload_to_gcs(audio_data.to_wav())
             if not gcs_uri:
-                os.unlink(temp_filename)
                 print("Failed to upload to GCS.")
                 return None
             
-            transcription = self._transcribe_audio(gcs_uri)
+            transcription = self._transcribe_audio(speech.RecognitionAudio(uri=gcs_uri), audio_data.sample_rate)
         else:
-            transcription = self._transcribe_audio(temp_filename)
+            transcription = self._transcribe_audio(speech.RecognitionAudio(content=audio_data.pcm), audio_data.sample_rate)
 
-        os.unlink(temp_filename)
         return transcription if transcription else "Desculpe, pode continuar."
 
-    def _upload_to_gcs(self, file_path: str) -> Optional[str]:
+    def _upload_to_gcs(self, wav_data: bytes) -> Optional[str]:
         storage_client = storage.Client()
         try:
             # NOTE: No need to keep checking if bucket already exists, i think?
@@ -54,30 +51,21 @@ class GoogleCloudSTT(STT):
             #     bucket = storage_client.create_bucket(self.bucket_name)
             #     print(f"Bucket {self.bucket_name} created successfully.")
             bucket = storage_client.bucket(self.bucket_name)
-            object_name = os.path.basename(file_path)
+            object_name = f"{uuid.uuid4().hex}.wav"
             blob = bucket.blob(object_name)
             print(f"Uploading file to gs://{self.bucket_name}/{object_name}...")
 
-            blob.upload_from_filename(file_path)
+            blob.upload_from_string(wav_data, content_type="audio/wav")
             return f"gs://{self.bucket_name}/{object_name}"
         except Exception as e:
             print(f"Error with GCS: {str(e)}")
             return None
 
-    def _transcribe_audio(self, audio_file_uri: str) -> Optional[str]:
+    def _transcribe_audio(self, audio: speech.RecognitionAudio, sample_rate: int) -> Optional[str]:
         try:
-            # print(f"Starting transcription for: {audio_file_uri}")
-
-            if audio_file_uri.startswith("gs://"):
-                audio = speech.RecognitionAudio(uri=audio_file_uri)
-            else:
-                with open(audio_file_uri, "rb") as audio_file:
-                    content = audio_file.read()
-                audio = speech.RecognitionAudio(content=content)
-
             config = speech.RecognitionConfig(
                 encoding=self.encoding,
-                sample_rate_hertz=self.sample_rate_hertz,
+                sample_rate_hertz=sample_rate,
                 language_code=self.language_code,
                 speech_contexts=[
                     speech.SpeechContext(
@@ -5,10 +5,16 @@ import time
 import asyncio
 from google.cloud import speech
 from typing import Optional, Callable, Iterator, List, Dict, Any
-from pipeline import STT
+from pipeline import STT, AudioClip
 
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.join(os.getcwd(), "api_keys/voice-future-google.json")
 
+# google ends a streaming_recognize call after about 305 seconds, and the session feeds it every live frame
+# so the stream is reopened before that: after the soft limit once no utterance is in progress, at the hard limit anyway
+STREAM_SOFT_LIMIT = float(os.getenv("GOOGLE_STT_STREAM_SOFT_LIMIT", "240"))
+STREAM_HARD_LIMIT = float(os.getenv("GOOGLE_STT_STREAM_HARD_LIMIT", "290"))
+STREAM_RETRY_DELAY = 1.0 # seconds before reopening a stream that failed
+
 class GoogleCloudStreamingSTT(STT):
     def __init__(self):
         self.client = speech.SpeechClient()
@@ -30,6 +36,7 @@ class GoogleCloudStreamingSTT(STT):
         self.latest_transcript = ""
         self.on_final_result = None
         self.on_interim_result = None
+        self.on_partial_result = None
         
         # For silence detection
         self.last_speech_time = time.time()
@@ -40,9 +47,12 @@ class GoogleCloudStreamingSTT(STT):
         self.partial_transcripts = []
         self.final_transcript = ""
 
+        self.streams_opened = 0 # recognition streams opened since start_streaming (restarts included)
+
     def start_streaming(self, 
                        on_final_result: Optional[Callable[[str], None]] = None,
-                       on_interim_result: Optional[Callable[[str], None]] = None):
+                       on_interim_result: Optional[Callable[[str], None]] = None,
+                       on_partial_result: Optional[Callable[[str], None]] = None):
         """Starts the recgnition process"""
         if self.streaming_active:
             return
@@ -50,6 +60,7 @@ class GoogleCloudStreamingSTT(STT):
         self.streaming_active = True
         self.on_final_result = on_final_result
         self.on_interim_result = on_interim_result
+        self.on_partial_result = on_partial_result # every partial transcript, as it changes
         self.partial_transcripts = []
         self.final_transcript = ""
         self.last_speech_time = time.time()
@@ -68,10 +79,16 @@ class GoogleCloudStreamingSTT(STT):
         self.audio_queue.put(None)  
         if self.streaming_thread:
             self.streaming_thread.join(timeout=5)
-            self.streaming_thread = None
+            if not self.streaming_thread.is_alive():
+                self.streaming_thread = None # kept while alive, the session reports it as left running
             
         return self.latest_transcript
     
+    # end the recognition stream (if still open) and close the grpc channel, at the end of the session
+    def close(self):
+        self.stop_streaming()
+        self.client.transport.close()
+
     def process_audio_chunk(self, audio_chunk: bytes):
         """Processes audio in real time"""
         if self.streaming_active:
@@ -80,11 +97,6 @@ class GoogleCloudStreamingSTT(STT):
             current_time = time.time()
             elapsed_silence = current_time - self.last_speech_time
             
-            # Debug current state
-            if self.partial_transcripts:
-                print(f"[DEBUG] Current partial transcript: {' '.join(self.partial_transcripts)}")
-                print(f"[DEBUG] Elapsed silence: {elapsed_silence:.2f}s (threshold: {self.silence_threshold}s)")
-            
             if (elapsed_silence >= self.silence_threshold and 
                 self.partial_transcripts and 
                 not self.processing_interim):
@@ -92,78 +104,84 @@ class GoogleCloudStreamingSTT(STT):
                 self.processing_interim = True
                 
                 interim_text = " ".join(self.partial_transcripts)
-                print(f"\n[DEBUG] Sending interim text to LLM: \"{interim_text}\"\n")
-                
                 if self.on_interim_result and interim_text:
                     self.on_interim_result(interim_text)
     
+    # one recognition stream after the other, until stop_streaming
+    # audio that arrives while a stream is reopened waits in the queue, so nothing is lost
     def _stream_recognition(self):
+        self.streams_opened = 0
+        while self.streaming_active:
+            self.streams_opened += 1
+            try:
+                self._run_stream(time.monotonic())
+            except Exception as e:
+                print(f"Error in streaming recognition: {str(e)}")
+                if self.streaming_active:
+                    time.sleep(STREAM_RETRY_DELAY)
+            if self.streaming_active:
+                print(f"Reopening recognition stream ({self.streams_opened} opened so far)")
+
+    # a single streaming_recognize call, ended (by closing its request stream) before google's duration limit
+    def _run_stream(self, opened: float):
         def generate_requests() -> Iterator[speech.StreamingRecognizeRequest]:
+            # the streaming config is sent first by client.streaming_recognize
             while self.streaming_active:
-                # Get the next audio chunk from the queue
-                audio_chunk = self.audio_queue.get()
+                age = time.monotonic() - opened
+                if age >= STREAM_HARD_LIMIT or (age >= STREAM_SOFT_LIMIT and not self.partial_transcripts):
+                    return
+                try:
+                    audio_chunk = self.audio_queue.get(timeout=1.0)
+                except queue.Empty:
+                    continue
                 
                 # If None received, the stream is done
                 if audio_chunk is None:
-                    break
-                
-                # First request contains the configuration
-                if not hasattr(generate_requests, "first_request_sent"):
-                    yield speech.StreamingRecognizeRequest(
-                        streaming_config=self.streaming_config
-                    )
-                    generate_requests.first_request_sent = True
-                
-                # Following requests contain audio data
+                    return
                 yield speech.StreamingRecognizeRequest(audio_content=audio_chunk)
         
-        try:
-            responses = self.client.streaming_recognize(config=self.streaming_config, requests=generate_requests())
+        responses = self.client.streaming_recognize(config=self.streaming_config, requests=generate_requests())
+        
+        for response in responses:
+            if not response.results:
+                continue
             
-            for response in responses:
-                if not response.results:
-                    continue
+            # Update last speech time whenever we receive a response
+            self.last_speech_time = time.time()
+            
+            # Get the result
+            result = response.results[0]
+            transcript = result.alternatives[0].transcript
+            
+            # Handle interim results
+            if not result.is_final:
+                # If this is an update to the existing partial transcript
+                if self.partial_transcripts:
+                    self.partial_transcripts[-1] = transcript
+                else:
+                    self.partial_transcripts.append(transcript)
                 
-                # Update last speech time whenever we receive a response
-                self.last_speech_time = time.time()
+                # Reset the processing flag so we can process this chunk after silence
+                self.processing_interim = False
+
+                if self.on_partial_result:
+                    self.on_partial_result(" ".join(self.partial_transcripts))
+            
+            # Handle final results
+            else:
+                self.latest_transcript = transcript
+                self.final_transcript = transcript
                 
-                # Get the result
-                result = response.results[0]
-                transcript = result.alternatives[0].transcript
+                # Clear partial transcripts as we now have a final one
+                self.partial_transcripts = []
                 
-                # Handle interim results
-                if not result.is_final:
-                    print(f"[DEBUG] New interim result: \"{transcript}\"")
-                    # If this is an update to the existing partial transcript
-                    if self.partial_transcripts:
-                        self.partial_transcripts[-1] = transcript
-                    else:
-                        self.partial_transcripts.append(transcript)
-                    
-                    # Reset the processing flag so we can process this chunk after silence
-                    self.processing_interim = False
+                # Reset the processing flag
+                self.processing_interim = False
                 
-                # Handle final results
-                else:
-                    self.latest_transcript = transcript
-                    self.final_transcript = transcript
-                    
-                    print(f"\n[DEBUG] FINAL TRANSCRIPT: \"{transcript}\"\n")
-                    print(f"[DEBUG] Sending final text to LLM")
-                    
-                    # Clear partial transcripts as we now have a final one
-                    self.partial_transcripts = []
-                    
-                    # Reset the processing flag
-                    self.processing_interim = False
-                    
-                    if self.on_final_result:
-                        self.on_final_result(transcript)
-                        
-        except Exception as e:
-            print(f"Error in streaming recognition: {str(e)}")
+                if self.on_final_result:
+                    self.on_final_result(transcript)
     
-    def transcribe(self, audio_data: bytes) -> Optional[str]:
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
         """        
         Handles both batch mode and streaming mode depending on the current state.
         - If streaming is active, it audio in real time
@@ -171,23 +189,22 @@ class GoogleCloudStreamingSTT(STT):
         """
         if self.streaming_active:
             # When streaming is active, just feed the audio chunk and return any available transcript
-            self.process_audio_chunk(audio_data)
+            self.process_audio_chunk(audio_data.pcm)
             
             # Check if we have a final transcript
             if self.final_transcript:
                 transcript = self.final_transcript
                 self.final_transcript = ""  # Clear it to avoid returning it again
-                print(f"[DEBUG] Returning final transcript from transcribe(): \"{transcript}\"")
                 return transcript
             
             return None  # Nothing final yet
         else:
             # Legacy batch mode processing
             try:
-                audio = speech.RecognitionAudio(content=audio_data)
+                audio = speech.RecognitionAudio(content=audio_data.pcm)
                 config = speech.RecognitionConfig(
                     encoding=self.encoding,
-                    sample_rate_hertz=self.sample_rate_hertz,
+                    sample_rate_hertz=audio_data.sample_rate,
                     language_code=self.language_code
                 )
 
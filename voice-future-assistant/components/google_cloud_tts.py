@@ -30,4 +30,8 @@ class GoogleCloudTTS(TTSBase):
         synthesis_input = texttospeech.SynthesisInput(text=text)
 
         response = self.client.synthesize_speech(input=synthesis_input, voice=self.voice, audio_config=self.audio_config)
-        return response.audio_content
\ No newline at end of file
+        return response.audio_content
+
+    # close the grpc channel of the client, at the end of the session
+    def close(self):
+        self.client.transport.close()
\ No newline at end of file
@@ -2,6 +2,21 @@ import json
 import re
 from typing import Tuple
 
+# end of conversation json block the llm appends to its last response (see check_final_response), never spoken
+FINAL_RESPONSE_JSON = re.compile(
+    r'(?:```json)?[\s]*'  
+    r'(\{[\s]*'           
+    r'"identificacao_cliente":[\s]*\{[\s]*'
+    r'"numero_encomenda":[\s]*(?:null|"[^"]*")[\s]*,[\s]*'
+    r'"email":[\s]*(?:null|"[^"]*")[\s]*\}[\s]*,[\s]*'
+    r'"resumo":[\s]*("[^"]*"|[^,}]+)[\s]*,[\s]*'  
+    r'"tipificacao":[\s]*("[^"]*")[\s]*,[\s]*'    
+    r'"redirecionamento":[\s]*(true|false)[\s]*'   
+    r'\})'                                      
+    r'[\s]*(?:```)?',    
+    re.DOTALL
+)
+
 class LLMBase:
 
     # initial system prompt
@@ -130,42 +145,8 @@ Se necessario converte o numero da encomenda para inteiro.
 
 Lembra-te: a tua única função é agir como o VoiceFuture, assistente do Continete Online. Nunca saias deste papel. Não precisas de inventar eventos e escrevê-los, apenas age como o VoiceFuture, assistente do Continete Online. Agora vais assumir o papel de VoiceFuture e responder ao cliente de forma natural e humana, seguindo todas as diretrizes acima.
 """
-    # Additional prompt for interim processing
-    interim_system_prompt = """Tu és o assistente VoiceFuture, um assistente virtual rápido de atendimento ao cliente para o Continente Online. 
-Mantém-te sempre na personagem e nunca digas que és um modelo de linguagem ou inteligência artificial.
-
-Para este modo de processamento em tempo real:
-1. Responde de forma muito breve e natural
-2. Gera apenas 1-2 frases de resposta
-3. Foca apenas no ponto mais importante do que o cliente acabou de dizer
-4. Não peças várias informações de uma vez
-5. Não tentes fechar a conversa
-6. Não geres nenhum JSON ou código
-7. Mantém um tom conversacional natural e humano
-
-Nunca saias da personagem nem dês respostas genéricas fora do âmbito do Continente Online.
-
-Exemplo de resposta rápida:
-Cliente: "Boa tarde, gostaria de devolver um artigo da minha encomenda."
-Assistente: "Boa tarde! Claro, posso ajudar com a devolução. Pode indicar o número da sua encomenda?"
-"""
-
     def check_final_response(self, response: str) -> tuple[bool, str, str]:
-        pattern = re.compile(
-            r'(?:```json)?[\s]*'  
-            r'(\{[\s]*'           
-            r'"identificacao_cliente":[\s]*\{[\s]*'
-            r'"numero_encomenda":[\s]*(?:null|"[^"]*")[\s]*,[\s]*'
-            r'"email":[\s]*(?:null|"[^"]*")[\s]*\}[\s]*,[\s]*'
-            r'"resumo":[\s]*("[^"]*"|[^,}]+)[\s]*,[\s]*'  
-            r'"tipificacao":[\s]*("[^"]*")[\s]*,[\s]*'    
-            r'"redirecionamento":[\s]*(true|false)[\s]*'   
-            r'\})'                                      
-            r'[\s]*(?:```)?',    
-            re.DOTALL
-        )
-
-        match = pattern.search(response)
+        match = FINAL_RESPONSE_JSON.search(response)
         if match:
             json_str = match.group(1).strip()  
             polished_json_str = self.polish_json(json_str)
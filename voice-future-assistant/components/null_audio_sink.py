@@ -0,0 +1,43 @@
+import asyncio
+from typing import Optional
+from components.audio_sink_base import AudioSinkBase
+from pipeline import AudioSource, TTSOutputType
+
+##
+#  Audio sink that plays nothing: it records every response audio it gets (when, how long, and optionally the audio)
+#  and simulates its playback on the session's clock, so the pipeline can run headless (benchmarks, batch runs)
+##
+
+class NullAudioSink(AudioSinkBase):
+    def __init__(self, audio_source: Optional[AudioSource] = None, keep_audio: bool = False):
+        super().__init__(audio_source)
+        self.keep_audio = keep_audio # keep the audio bytes of every output, not only their size
+        self.outputs = [] # one entry per played audio
+        self.start_time = self.clock.time() # output times are seconds since the sink was created (session start)
+        self.playback_task = None
+
+    async def play_audio(self, audio_data: bytes, output_type: TTSOutputType) -> None:
+        duration = self.audio_clip_duration(audio_data, output_type)
+        timeline = getattr(self.audio_source, 'timeline', None)
+        self.outputs.append({
+            "time": round(self.clock.time() - self.start_time, 3),
+            "stream_time": timeline.now() if timeline else None, # seconds of input audio received by then
+            "duration": duration,
+            "bytes": len(audio_data),
+            "output_type": output_type,
+            "interrupted": False,
+            "audio": audio_data if self.keep_audio else None,
+        })
+        self.playback_task = asyncio.create_task(self.clock.sleep(duration))
+
+    async def wait_playback_end(self):
+        if self.playback_task:
+            await asyncio.wait({self.playback_task})
+
+    async def stop_playback(self):
+        if self.playback_task and not self.playback_task.done():
+            self.playback_task.cancel()
+            self.outputs[-1]["interrupted"] = True
+
+    async def is_playing(self) -> bool:
+        return self.playback_task is not None and not self.playback_task.done()
@@ -0,0 +1,23 @@
+import json
+from typing import Optional
+from pipeline import Finish
+
+# end of conversation handler for headless runs: keeps the conversation output (the json block of
+# LLMBase.check_final_response) and the latency summary, for whoever runs the pipeline to collect
+class NullFinish(Finish):
+    def __init__(self):
+        self.output: Optional[str] = None
+        self.metrics: Optional[dict] = None
+
+    async def finish(self, output: str, metrics: Optional[dict] = None):
+        self.output = output
+        self.metrics = metrics
+
+    # the output as parsed json, or the raw text if it isn't valid json
+    def summary(self):
+        if not self.output:
+            return None
+        try:
+            return json.loads(self.output)
+        except ValueError:
+            return self.output
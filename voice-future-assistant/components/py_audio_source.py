@@ -8,9 +8,6 @@ import numpy as np
 from typing import Optional
 from components.audio_source_base import AudioSourceBase
 
-#NOTE: for this to work, it nedes to have:                
-# await asyncio.sleep(0) in capture_audio_clip
-
 # --- Audio Sources ---
 class PyAudioSource(AudioSourceBase):
     def __init__(self):
@@ -20,29 +17,31 @@ class PyAudioSource(AudioSourceBase):
         self.stream = None
         self.start_recording()
 
-    # setup read audio data in a dedicated task (it happens all in the same thread, but tasks are scheduled in a way that they don't block each other)
+    # pyaudio calls stream_callback from its own thread with every chunk recorded, the chunk is handed to the event loop
+    # (so nothing blocks the loop or polls the microphone)
+    # the loop is captured here, on the loop (the source is created by the running pipeline), the callback thread has none
     def start_recording(self):
+        self.loop = asyncio.get_running_loop()
         self.stream = self.pyaudio_obj.open(
             format=self.format, 
             channels=self.channels,
             rate=self.rate,
             input=True, 
-            frames_per_buffer=self.chunk
+            frames_per_buffer=self.chunk,
+            stream_callback=self.stream_callback
         )
         self.running = True
-        self.recording_task = asyncio.create_task(self.record_audio_continuously())
         self.monitor_task = asyncio.create_task(self.monitor_audio())
 
-    # continuously read audio data from the stream and store in a buffer
-    async def record_audio_continuously(self):
+    # store the recorded chunk in the buffer, called by pyaudio
+    def stream_callback(self, in_data, frame_count, time_info, status):
+        if not self.running:
+            return (None, pyaudio.paComplete)
         try:
-            while self.running:
-                data = self.stream.read(self.chunk, exception_on_overflow=False)
-                self.append_to_buffer(data)
-
-                await asyncio.sleep(0) # collect a small bit of sound from stream (if it exists), and iteratively give back control to other tasks, so its not blocking
-        except Exception as e:
-            print(f"Unexpected error in recording: {str(e)}")
+            self.loop.call_soon_threadsafe(self.append_pcm, in_data)
+        except RuntimeError: # the loop was closed before the stream
+            return (None, pyaudio.paComplete)
+        return (None, pyaudio.paContinue)
 
     def get_sample_width(self) -> int:
         return self.pyaudio_obj.get_sample_size(self.format)
@@ -54,11 +53,4 @@ class PyAudioSource(AudioSourceBase):
             self.stream.stop_stream()
             self.stream.close()
 
-        if self.monitor_task:
-            self.monitor_task.cancel()
-            try:
-                await self.monitor_task
-            except asyncio.CancelledError:
-                print("Monitor task cancelled.")
-                    
         self.pyaudio_obj.terminate()
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Iterator, List, Optional
+from components.llm_base import LLMBase
+from pipeline import StreamingLLM
+
+##
+#  Replay stand-in LLM: returns the greeting and the responses of a recorded session in order, instantly (see replay.py)
+#  responses: (last response flag, response, json block), as returned by process() in the recorded session
+#  streamed responses come out as a single delta, the sentence segmenter splits them like the original stream
+##
+
+class RecordedLLM(LLMBase, StreamingLLM):
+    def __init__(self, greeting: Optional[str], responses: List[tuple]):
+        super().__init__()
+        self.model = "recorded"
+        self.greeting = greeting
+        self.responses = responses
+        self.turn = 0
+        self.stream_result = (False, "", "")
+
+    def get_initial_response(self) -> str:
+        return self.greeting
+
+    def process(self, text: str) -> tuple[bool, str, str]:
+        if self.turn >= len(self.responses):
+            print("RecordedLLM: no recorded response left for this turn")
+            return (False, "", "")
+        response = self.responses[self.turn]
+        self.turn += 1
+        return tuple(response)
+
+    def process_stream(self, text: str) -> Iterator[str]:
+        self.stream_result = self.process(text)
+        if self.stream_result[1]:
+            yield self.stream_result[1]
+
+    def get_stream_result(self) -> tuple[bool, str, str]:
+        return self.stream_result
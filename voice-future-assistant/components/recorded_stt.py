@@ -0,0 +1,20 @@
+from typing import List, Optional
+from pipeline import STT, AudioClip
+
+##
+#  Replay stand-in STT: returns the transcripts of a recorded session in order, instantly (see replay.py)
+##
+
+class RecordedSTT(STT):
+    def __init__(self, transcripts: List[Optional[str]]):
+        self.transcripts = transcripts
+        self.turn = 0
+
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
+        if self.turn >= len(self.transcripts):
+            print("RecordedSTT: no recorded transcript left for this utterance")
+            return None
+        transcript = self.transcripts[self.turn]
+        self.turn += 1
+        print(f"RecordedSTT transcription: {transcript}")
+        return transcript
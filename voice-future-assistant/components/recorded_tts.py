@@ -0,0 +1,39 @@
+import io
+import wave
+from typing import List, Optional
+from components.tts_base import TTSBase
+from pipeline import TTSOutputType
+
+##
+#  Replay stand-in TTS: silent WAV audio as long as the audio synthesized in the recorded session, in order,
+#  instantly (see replay.py). only the length of the audio matters for a replay, the recording keeps its hash
+##
+
+SAMPLE_RATE = 16000
+
+# durations: seconds of every synthesized audio, None where the recorded synthesis failed
+class RecordedTTS(TTSBase):
+    def __init__(self, durations: List[Optional[float]]):
+        super().__init__(output_type=TTSOutputType.wav)
+        self.durations = durations
+        self.voice = "recorded"
+        self.turn = 0
+
+    def synthesize(self, text: str) -> Optional[bytes]:
+        if self.turn < len(self.durations):
+            duration = self.durations[self.turn]
+            if duration is None:
+                self.turn += 1
+                return None
+        else:
+            print("RecordedTTS: no recorded audio left, estimating its length from the text")
+            duration = len(text) / 15 # about the speed of speech
+        self.turn += 1
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(bytes(int(duration * SAMPLE_RATE) * 2))
+        return buffer.getvalue()
@@ -0,0 +1,92 @@
+import json
+import os
+from typing import Iterator
+from components.llm_base import LLMBase
+from components.stub_profile import StubProfile
+from pipeline import StreamingLLM
+
+##
+#  Offline stand-in LLM: canned responses in the same format as the real assistant,
+#  ending the conversation with the json block (see LLMBase.check_final_response) after STUB_LLM_TURNS turns
+#  supports streaming (process_stream), with deltas every STUB_LLM_CHUNK_INTERVAL seconds
+##
+
+GREETING = "Olá, sou o VoiceFuture, o assistente virtual do Continente Online. Posso ajudar com devoluções, reagendamentos de entregas ou outras questões sobre o Continente Online. Em que posso ajudar?"
+
+RESPONSES = [
+    "Claro, posso ajudar com a devolução. Pode indicar-me o número da sua encomenda, por favor?",
+    "Obrigado. Encontrei a sua encomenda, que tem artigos de mercearia e de laticínios. Em qual destas categorias se encontra o artigo que pretende devolver?",
+    "Lamento essa situação. Como o valor é inferior a vinte euros, não precisa de devolver o produto fisicamente. Prefere o reembolso por transferência bancária ou no Cartão Continente?",
+    "Muito bem, o reembolso será processado no prazo de sete dias úteis. Há mais alguma questão em que possa ajudar?",
+]
+
+FAREWELL = "Obrigado pelo seu contacto, tenha um excelente dia!"
+
+FINAL_JSON = {
+    "identificacao_cliente": {"numero_encomenda": "12345", "email": None},
+    "resumo": "Cliente pediu a devolução de um pacote de arroz danificado, reembolso no Cartão Continente.",
+    "tipificacao": "Devolução",
+    "redirecionamento": False,
+}
+
+class StubLLM(LLMBase, StreamingLLM):
+    def __init__(self):
+        super().__init__()
+        self.model = "stub"
+        self.profile = StubProfile("STUB_LLM", latency="lognormal:0.5:0.2", chunk_interval=0.03)
+        self.turns = int(os.getenv("STUB_LLM_TURNS", len(RESPONSES)))
+        self.turn = 0
+        self.conversation_history = []
+        self.initial_response = None
+        self.initial_response_ok = False
+        self.stream_result = (False, "", "")
+
+    def get_initial_response(self) -> str:
+        if self.initial_response is None:
+            self.profile.wait()
+            self.seed_greeting(GREETING)
+        return self.initial_response
+
+    def seed_greeting(self, text: str):
+        if self.initial_response is not None:
+            return
+        self.conversation_history.append(("model", text))
+        self.initial_response = text
+        self.initial_response_ok = True
+
+    # raw model output for the next turn, with the json block on the last one
+    def next_response(self, text: str) -> str:
+        self.conversation_history.append(("user", text))
+        if self.turn >= self.turns or self.should_exit_conversation(text):
+            response = FAREWELL + "\n```json\n" + json.dumps(FINAL_JSON, ensure_ascii=False, indent=2) + "\n```"
+        else:
+            response = RESPONSES[self.turn % len(RESPONSES)]
+        self.turn += 1
+        self.conversation_history.append(("model", response))
+        return response
+
+    def process(self, text: str) -> tuple[bool, str, str]:
+        self.profile.wait()
+        if self.profile.should_fail():
+            print("StubLLM: simulated failure")
+            return (False, "Desculpe, ocorreu um erro ao processar o seu pedido.", "")
+        return self.check_final_response(self.next_response(text))
+
+    def process_stream(self, text: str) -> Iterator[str]:
+        self.profile.wait() # time to first token
+        if self.profile.should_fail():
+            print("StubLLM: simulated failure")
+            self.stream_result = (False, "Desculpe, ocorreu um erro ao processar o seu pedido.", "")
+            yield self.stream_result[1]
+            return
+
+        response = self.next_response(text)
+        words = response.split(" ")
+        for i, word in enumerate(words):
+            if i > 0:
+                self.profile.wait_chunk()
+            yield word if i == len(words) - 1 else word + " "
+        self.stream_result = self.check_final_response(response)
+
+    def get_stream_result(self) -> tuple[bool, str, str]:
+        return self.stream_result
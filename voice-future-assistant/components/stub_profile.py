@@ -0,0 +1,46 @@
+import math
+import os
+import random
+import time
+
+##
+#  Latency/failure profile for the stub providers (stub_stt, stub_llm, stub_tts), used to benchmark our own
+#  orchestration without network apis. configured with env vars, e.g. for the llm:
+#    STUB_LLM_LATENCY="lognormal:0.4:0.15"  distribution:mean:stddev (seconds), distribution is fixed, normal or lognormal
+#    STUB_LLM_FAILURE_RATE="0.02"          fraction of calls that fail
+#    STUB_LLM_CHUNK_INTERVAL="0.05"        seconds between streamed chunks
+#    STUB_SEED="42"                        seed, so runs are deterministic
+##
+
+STUB_SEED = int(os.getenv("STUB_SEED", "42"))
+
+class StubProfile:
+    def __init__(self, prefix: str, latency: str = "fixed:0:0", failure_rate: float = 0.0, chunk_interval: float = 0.0):
+        distribution, mean, stddev = os.getenv(f"{prefix}_LATENCY", latency).split(":")
+        self.distribution = distribution
+        self.mean = float(mean)
+        self.stddev = float(stddev)
+        self.failure_rate = float(os.getenv(f"{prefix}_FAILURE_RATE", failure_rate))
+        self.chunk_interval = float(os.getenv(f"{prefix}_CHUNK_INTERVAL", chunk_interval))
+        self.random = random.Random(f"{prefix}:{STUB_SEED}") # own generator per provider, same sequence every run
+
+    def sample_latency(self) -> float:
+        if self.distribution == "normal":
+            return max(0.0, self.random.gauss(self.mean, self.stddev))
+        if self.distribution == "lognormal" and self.mean > 0:
+            # parameters of the underlying normal, so the samples have the configured mean/stddev
+            sigma2 = math.log(1 + (self.stddev / self.mean) ** 2)
+            mu = math.log(self.mean) - sigma2 / 2
+            return self.random.lognormvariate(mu, sigma2 ** 0.5)
+        return self.mean
+
+    # blocking, like the real api calls (the pipeline runs providers on worker threads)
+    def wait(self):
+        time.sleep(self.sample_latency())
+
+    def should_fail(self) -> bool:
+        return self.random.random() < self.failure_rate
+
+    def wait_chunk(self):
+        if self.chunk_interval > 0:
+            time.sleep(self.chunk_interval)
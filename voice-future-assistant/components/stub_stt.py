@@ -0,0 +1,40 @@
+import json
+import os
+from typing import Optional
+from pipeline import STT, AudioClip
+from components.stub_profile import StubProfile
+
+##
+#  Offline stand-in STT: returns scripted transcripts in order, with a configurable latency profile
+#  STUB_STT_SCRIPT: path to a json list of transcripts (defaults to a short return flow)
+##
+
+DEFAULT_SCRIPT = [
+    "Boa tarde, queria devolver um artigo da minha encomenda.",
+    "O número da encomenda é um dois três quatro cinco.",
+    "Um pacote de arroz, veio rasgado.",
+    "Prefiro o reembolso no Cartão Continente.",
+    "Não, era só isso, obrigado.",
+]
+
+class StubSTT(STT):
+    def __init__(self):
+        self.profile = StubProfile("STUB_STT", latency="normal:0.3:0.05")
+        script_path = os.getenv("STUB_STT_SCRIPT")
+        if script_path:
+            with open(script_path, "r", encoding="utf-8") as f:
+                self.script = json.load(f)
+        else:
+            self.script = DEFAULT_SCRIPT
+        self.turn = 0
+
+    def transcribe(self, audio_data: AudioClip) -> Optional[str]:
+        self.profile.wait()
+        if self.profile.should_fail():
+            print("StubSTT: simulated failure")
+            return None
+
+        transcript = self.script[self.turn % len(self.script)]
+        self.turn += 1
+        print(f"StubSTT transcription: {transcript}")
+        return transcript
@@ -0,0 +1,63 @@
+import io
+import math
+import os
+import struct
+import time
+import wave
+from typing import Optional
+from components.tts_base import TTSBase
+from components.stub_profile import StubProfile
+from pipeline import TTSOutputType
+
+##
+#  Offline stand-in TTS: valid WAV (quiet tone) or MP3 (silent frames) audio, with duration proportional to the text
+#  STUB_TTS_FORMAT: wav (default) or mp3
+#  STUB_TTS_CHARS_PER_SECOND: speaking speed used for the audio duration
+#  latency is the configured profile plus STUB_TTS_REALTIME_FACTOR seconds per second of audio
+##
+
+SAMPLE_RATE = 16000
+
+# MPEG1 layer III, 128kbps, 44.1kHz, mono, no crc. all zero side info decodes to silence
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(417 - 4)
+MP3_FRAME_SECONDS = 1152 / 44100
+
+class StubTTS(TTSBase):
+    def __init__(self):
+        output_type = TTSOutputType(os.getenv("STUB_TTS_FORMAT", "wav"))
+        super().__init__(output_type=output_type)
+        self.profile = StubProfile("STUB_TTS", latency="normal:0.2:0.05")
+        self.chars_per_second = float(os.getenv("STUB_TTS_CHARS_PER_SECOND", "15"))
+        self.realtime_factor = float(os.getenv("STUB_TTS_REALTIME_FACTOR", "0.05"))
+        self.voice = "stub"
+        self.speaking_rate = self.chars_per_second
+
+    def synthesize(self, text: str) -> Optional[bytes]:
+        duration = max(0.2, len(text) / self.chars_per_second)
+        self.profile.wait()
+        if self.profile.should_fail():
+            print("StubTTS: simulated failure")
+            return None
+
+        audio = self.mp3(duration) if self.output_type == TTSOutputType.mp3 else self.wav(duration)
+        if self.realtime_factor > 0:
+            time.sleep(duration * self.realtime_factor)
+        return audio
+
+    def wav(self, duration: float) -> bytes:
+        samples = int(duration * SAMPLE_RATE)
+        # quiet 220Hz tone, one period repeated, so it is cheap to generate
+        period = SAMPLE_RATE // 220
+        tone = struct.pack(f"<{period}h", *(int(1000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+        pcm = (tone * (samples // period + 1))[:samples * 2]
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(pcm)
+        return buffer.getvalue()
+
+    def mp3(self, duration: float) -> bytes:
+        return MP3_FRAME * max(1, int(duration / MP3_FRAME_SECONDS))
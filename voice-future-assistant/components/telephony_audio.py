@@ -0,0 +1,38 @@
+import numpy as np
+
+##
+#  Decoding of telephony audio (Twilio Media Streams: 8kHz G.711 μ-law) into the 16kHz 16-bit PCM the pipeline uses
+##
+
+# G.711 μ-law byte -> 16-bit linear sample, for all 256 codes
+def build_mulaw_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.uint8)
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa.astype(np.int32) << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
+
+MULAW_TABLE = build_mulaw_table()
+
+def decode_mulaw(data: bytes) -> np.ndarray:
+    return MULAW_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+# streaming 2x upsampler (8kHz -> 16kHz) with a polyphase low-pass FIR: each output phase is one short convolution
+# over the input, and the last input samples are kept so consecutive frames join without clicks
+class Upsampler2x:
+    def __init__(self, taps_per_phase: int = 16):
+        length = 2 * taps_per_phase
+        n = np.arange(length) - (length - 1) / 2
+        prototype = np.sinc(n / 2) * np.kaiser(length, 8.0) # cutoff at the 8kHz input's nyquist
+        prototype *= 2 / prototype.sum() # gain 2, makes up for the inserted zeros
+        self.phases = [prototype[0::2].astype(np.float32), prototype[1::2].astype(np.float32)]
+        self.history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        extended = np.concatenate((self.history, samples.astype(np.float32)))
+        self.history = extended[len(extended) - len(self.history):]
+        out = np.empty(2 * len(samples), dtype=np.float32)
+        out[0::2] = np.convolve(extended, self.phases[0], mode="valid")
+        out[1::2] = np.convolve(extended, self.phases[1], mode="valid")
+        return np.clip(out, -32768, 32767).astype(np.int16)
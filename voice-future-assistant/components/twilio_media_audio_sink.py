@@ -32,6 +32,10 @@ class TwilioMediaAudioSink(AudioSinkBase):
         finally:
             self.playback_active = False
 
+    # the audio is handed to twilio in one message, there is no playback to wait for
+    async def wait_playback_end(self):
+        pass
+
     async def is_playing(self) -> bool:
         return self.playback_active
 
@@ -1,66 +1,58 @@
 import asyncio
+import base64
+import json
 from fastapi import WebSocket
 from typing import Optional
 from pipeline import AudioSource
 from components.audio_source_base import AudioSourceBase
+from components.telephony_audio import decode_mulaw, Upsampler2x
 
+# Twilio Media Streams send 20ms frames of base64 8kHz μ-law, they are decoded and upsampled to 16kHz 16-bit PCM,
+# and go through the same buffer, VAD and STT as browser calls
 class TwilioMediaAudioSource(AudioSourceBase):
-    def __init__(self, websocket: Optional[WebSocket] = None):
-        super().__init__()
+    def __init__(self, websocket: Optional[WebSocket] = None, vad: Optional[tuple] = None):
+        super().__init__(vad)
         self.websocket = websocket
-        self.audio_queue = asyncio.Queue()
-        self.running = True
-        self.recording_task = asyncio.create_task(self.record_audio_continuously())
-        self.monitor_task = asyncio.create_task(self.monitor_audio())
+        self.stream_sid = None
+        self.upsampler = Upsampler2x()
+        self.start_recording()
 
+    # receive media until twilio stops the stream or disconnects, or sends nothing for idle_timeout seconds (when enabled)
     async def record_audio_continuously(self):
+        if not self.websocket:
+            self.close("disconnected")
+            return
+
         try:
             while self.running:
-                if not self.websocket:
-                    await asyncio.sleep(0.1)
-                    continue
                 try:
                     # Wait for media events from Twilio
-                    data = await self.websocket.receive_text()
-                    message = json.loads(data)
+                    received = await asyncio.wait_for(self.websocket.receive(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    self.close("idle")
+                    break
+                if received["type"] == "websocket.disconnect":
+                    self.close("disconnected")
+                    break
+                if not received.get("text"):
+                    continue
+
+                try:
+                    message = json.loads(received["text"])
                     event_type = message.get('event')
                     if event_type == 'media':
-                        audio_b64 = message['media']['payload']
-                        audio_bytes = base64.b64decode(audio_b64)
-                        await self.audio_queue.put(audio_bytes)
+                        audio = self.upsampler.process(decode_mulaw(base64.b64decode(message['media']['payload'])))
+                        self.append_pcm(audio.tobytes())
+                    elif event_type == 'start':
+                        self.stream_sid = message.get('start', {}).get('streamSid')
                     elif event_type == 'stop':
-                        self.running = False
+                        self.close("stopped")
                         break
                 except Exception as e:
-                    print(f"TwilioMediaAudioSource receive error: {e}")
-                    await asyncio.sleep(0.1)
+                    print(f"TwilioMediaAudioSource message error: {e}")
         except Exception as e:
             print(f"TwilioMediaAudioSource error: {e}")
-
-    async def get_audio(self) -> bytes:
-        # Get the next audio chunk from the queue
-        try:
-            audio_bytes = await self.audio_queue.get()
-            return audio_bytes
-        except Exception as e:
-            print(f"TwilioMediaAudioSource get_audio error: {e}")
-            return b""
-
-    async def stop(self):
-        self.running = False
-        if self.recording_task:
-            self.recording_task.cancel()
-            try:
-                await self.recording_task
-            except asyncio.CancelledError:
-                print("Recording task cancelled.")
-        if self.monitor_task:
-            self.monitor_task.cancel()
-            try:
-                await self.monitor_task
-            except asyncio.CancelledError:
-                print("Monitor task cancelled.")
-        self.audio_queue = asyncio.Queue()
+            self.close("disconnected")
 
     def start_recording(self):
         self.running = True
@@ -68,5 +60,5 @@ class TwilioMediaAudioSource(AudioSourceBase):
         self.monitor_task = asyncio.create_task(self.monitor_audio())
 
     def get_sample_width(self):
-        # Twilio sends 16-bit PCM audio
+        # after decoding, Twilio audio is 16-bit PCM
         return 2
@@ -1,15 +1,10 @@
 import asyncio
 from typing import Optional
-from io import BytesIO
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 from components.audio_sink_base import AudioSinkBase
 from pipeline import AudioSource, TTSOutputType
 import websocket_msg_protocol as WebSocketProtocol
-from mutagen.mp3 import MP3
-from mutagen.wave import WAVE
-import sys
-import traceback
 
 class WebSocketAudioSink(AudioSinkBase):
     def __init__(self, audio_source: Optional[AudioSource] = None, websocket: Optional[WebSocket] = None):
@@ -46,7 +41,7 @@ class WebSocketAudioSink(AudioSinkBase):
     # wait for the duration of the audio clip
     async def wait_playback(self, duration: float):
         try:
-            await asyncio.sleep(duration)
+            await self.clock.sleep(duration)
             print("Playback finished successfully")
 
             self.playback_active = False
@@ -72,6 +67,12 @@ class WebSocketAudioSink(AudioSinkBase):
         await WebSocketProtocol.send_websocket_command(self.websocket, WebSocketProtocol.CommandType.STOP_AUDIO)
         print("Playback task stopped via webksocket")
 
+    # playback ends when the wait_playback task does (finished or cancelled by stop_playback)
+    # asyncio.wait doesn't cancel the task if this wait is cancelled
+    async def wait_playback_end(self):
+        if self.playback_task:
+            await asyncio.wait({self.playback_task})
+
     # indicates if currently playing audio
     async def is_playing(self) -> bool:
         return self.playback_active
@@ -87,21 +88,3 @@ class WebSocketAudioSink(AudioSinkBase):
                 await self.playback_task
             except asyncio.CancelledError:
                 pass
-
-    #returns clip duration efficiently, or 0 on fail
-    def audio_clip_duration(self, audio_data: bytes, output_type: TTSOutputType) -> float:
-        try:
-            audio_file = BytesIO(audio_data)
-            print(f"Audio file size: {len(audio_data)} bytes with output type {output_type}")
-            if output_type == TTSOutputType.mp3:
-                audio = MP3(audio_file)
-            else:  # assume WAV
-                audio = WAVE(audio_file)
-            return audio.info.length
-        except Exception as e:
-            print(f"Failed to calculate audio clip duration")
-            exc_type, exc_val, exc_tb = sys.exc_info()
-            traceback.print_exception(exc_type, exc_val, exc_tb)
-
-            # fallback for 16-bit PCM, 16kHz mono
-            return len(audio_data) / (16000 * 2)
\ No newline at end of file
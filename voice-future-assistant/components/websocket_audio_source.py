@@ -11,8 +11,8 @@ from pipeline import AudioSource
 # await asyncio.sleep(self.chunk / self.rate) in capture_audio_clip
 
 class WebSocketAudioSource(AudioSourceBase):
-    def __init__(self, websocket: Optional[WebSocket] = None):
-        super().__init__()
+    def __init__(self, websocket: Optional[WebSocket] = None, vad: Optional[tuple] = None):
+        super().__init__(vad)
         self.websocket = websocket
         self.bytes_per_sample = 2 # assuming frontend sends 16-bit PCM (16bit -> self.bytes_per_sample bytes)
         self.start_recording()
@@ -22,47 +22,38 @@ class WebSocketAudioSource(AudioSourceBase):
         self.recording_task = asyncio.create_task(self.record_audio_continuously())
         self.monitor_task = asyncio.create_task(self.monitor_audio())
 
+    # receive audio until the client disconnects, or sends nothing for idle_timeout seconds (when enabled)
+    # any message counts, so a client that paused the mic stays connected by sending keepalives
     async def record_audio_continuously(self):
+        if not self.websocket:
+            print("No WebSocket connection")
+            self.close("disconnected")
+            return
+
         try:
             while self.running:
-                # Get whatever data is available from the WebSocket
-                if not self.websocket:
-                    print("No WebSocket connection")
-                    await asyncio.sleep(0.1)  # wait for a bit if no websocket is available
-                    continue
-
+                # receive yields to other tasks while waiting for the next message
                 try:
-                    data = await self.websocket.receive_bytes()
-
-                    # split data into chunks of self.chunk size
-                    for i in range(0, len(data), self.chunk * self.bytes_per_sample):
-                        chunk = data[i:i + self.chunk * self.bytes_per_sample]
-                        if len(chunk) == self.chunk * self.bytes_per_sample:
-                            self.append_to_buffer(chunk)
-
-                        elif len(chunk) > 0:
-                            # pad incomplete chunks with silence
-                            padded_chunk = bytearray(chunk) + bytearray(self.chunk * self.bytes_per_sample - len(chunk))
-                            self.append_to_buffer(bytes(padded_chunk))
+                    message = await asyncio.wait_for(self.websocket.receive(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    self.close("idle")
+                    break
 
-                    await asyncio.sleep(0.01)  # collect a small bit of sound from stream (if it exists), and iteratively give back control to other tasks, so its not blocking
+                if message["type"] == "websocket.disconnect":
+                    self.close("disconnected")
+                    break
 
-                except Exception as e:
-                    # print(f"Websocket receive error: {str(e)}")
-                    await asyncio.sleep(0.5)  # wait for a bit if there was an error
+                # split data into chunks of self.chunk size, the incomplete tail waits for the next message
+                if message.get("bytes"):
+                    self.append_pcm(message["bytes"])
 
         except Exception as e:
             print(f"Websocket error in recording: {str(e)}")
+            self.close("disconnected")
 
     def get_sample_width(self):
         return self.bytes_per_sample
     
     async def stop(self):
         await super().stop()
-        if self.monitor_task:
-            self.monitor_task.cancel()
-            try:
-                await self.monitor_task
-            except asyncio.CancelledError:
-                print("Monitor task cancelled.")
         self.buffer.clear()  # flush it
\ No newline at end of file
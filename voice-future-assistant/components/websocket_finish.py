@@ -1,4 +1,5 @@
 import asyncio
+import json
 from typing import Optional
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
@@ -9,7 +10,9 @@ class WebSocketFinish(Finish):
     def __init__(self, websocket: Optional[WebSocket] = None):
         self.websocket = websocket # websocket connection to send audio data to the client
 
-    async def finish(self, output: str):
+    async def finish(self, output: str, metrics: Optional[dict] = None):
         if self.websocket and self.websocket.client_state == WebSocketState.CONNECTED:
             await WebSocketProtocol.send_websocket_text(self.websocket, WebSocketProtocol.TextType.OUTPUT, output)
+            if metrics:
+                await WebSocketProtocol.send_websocket_text(self.websocket, WebSocketProtocol.TextType.LATENCY, json.dumps(metrics))
             await WebSocketProtocol.send_websocket_command(self.websocket, WebSocketProtocol.CommandType.EXIT)
@@ -0,0 +1,113 @@
+import os
+import re
+from collections import deque
+from typing import Optional
+
+##
+#  End of turn detection: how much silence ends the user's turn, picked per turn instead of a fixed second
+#  combines three cues into a readiness score (0 = probably a pause, 1 = probably done):
+#  - VAD trend: speech probability fading out before the silence sounds like the end of a sentence, an abrupt drop like a pause
+#  - utterance length: short answers ("sim", "não") are usually complete, long explanations have pauses in the middle
+#  - partial transcript (streaming stt only): final punctuation means done, a trailing connective ("e", "mas", ...) means more
+#    is coming, and a transcript that stopped changing is more likely final
+#  the timeout goes from max_timeout (readiness 0) down to min_timeout (readiness 1)
+#
+#  ENDPOINT_MODE: adaptive (default) or fixed (always fixed_timeout, the old behavior)
+#  ENDPOINT_MIN_TIMEOUT / ENDPOINT_MAX_TIMEOUT: seconds, defaults 0.3 and 1.2
+##
+
+ENDPOINT_MODE = os.getenv("ENDPOINT_MODE", "adaptive")
+ENDPOINT_MIN_TIMEOUT = float(os.getenv("ENDPOINT_MIN_TIMEOUT", "0.3"))
+ENDPOINT_MAX_TIMEOUT = float(os.getenv("ENDPOINT_MAX_TIMEOUT", "1.2"))
+
+# sentence ends with . ! ? … (optionally followed by closing quotes/brackets)
+FINAL_PUNCTUATION = re.compile(r'[.!?…]["\')\]»]*\s*$')
+# trailing comma, or a (portuguese) word that needs a continuation
+CONTINUATION = re.compile(r'(,|\b(e|ou|mas|que|de|do|da|para|com|porque|então|o|a|os|as|um|uma|é))\s*$', re.IGNORECASE)
+
+SHORT_UTTERANCE = 1.0 # seconds, utterances up to this length count as complete answers
+LONG_UTTERANCE = 6.0 # seconds, from this length on pauses are expected
+STABLE_TRANSCRIPT = 0.3 # seconds without changes for a partial transcript to count as stable
+TREND_WINDOW = 5 # chunks compared at the end of the speech
+
+class EndpointDetector:
+    def __init__(self, mode: str = ENDPOINT_MODE, min_timeout: float = ENDPOINT_MIN_TIMEOUT,
+                 max_timeout: float = ENDPOINT_MAX_TIMEOUT, fixed_timeout: float = 1.0):
+        self.mode = mode
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.fixed_timeout = fixed_timeout
+        self.reset()
+
+        # chosen timeouts, for tuning
+        self.turns = 0
+        self.total_timeout = 0.0
+
+    # new utterance
+    def reset(self):
+        self.probs = deque(maxlen=2 * TREND_WINDOW) # speech probabilities of the last chunks with speech
+        self.transcript = ""
+        self.transcript_time = None # when the partial transcript last changed
+
+    # speech probability of a chunk, while the user speaks
+    def observe(self, speech_prob: float):
+        self.probs.append(speech_prob)
+
+    # latest partial transcript of the streaming stt
+    def update_transcript(self, text: str, timestamp: float):
+        if text != self.transcript:
+            self.transcript = text
+            self.transcript_time = timestamp
+
+    def vad_trend_score(self) -> float:
+        if len(self.probs) < 2 * TREND_WINDOW:
+            return 0.5
+        probs = list(self.probs)
+        before = sum(probs[:TREND_WINDOW]) / TREND_WINDOW
+        last = sum(probs[TREND_WINDOW:]) / TREND_WINDOW
+        return min(1.0, max(0.0, (before - last) / 0.3))
+
+    def length_score(self, utterance_seconds: float) -> float:
+        if utterance_seconds <= SHORT_UTTERANCE:
+            return 1.0
+        return max(0.0, (LONG_UTTERANCE - utterance_seconds) / (LONG_UTTERANCE - SHORT_UTTERANCE))
+
+    # now: None until the stream's timeline is anchored (no packet yet), the transcript can't be aged then
+    def transcript_score(self, now: Optional[float]) -> Optional[float]:
+        text = self.transcript.strip()
+        if not text:
+            return None
+        if CONTINUATION.search(text):
+            return 0.0
+        score = 1.0 if FINAL_PUNCTUATION.search(text) else 0.5
+        if now is not None and self.transcript_time is not None and now - self.transcript_time < STABLE_TRANSCRIPT:
+            score /= 2 # still changing
+        return score
+
+    # silence (seconds) that ends this utterance, and the readiness cues behind it
+    def timeout(self, utterance_seconds: float, now: Optional[float]) -> tuple:
+        if self.mode == "fixed":
+            return self.fixed_timeout, {}
+
+        cues = {"vad_trend": self.vad_trend_score(), "length": self.length_score(utterance_seconds)}
+        transcript = self.transcript_score(now)
+        if transcript is None:
+            readiness = 0.6 * cues["vad_trend"] + 0.4 * cues["length"]
+        else:
+            cues["transcript"] = transcript
+            readiness = 0.25 * cues["vad_trend"] + 0.15 * cues["length"] + 0.6 * transcript
+        return self.max_timeout - readiness * (self.max_timeout - self.min_timeout), cues
+
+    # the utterance ended after timeout seconds of silence
+    def log_endpoint(self, timeout: float, cues: dict, utterance_seconds: float):
+        self.turns += 1
+        self.total_timeout += timeout
+        cues = ", ".join(f"{name}={value:.2f}" for name, value in cues.items())
+        print(f"[endpoint] {self.mode}: {timeout:.2f}s silence after {utterance_seconds:.2f}s utterance ({cues})")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "turns": self.turns,
+            "avg_timeout": round(self.total_timeout / self.turns, 3) if self.turns else None,
+        }
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+##
+#  Cache of the call greeting (text + synthesized audio), shared by every session and entry point
+#  the greeting only depends on the system prompt, the llm model and the tts voice, so it's generated once
+#  and kept in memory, with a copy on disk that survives restarts
+##
+
+GREETING_CACHE_DIR = os.getenv("GREETING_CACHE_DIR", os.path.join(os.getcwd(), "temp", "greetings"))
+
+# tts attributes that change how the greeting sounds, the first one found is used
+TTS_VOICE_ATTRIBUTES = ["voice_id", "voice_name", "voice", "default_voice", "model_path"]
+TTS_RATE_ATTRIBUTES = ["speaking_rate", "rate", "default_rate"]
+
+def first_attribute(obj: Any, names: list) -> str:
+    for name in names:
+        value = getattr(obj, name, None)
+        if value is not None:
+            return str(value)
+    return ""
+
+def tts_speaking_rate(tts: Any) -> str:
+    # google tts keeps the rate in its audio config
+    audio_config = getattr(tts, "audio_config", None)
+    if audio_config is not None and hasattr(audio_config, "speaking_rate"):
+        return str(audio_config.speaking_rate)
+    return first_attribute(tts, TTS_RATE_ATTRIBUTES)
+
+class GreetingCache:
+    def __init__(self, directory: str = GREETING_CACHE_DIR):
+        self.directory = directory
+        self.entries: Dict[str, dict] = {} # memory tier: key -> {"text", "audio", "output_type"}
+
+    # key: (system prompt hash, llm model, tts class, voice, speaking rate)
+    def key_for(self, llm: Any, tts: Any) -> str:
+        parts = [
+            hashlib.sha256(getattr(llm, "system_prompt", "").encode("utf-8")).hexdigest(),
+            str(getattr(llm, "model", type(llm).__name__)),
+            type(tts).__name__,
+            first_attribute(tts, TTS_VOICE_ATTRIBUTES),
+            tts_speaking_rate(tts),
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:24]
+
+    def audio_path(self, key: str, output_type: str) -> str:
+        return os.path.join(self.directory, f"greeting_{key}.{output_type}")
+
+    def get(self, key: str) -> Optional[dict]:
+        if key in self.entries:
+            return self.entries[key]
+
+        # disk tier
+        meta_path = os.path.join(self.directory, f"greeting_{key}.json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self.audio_path(key, meta["output_type"]), "rb") as f:
+                audio = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        self.entries[key] = {"text": meta["text"], "audio": audio, "output_type": meta["output_type"]}
+        return self.entries[key]
+
+    def put(self, key: str, text: str, audio: bytes, output_type: str):
+        output_type = getattr(output_type, "value", output_type)
+        self.entries[key] = {"text": text, "audio": audio, "output_type": output_type}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.audio_path(key, output_type), "wb") as f:
+                f.write(audio)
+            with open(os.path.join(self.directory, f"greeting_{key}.json"), "w", encoding="utf-8") as f:
+                json.dump({"text": text, "output_type": output_type}, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Failed to persist greeting to disk: {e}")
+
+    # greeting for this llm/tts, blocking: from the cache (seeding the llm history with it), or generated and cached
+    # output_type: format of the tts audio, for tts classes without get_output_type (twilio-experiment's)
+    def get_greeting(self, llm: Any, tts: Any, output_type: Optional[str] = None) -> Optional[dict]:
+        if output_type is None:
+            output_type = getattr(tts, "get_output_type", lambda: "mp3")()
+        key = self.key_for(llm, tts)
+        entry = self.get(key)
+        if entry and hasattr(llm, "seed_greeting"):
+            print(f"Greeting cache hit ({key})")
+            llm.seed_greeting(entry["text"])
+            return entry
+
+        text = llm.get_initial_response()
+        if not text:
+            return None
+        audio = tts.synthesize(text)
+        if not audio:
+            return {"text": text, "audio": None, "output_type": output_type}
+
+        # only successful greetings that can be seeded back into the llm history are cached
+        if hasattr(llm, "seed_greeting") and getattr(llm, "initial_response_ok", False):
+            self.put(key, text, audio, output_type)
+        return {"text": text, "audio": audio, "output_type": output_type}
+
+# process wide cache
+GREETING_CACHE = GreetingCache()
@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import time
+import wave
+from typing import List, Optional
+from io import BytesIO
+import aiohttp
+from loop_monitor import LoopLagMonitor
+from pcm_files import SAMPLE_RATE, SAMPLE_WIDTH, load_pcm_files
+
+##
+#  Load generator for the /ws/call endpoint of server.py
+#  opens N concurrent websocket clients that behave like the labs frontend (DataStreamer.tsx):
+#  send the config message, stream recorded 16kHz 16-bit PCM in real time in 2048 byte chunks,
+#  and parse the data/audio/command messages sent back, playing the received audio out in (simulated) real time
+#  before the next turn, so the clients never talk over their own responses. concurrency is ramped up in steps,
+#  and every step reports turn latency percentiles, dropped turns, event loop lag and the server process cpu/memory
+#  (process totals, and those totals divided by the number of sessions)
+#
+#  usage: python load_test.py --audio recordings/ --ramp 1,5,10,20 [--server-pid PID]
+##
+
+CHUNK_SIZE = 2048 # bytes per websocket message, same as the frontend
+CHUNK_SECONDS = CHUNK_SIZE / (SAMPLE_RATE * SAMPLE_WIDTH)
+
+# seconds of a received response clip (the server sends one whole clip per message, mp3 or wav)
+def clip_duration(audio: bytes, mime_type: str) -> float:
+    try:
+        if "mp3" in mime_type:
+            from mutagen.mp3 import MP3
+            return MP3(BytesIO(audio)).info.length
+        with wave.open(BytesIO(audio), "rb") as wf:
+            return wf.getnframes() / wf.getframerate()
+    except Exception as e:
+        print(f"Failed to read clip duration ({mime_type}): {e}")
+        return len(audio) / (SAMPLE_RATE * SAMPLE_WIDTH) # 16kHz 16-bit pcm
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p / 100 * len(values)))], 3)
+
+class CallClient:
+    def __init__(self, session: aiohttp.ClientSession, url: str, config: dict, turns: List[bytes],
+                 turn_timeout: float, settle_time: float):
+        self.session = session
+        self.url = url
+        self.config = config
+        self.turns = turns
+        self.turn_timeout = turn_timeout # seconds without any response audio before a turn counts as dropped
+        self.settle_time = settle_time # seconds after the received audio played out before the bot is considered done talking
+
+        self.latencies: List[float] = [] # end of user audio -> first response audio received, per turn
+        self.server_latencies: List[float] = [] # "audio" timestamp reported by the backend, per turn
+        self.dropped = 0
+        self.errors = 0
+        self.ended = False
+        self.first_audio_time = None # first audio of the current response
+        self.audio_event = asyncio.Event()
+        self.mime_type = "audio/mp3" # of the next audio clip, from its metadata message
+        self.playback_end = None # when the audio received so far ends playing, the frontend plays clips back to back
+        self.awaiting_tts = False # set at every user turn, until the server reports the whole response synthesized
+
+    async def receive(self, ws: aiohttp.ClientWebSocketResponse):
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                now = time.monotonic()
+                self.playback_end = max(now, self.playback_end or now) + clip_duration(msg.data, self.mime_type)
+                if not self.audio_event.is_set():
+                    self.first_audio_time = now
+                    self.audio_event.set()
+            elif msg.type == aiohttp.WSMsgType.TEXT:
+                message = json.loads(msg.data)
+                payload = message.get("payload", {})
+                if message["type"] == "audio":
+                    self.mime_type = payload.get("mime_type", self.mime_type)
+                elif message["type"] == "data" and payload.get("type") == "timestamp":
+                    if payload.get("subtype") == "audio":
+                        self.server_latencies.append(payload["value"])
+                    elif payload.get("subtype") == "tts":
+                        self.awaiting_tts = False
+                elif message["type"] == "command" and payload.get("value") == "STOP_AUDIO":
+                    self.playback_end = time.monotonic() # the server cut the response short, nothing more follows
+                    self.awaiting_tts = False
+                elif message["type"] == "command" and payload.get("value") == "EXIT":
+                    self.ended = True
+                elif message["type"] == "error":
+                    self.errors += 1
+            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                break
+        self.ended = True
+
+    # stream pcm in real time, like the microphone would
+    async def stream(self, ws: aiohttp.ClientWebSocketResponse, pcm: bytes):
+        start = time.monotonic()
+        for i, offset in enumerate(range(0, len(pcm) - CHUNK_SIZE + 1, CHUNK_SIZE)):
+            await ws.send_bytes(pcm[offset:offset + CHUNK_SIZE])
+            await asyncio.sleep(max(0.0, start + (i + 1) * CHUNK_SECONDS - time.monotonic()))
+
+    # keep sending silence (the mic never stops) until the condition is met or the timeout expires
+    async def stream_silence_until(self, ws: aiohttp.ClientWebSocketResponse, done, timeout: float) -> bool:
+        silence = bytes(CHUNK_SIZE)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.ended:
+            if done():
+                return True
+            await ws.send_bytes(silence)
+            await asyncio.sleep(CHUNK_SECONDS)
+        return done()
+
+    async def run(self):
+        try:
+            async with self.session.ws_connect(self.url) as ws:
+                await ws.send_str(json.dumps({"type": "config", "payload": self.config}))
+                receiver = asyncio.create_task(self.receive(ws))
+
+                # wait for the greeting to finish
+                await self.stream_silence_until(ws, lambda: self.audio_event.is_set(), self.turn_timeout)
+                await self.stream_silence_until(ws, self.bot_done, self.turn_timeout)
+
+                for pcm in self.turns:
+                    if self.ended:
+                        break
+                    self.audio_event.clear()
+                    self.awaiting_tts = True
+                    await self.stream(ws, pcm)
+                    end_of_speech = time.monotonic()
+
+                    if await self.stream_silence_until(ws, lambda: self.audio_event.is_set(), self.turn_timeout):
+                        self.latencies.append(self.first_audio_time - end_of_speech)
+                        await self.stream_silence_until(ws, self.bot_done, self.turn_timeout)
+                    else:
+                        self.dropped += 1
+
+                await ws.close()
+                receiver.cancel()
+        except Exception as e:
+            print(f"Client error: {e}")
+            self.errors += 1
+
+    # the response is over once it was all synthesized (the server sends the next sentence only after the previous one
+    # played, so more audio can follow a long pause) and everything received has played out
+    # the greeting has no latency marks, it's a single clip
+    def bot_done(self) -> bool:
+        return (not self.awaiting_tts and self.playback_end is not None
+                and time.monotonic() - self.playback_end > self.settle_time)
+
+# cpu/memory of the server process, only when its pid is given (and psutil is installed)
+class ServerProcess:
+    def __init__(self, pid: Optional[int]):
+        self.process = None
+        if pid:
+            import psutil
+            self.process = psutil.Process(pid)
+            self.process.cpu_percent() # first call starts the measurement
+
+    def sample(self) -> dict:
+        if not self.process:
+            return {}
+        return {
+            "cpu_percent": self.process.cpu_percent(),
+            "rss_mb": round(self.process.memory_info().rss / 2**20, 1),
+        }
+
+async def fetch_health(session: aiohttp.ClientSession, health_url: str) -> dict:
+    try:
+        async with session.get(health_url, params={"reset": "true"}) as response:
+            return await response.json()
+    except Exception as e:
+        print(f"Health check failed: {e}")
+        return {}
+
+async def run_step(args, session, turns, concurrency: int, server: ServerProcess) -> dict:
+    config = {"stt": args.stt, "llm": args.llm, "tts": args.tts}
+    baseline = server.sample()
+    await fetch_health(session, args.health_url) # reset the server loop lag window
+
+    client_lag = LoopLagMonitor()
+    client_lag.start()
+    clients = [CallClient(session, args.url, config, turns, args.turn_timeout, args.settle_time) for _ in range(concurrency)]
+    # stagger connections a bit, like real calls
+    tasks = []
+    for client in clients:
+        tasks.append(asyncio.create_task(client.run()))
+        await asyncio.sleep(args.stagger)
+    await asyncio.gather(*tasks)
+    await client_lag.stop()
+
+    health = await fetch_health(session, args.health_url)
+    usage = server.sample()
+    latencies = [latency for client in clients for latency in client.latencies]
+    server_latencies = [latency for client in clients for latency in client.server_latencies]
+
+    result = {
+        "sessions": concurrency,
+        "turns": len(latencies),
+        "dropped_turns": sum(client.dropped for client in clients),
+        "errors": sum(client.errors for client in clients),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "server_first_audio_p50": percentile(server_latencies, 50),
+        "server_first_audio_p90": percentile(server_latencies, 90),
+        "server_loop_lag": health.get("loop_lag"),
+        "client_loop_lag": client_lag.stats(),
+    }
+    if usage:
+        # whole server process, the per session values are these totals divided by the sessions, not measured per session
+        rss_growth = usage["rss_mb"] - baseline["rss_mb"]
+        result["process_cpu_percent"] = usage["cpu_percent"]
+        result["process_rss_mb"] = usage["rss_mb"]
+        result["process_rss_growth_mb"] = round(rss_growth, 1)
+        result["process_cpu_percent_divided_by_sessions"] = round(usage["cpu_percent"] / concurrency, 2)
+        result["process_rss_growth_mb_divided_by_sessions"] = round(rss_growth / concurrency, 2)
+    return result
+
+async def main(args):
+    turns = load_pcm_files(args.audio)
+    if not turns:
+        print("No audio turns found")
+        return
+    server = ServerProcess(args.server_pid)
+    results = []
+
+    async with aiohttp.ClientSession() as session:
+        for concurrency in [int(n) for n in args.ramp.split(",")]:
+            print(f"\n--- {concurrency} concurrent sessions ---")
+            result = await run_step(args, session, turns, concurrency, server)
+            print(json.dumps(result, indent=2))
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent session load test for /ws/call")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/call")
+    parser.add_argument("--health-url", default="http://localhost:8000/health")
+    parser.add_argument("--audio", required=True, help="16kHz mono 16-bit wav/pcm file, or directory with one file per turn")
+    parser.add_argument("--ramp", default="1,5,10,20", help="comma separated concurrency levels")
+    parser.add_argument("--stt", type=int, default=0, help="index in COMPONENT_MAPPINGS['stt']")
+    parser.add_argument("--llm", type=int, default=0, help="index in COMPONENT_MAPPINGS['llm']")
+    parser.add_argument("--tts", type=int, default=0, help="index in COMPONENT_MAPPINGS['tts']")
+    parser.add_argument("--turn-timeout", type=float, default=20.0)
+    parser.add_argument("--settle-time", type=float, default=1.0, help="seconds after the response played out before the next turn")
+    parser.add_argument("--stagger", type=float, default=0.2, help="seconds between new connections")
+    parser.add_argument("--server-pid", type=int, default=None, help="server pid, to report cpu/memory (needs psutil)")
+    parser.add_argument("--output", default=None, help="write the results as json")
+    asyncio.run(main(parser.parse_args()))
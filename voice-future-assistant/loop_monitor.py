@@ -0,0 +1,49 @@
+import asyncio
+from typing import Optional
+
+##
+#  Measures event loop lag: how late a periodic wakeup runs compared to when it was scheduled
+#  a blocked loop (sync api call, heavy VAD, ...) delays every session in the process
+##
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    # lag since the last reset, in milliseconds
+    def stats(self, reset: bool = False) -> dict:
+        stats = {
+            "avg_ms": round(1000 * self.total_lag / self.samples, 2) if self.samples else 0.0,
+            "max_ms": round(1000 * self.max_lag, 2),
+        }
+        if reset:
+            self.reset()
+        return stats
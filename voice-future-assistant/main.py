@@ -23,5 +23,9 @@ if __name__ == "__main__":
     elif mode == "web":
         print(f"Starting WebSocket server on {UVICORN_HOST}:{UVICORN_PORT}...")
         run(server_app, host=UVICORN_HOST, port=UVICORN_PORT)  # Run FastAPI server
+    elif mode == "batch":
+        # headless run over recorded calls, see batch.py for the options
+        from batch import start_batch
+        start_batch(sys.argv[2:])
     else:
-        print("Invalid mode. Use 'local' or 'web'.")
\ No newline at end of file
+        print("Invalid mode. Use 'local', 'web' or 'batch'.")
\ No newline at end of file
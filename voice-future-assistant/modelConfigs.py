@@ -8,9 +8,11 @@ from components.eleven_labs_stt import ElevenLabsSTT
 from components.azure_stt import AzureSTT
 from components.faster_whisper_default_stt import FasterWhisperDefaultSTT
 from components.faster_whisper_north_ai_stt import FasterWhisperMyNorthAISTT
+from components.stub_stt import StubSTT
 
 # LLM imports
 from components.gemini_llm import GeminiLLM
+from components.stub_llm import StubLLM
 
 # TTS imports
 from components.google_cloud_tts import GoogleCloudTTS
@@ -21,6 +23,7 @@ from components.azure_tts import AzureTTS
 from components.gpt4o_tts import AzureOpenAIRealtimeTTS
 from components.piper_tts import PiperTTS
 from components.edge_tts import EdgeTTS
+from components.stub_tts import StubTTS
 
 # add new API components here vvvvvv
 COMPONENT_MAPPINGS = {
@@ -30,13 +33,15 @@ COMPONENT_MAPPINGS = {
         ElevenLabsSTT,
         AzureSTT,
         FasterWhisperDefaultSTT,
-        FasterWhisperMyNorthAISTT
+        FasterWhisperMyNorthAISTT,
+        StubSTT # offline stub, for benchmarks
         # add other STT
     ],
 
     "llm": [
         GeminiLLM,
-        AzureGPT4oLLM
+        AzureGPT4oLLM,
+        StubLLM # offline stub, for benchmarks
         # Add other LLM
     ],
 
@@ -46,7 +51,8 @@ COMPONENT_MAPPINGS = {
         ElevenLabsTTS,
         AzureTTS,
         PiperTTS,
-        EdgeTTS
+        EdgeTTS,
+        StubTTS # offline stub, for benchmarks
         # Add other TTS
     ]
 }
@@ -0,0 +1,27 @@
+import os
+import wave
+from typing import List
+
+##
+#  Recorded customer audio for the headless tools (load_test.py, batch runs, FileAudioSource):
+#  16kHz mono 16-bit wav or raw pcm, a single file (a whole call) or a directory with one file per user turn
+##
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# pcm of a 16kHz mono 16-bit wav (or raw pcm) file, or of every such file in a directory, in name order
+def load_pcm_files(path: str) -> List[bytes]:
+    files = sorted(os.path.join(path, f) for f in os.listdir(path)) if os.path.isdir(path) else [path]
+    turns = []
+    for file in files:
+        if file.endswith(".wav"):
+            with wave.open(file, "rb") as wf:
+                if wf.getframerate() != SAMPLE_RATE or wf.getnchannels() != 1 or wf.getsampwidth() != SAMPLE_WIDTH:
+                    print(f"Skipping {file}: expected 16kHz mono 16-bit audio")
+                    continue
+                turns.append(wf.readframes(wf.getnframes()))
+        elif file.endswith(".pcm") or file.endswith(".raw"):
+            with open(file, "rb") as f:
+                turns.append(f.read())
+    return turns
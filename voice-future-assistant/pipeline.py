@@ -1,16 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Iterator, List, Tuple
 from enum import Enum
+import io
+import wave
 
 class TTSOutputType(str, Enum):
     mp3 = 'mp3'
     wav = 'wav'
 
-# generate audio bytes
+# utterance captured by an audio source, kept in memory from the source to the STT
+# - pcm: raw mono PCM samples (16-bit little endian unless sample_width says otherwise)
+# - speech_segments: (start, end) seconds with speech detected by the VAD, relative to the start of the clip
+@dataclass
+class AudioClip:
+    pcm: bytes
+    sample_rate: int = 16000
+    sample_width: int = 2
+    channels: int = 1
+    speech_segments: List[Tuple[float, float]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return len(self.pcm) > 0
+
+    def duration(self) -> float:
+        return len(self.pcm) / (self.sample_rate * self.sample_width * self.channels)
+
+    # speech segments widened by pad seconds on each side (clamped to the clip, overlapping ones merged),
+    # the VAD marks speech at chunk resolution, so word onsets and endings right at the edges would be cut
+    def padded_speech_segments(self, pad: float = 0.3) -> List[Tuple[float, float]]:
+        end_of_clip = self.duration()
+        padded = []
+        for start, end in sorted(self.speech_segments):
+            start, end = max(0.0, start - pad), min(end_of_clip, end + pad)
+            if padded and start <= padded[-1][1]:
+                padded[-1] = (padded[-1][0], max(padded[-1][1], end))
+            else:
+                padded.append((start, end))
+        return padded
+
+    # the clip as a WAV file, in memory, for apis that need a container format
+    def to_wav(self) -> bytes:
+        wav = io.BytesIO()
+        with wave.open(wav, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(self.sample_width)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(self.pcm)
+        return wav.getvalue()
+
+# generate audio clips
 class AudioSource(ABC):
-    # get audio in bytes (from website, microphone, voip api)
+    # get the next utterance (from website, microphone, voip api)
     @abstractmethod
-    async def get_audio(self) -> bytes:
+    async def get_audio(self) -> Optional[AudioClip]:
         pass
 
     #stop getting audio
@@ -21,8 +64,8 @@ class AudioSource(ABC):
 #convert speech to text
 class STT(ABC):
     @abstractmethod
-    #convert audio in bytes to text
-    async def transcribe(self, audio: bytes) -> Optional[str]:
+    #convert an audio clip to text
+    async def transcribe(self, audio: AudioClip) -> Optional[str]:
         pass
 
 #process text and generate responses
@@ -36,6 +79,18 @@ class LLM(ABC):
     async def process(self, text: str) -> tuple[bool, str, str]:
         pass
 
+#process text and generate responses incrementally, so TTS can start before the full response is ready
+# - process_stream yields text deltas as the LLM generates them (json block included, the caller filters it)
+# - get_stream_result returns the same tuple as process(), for the last finished stream
+class StreamingLLM(LLM):
+    @abstractmethod
+    def process_stream(self, text: str) -> Iterator[str]:
+        pass
+
+    @abstractmethod
+    def get_stream_result(self) -> tuple[bool, str, str]:
+        pass
+
 #convert text to speech
 class TTS(ABC):
     @abstractmethod
@@ -57,7 +112,9 @@ class AudioSink(ABC):
 
 # any additional cleanup of pipeline, if needed
 # useful to signal end of conversation to frontend, and do some cleanup
+# - output: json block with end of conversation info
+# - metrics: per session latency summary (see turn_metrics.SessionMetrics.summary)
 class Finish(ABC):
     @abstractmethod
-    async def finish(self):
+    async def finish(self, output: str, metrics: Optional[dict] = None):
         pass
\ No newline at end of file
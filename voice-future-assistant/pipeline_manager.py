@@ -1,6 +1,14 @@
 import asyncio
+import traceback
 from typing import Dict, Optional, Type, List
 from pipeline import AudioSource, STT, LLM, TTS, AudioSink, Finish
+from sentence_segmenter import SentenceSegmenter
+from provider_executor import SessionExecutor
+from turn_metrics import SessionMetrics, TurnMetrics
+from greeting_cache import GREETING_CACHE
+from endpointing import EndpointDetector
+from clock import REAL_CLOCK
+from session_recorder import SessionRecorder, SESSION_RECORD_DIR
 import websocket_msg_protocol as WebSocketProtocol
 
 class PipelineManager:
@@ -15,40 +23,131 @@ class PipelineManager:
         finish_factory = config.get("finish", None)
         self.finish: Optional[Finish] = finish_factory() if finish_factory else None
         
+        # stream llm responses sentence by sentence into tts, if the llm supports it
+        self.stream_responses = config.get("stream_responses", True) and hasattr(self.llm, 'process_stream')
+
+        # runs blocking stt/llm/tts calls on thread pools, in order per provider
+        self.executor = SessionExecutor()
+
+        # the session's time source (see clock.py), owned by the audio source
+        self.clock = getattr(self.audio_source, 'clock', REAL_CLOCK)
+
+        # the greeting is held from here, before the loop runs the source's tasks, so a recorded caller
+        # (FileAudioSource) doesn't start talking before it. released once the greeting played (initialize)
+        self.greeting_hold = self.clock.hold()
+        self.greeting_hold.__enter__()
+
+        # per turn latency of every stage, reported to the frontend and summarized at the end
+        self.metrics = SessionMetrics(self.clock)
+
+        # what was said, in order: {"role": "user" | "assistant", "text", "time"} (seconds since the session started)
+        self.transcript: List[dict] = []
+        self.start_time = self.clock.time()
+
+        # opt-in recording of the session for replays (see session_recorder.py): config "record" or SESSION_RECORD_DIR
+        record_dir = config.get("record", SESSION_RECORD_DIR)
+        self.recorder = SessionRecorder(record_dir, self.clock) if record_dir else None
+        if self.recorder:
+            self.recorder.meta["providers"] = {"stt": type(self.stt).__name__, "llm": type(self.llm).__name__, "tts": type(self.tts).__name__}
+            self.recorder.meta["stream_responses"] = self.stream_responses
+            if hasattr(self.audio_source, 'recorder'):
+                self.audio_source.recorder = self.recorder
+
+        # speculative llm generation on stable interim transcripts, committed if the final transcript matches
+        self.speculative = config.get("speculative", True) and hasattr(self.llm, 'speculate')
+        self.speculation = None # (interim text, task generating the response)
+
+        # live audio frames fed to a streaming stt while the user speaks
+        self.frame_task = None
+
+        # end of turn detection settings for this session (see endpointing.EndpointDetector), e.g. {"mode": "fixed"}
+        if config.get("endpointing") and hasattr(self.audio_source, 'endpointer'):
+            self.audio_source.endpointer = EndpointDetector(**config["endpointing"])
+
         # For real-time interaction
-        self.is_processing = False
         self.conversation_ended = False
+
+        # why the session ended: "finished" (conversation reached its end), "disconnected" or "idle" (client went away)
+        self.end_reason = None
+        self.stopped = False
         
     async def initialize(self):
-        initial_response = None
-        if self.llm:
-            initial_response = self.llm.get_initial_response()
-        if initial_response:
-            response_audio = self.tts.synthesize(initial_response)
-            if response_audio:
-                await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
+        if not self.llm:
+            self.release_greeting_hold()
+            return
+        # cached greeting audio if available, otherwise generated (llm + tts) and cached for the next sessions
+        try:
+            greeting = await self.executor.call(self.llm, GREETING_CACHE.get_greeting, self.llm, self.tts)
+            if greeting and greeting["text"]:
+                self.add_transcript("assistant", greeting["text"])
+                self.record("greeting", text=greeting["text"])
+                self.record_tts(greeting["text"], greeting["audio"], greeting["output_type"])
+            if greeting and greeting["audio"]:
+                await self.audio_sink.output_audio(greeting["audio"], greeting["output_type"])
+        finally:
+            self.release_greeting_hold()
+
+    def release_greeting_hold(self):
+        if self.greeting_hold:
+            self.greeting_hold.__exit__(None, None, None)
+            self.greeting_hold = None
+
+    def add_transcript(self, role: str, text: str):
+        self.transcript.append({"role": role, "text": text, "time": round(self.clock.time() - self.start_time, 3)})
+
+    def record(self, kind: str, **fields):
+        if self.recorder:
+            self.recorder.record(kind, **fields)
+
+    def record_tts(self, text: str, audio: Optional[bytes], output_type):
+        if self.recorder:
+            duration = self.audio_sink.audio_clip_duration(audio, output_type) if audio and hasattr(self.audio_sink, 'audio_clip_duration') else None
+            self.recorder.tts(text, audio, duration)
 
     async def handle_interim_result(self, text: str):
-        """Handle interim results (during silence pauses)"""
-        if self.is_processing or self.conversation_ended:
+        """Handle interim results (during silence pauses): speculatively generate the response to the stable interim text"""
+        if self.conversation_ended or not self.speculative:
             return
-            
-        self.is_processing = True
-        
+
+        # the running speculation already covers this text
+        if self.speculation and self.llm._is_similar_text(self.speculation[0], text):
+            return
+
+        self.cancel_speculation()
+        print(f"Speculating on interim: {text}")
+        task = asyncio.create_task(self.executor.call(self.llm, self.llm.speculate, text))
+        self.speculation = (text, task)
+
+    # partial transcripts help the audio source decide when the user finished speaking
+    def handle_partial_result(self, text: str):
+        if hasattr(self.audio_source, 'endpointer'):
+            self.audio_source.endpointer.update_transcript(text, self.clock.time())
+
+    def cancel_speculation(self):
+        if self.speculation:
+            self.speculation[1].cancel()
+            self.speculation = None
+
+    # returns the speculative response if it was generated for the same text as the final transcript, else None
+    async def take_speculation(self, text: str) -> Optional[tuple[bool, str, str]]:
+        if not self.speculation:
+            return None
+        speculated_text, task = self.speculation
+        self.speculation = None
+
+        if not self.llm._is_similar_text(speculated_text, text):
+            print("Final transcript differs from interim, discarding speculation")
+            task.cancel()
+            return None
+
         try:
-            print(f"Processing interim: {text}")
-            # Process the interim text
-            _, response, _ = self.llm.process(text, is_interim=True)
-            
-            if response:
-                if self.audio_sink.isWebsocket:
-                    await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.TTS, response)
-                # Synthesize and output the response
-                response_audio = self.tts.synthesize(response)
-                if response_audio:
-                    await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
-        finally:
-            self.is_processing = False
+            speculation = await task
+        except asyncio.CancelledError:
+            return None
+        if not speculation:
+            return None
+        print("Final transcript matches interim, committing speculation")
+        return await self.executor.call(self.llm, self.llm.commit_speculation, speculation)
 
     async def handle_final_result(self, text: str):
         """Handle final recognition results"""
@@ -56,28 +155,186 @@ class PipelineManager:
             return
             
         print(f"Final result: {text}")
-        
-        # Process the final text
-        last_response_flag, response, json_block = self.llm.process(text)
-        
+        self.record("stt", text=text, streaming=True)
+
+        # the turn starts when the user stopped speaking, like the batch path, so stt and endpointing latency count
+        # the final transcript often arrives before VAD ends the utterance, then the silence in progress is the anchor
+        # scheduled from the stt's thread and awaited by nobody, so errors of the turn are reported here
+        try:
+            with self.clock.hold():
+                anchor = self.last_voice_time()
+                turn = self.metrics.start_turn(anchor)
+                if anchor is not None and not self.audio_source.speech_active: # VAD already ended this utterance
+                    await self.mark(turn, WebSocketProtocol.TimestampType.VAD, getattr(self.audio_source, 'current_speech_end', None))
+                await self.mark(turn, WebSocketProtocol.TimestampType.STT)
+                await self.respond(text, turn, await self.take_speculation(text))
+        except Exception as e:
+            print(f"Turn failed, response not completed: {e}")
+            traceback.print_exc()
+
+    # end of the user's speech for a streaming stt turn, None (the turn starts now) if unknown
+    # a VAD end older than the previous turn belongs to an earlier utterance (VAD missed this one)
+    def last_voice_time(self) -> Optional[float]:
+        if not hasattr(self.audio_source, 'last_voice_time'):
+            return None
+        anchor = self.audio_source.last_voice_time()
+        if anchor is None or (self.metrics.turns and anchor <= self.metrics.turns[-1].reference_time):
+            return None
+        return anchor
+
+    # record a latency mark for the turn, and send it to the frontend
+    async def mark(self, turn: Optional[TurnMetrics], stage: WebSocketProtocol.TimestampType, at: Optional[float] = None):
+        if turn is None or turn.has(stage):
+            return
+        elapsed = turn.mark(stage, at)
+        print(f"[latency] {stage.value}: {elapsed:.3f}s")
+        if self.audio_sink.isWebsocket:
+            await WebSocketProtocol.send_websocket_timestamp(self.audio_sink.websocket, stage, elapsed)
+
+    # generate the llm response for the user text (unless already generated), speak it,
+    # and end the conversation if it was the last response
+    async def respond(self, text: str, turn: Optional[TurnMetrics] = None, result: Optional[tuple[bool, str, str]] = None):
+        self.add_transcript("user", text)
+        if result:
+            last_response_flag, response, json_block = result
+            await self.mark(turn, WebSocketProtocol.TimestampType.LLM_FIRST_TOKEN)
+            await self.mark(turn, WebSocketProtocol.TimestampType.LLM)
+            if response:
+                await self.speak(response, turn)
+        elif self.stream_responses:
+            last_response_flag, response, json_block = await self.stream_response(text, turn)
+        else:
+            last_response_flag, response, json_block = await self.executor.call(self.llm, self.llm.process, text)
+            # the whole response arrives at once
+            await self.mark(turn, WebSocketProtocol.TimestampType.LLM_FIRST_TOKEN)
+            await self.mark(turn, WebSocketProtocol.TimestampType.LLM)
+            if response:
+                await self.speak(response, turn)
+
         if response:
-            if self.audio_sink.isWebsocket:
-                await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.TTS, response)
-            # Synthesize and output the response
-            response_audio = self.tts.synthesize(response)
-            if response_audio:
-                await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
-                
+            self.add_transcript("assistant", response)
+        self.record("llm", input=text, response=response, final=last_response_flag, json=json_block, speculative=bool(result))
+        if turn:
+            self.record("latency", marks=dict(turn.marks))
+
         # Check if this is the end of the conversation
         if last_response_flag:
             self.conversation_ended = True
+            self.end_reason = "finished"
             print("\n\nConversa encerrada. Adeus!")
             print("conversation output:\n", json_block)
             if self.finish:
-                await self.finish.finish(json_block)
+                await self.finish.finish(json_block, self.metrics.summary())
             await self.stop()
 
+    # send response text to frontend, synthesize it and play it
+    async def speak(self, response: str, turn: Optional[TurnMetrics] = None):
+        if self.audio_sink.isWebsocket:
+            await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.TTS, response)
+        # Synthesize and output the response
+        response_audio = await self.executor.call(self.tts, self.tts.synthesize, response)
+        self.record_tts(response, response_audio, self.tts.get_output_type())
+        await self.mark(turn, WebSocketProtocol.TimestampType.TTS_FIRST_BYTE)
+        await self.mark(turn, WebSocketProtocol.TimestampType.TTS)
+        if response_audio:
+            await self.mark(turn, WebSocketProtocol.TimestampType.AUDIO)
+            await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
+
+    # streaming turn: llm deltas -> sentences -> tts -> audio sink, all three stages run concurrently,
+    # so the first sentence plays while the rest of the response is still being generated and synthesized
+    async def stream_response(self, text: str, turn: Optional[TurnMetrics] = None) -> tuple[bool, str, str]:
+        sentence_queue = asyncio.Queue()
+        audio_queue = asyncio.Queue()
+        interrupted = False
+
+        # read llm deltas (blocking generator, advanced in a worker thread) and split them into sentences
+        async def generate():
+            segmenter = SentenceSegmenter()
+            try:
+                async for delta in self.executor.iterate(self.llm, self.llm.process_stream(text)):
+                    await self.mark(turn, WebSocketProtocol.TimestampType.LLM_FIRST_TOKEN)
+                    for sentence in segmenter.push(delta):
+                        await sentence_queue.put(sentence)
+                await self.mark(turn, WebSocketProtocol.TimestampType.LLM)
+                rest = segmenter.flush()
+                if rest:
+                    await sentence_queue.put(rest)
+            finally:
+                await sentence_queue.put(None)
+
+        # synthesize sentences in order, ahead of playback
+        async def synthesize():
+            try:
+                while (sentence := await sentence_queue.get()) is not None:
+                    if interrupted:
+                        continue # keep draining, so the llm stream finishes and history stays complete
+                    response_audio = await self.executor.call(self.tts, self.tts.synthesize, sentence)
+                    self.record_tts(sentence, response_audio, self.tts.get_output_type())
+                    await self.mark(turn, WebSocketProtocol.TimestampType.TTS_FIRST_BYTE)
+                    if response_audio:
+                        await audio_queue.put((sentence, response_audio))
+                if not interrupted:
+                    await self.mark(turn, WebSocketProtocol.TimestampType.TTS)
+            except Exception as e:
+                print(f"TTS failed mid-response, ending the turn: {e}")
+                raise
+            finally:
+                await audio_queue.put(None)
+
+        generate_task = asyncio.create_task(generate())
+        synthesize_task = asyncio.create_task(synthesize())
+
+        try:
+            # play sentences one after the other, output_audio returns when playback ends (or is interrupted)
+            while (item := await audio_queue.get()) is not None:
+                if interrupted:
+                    continue
+                sentence, response_audio = item
+                if self.audio_sink.isWebsocket:
+                    await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.TTS, sentence)
+                await self.mark(turn, WebSocketProtocol.TimestampType.AUDIO)
+                await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
+                if self.audio_sink.interrupted:
+                    print("Streaming response interrupted, skipping remaining sentences")
+                    interrupted = True
+            await generate_task
+            await synthesize_task # raises the tts error if synthesis stopped before the end of the response
+        finally:
+            generate_task.cancel()
+            synthesize_task.cancel()
+            # wait until both are really done, and retrieve their errors (the first one was raised above)
+            await asyncio.gather(generate_task, synthesize_task, return_exceptions=True)
+
+        return self.llm.get_stream_result()
+
+    # run the conversation until it ends, or until the audio source closes (client disconnected or idle),
+    # in which case whatever the conversation is waiting on (llm, tts, playback) is cancelled right away
     async def run(self):
+        closed = getattr(self.audio_source, 'closed', None)
+        if closed is None:
+            await self.converse()
+            return
+
+        conversation = asyncio.create_task(self.converse())
+        source_closed = asyncio.create_task(closed.wait())
+        try:
+            await asyncio.wait({conversation, source_closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            source_closed.cancel()
+            if self.stopped:
+                await conversation # the conversation ended by itself, and is stopping the session
+            elif not conversation.done():
+                self.end_reason = self.audio_source.close_reason
+                print(f"Audio source closed ({self.end_reason}), cancelling conversation")
+                conversation.cancel()
+                try:
+                    await conversation
+                except asyncio.CancelledError:
+                    pass
+        if conversation.done() and not conversation.cancelled() and conversation.exception():
+            raise conversation.exception()
+
+    async def converse(self):
         await self.initialize()
 
         print("\n" + "-"*50)
@@ -85,51 +342,111 @@ class PipelineManager:
         
         # Start streaming mode if our STT supports it
         if hasattr(self.stt, 'start_streaming'):
-            # Setup callbacks for streaming
+            # Setup callbacks for streaming, they can be called from the stt's recognition thread
+            loop = asyncio.get_running_loop()
             self.stt.start_streaming(
-                on_final_result=lambda text: asyncio.create_task(self.handle_final_result(text)),
-                on_interim_result=lambda text: asyncio.create_task(self.handle_interim_result(text))
+                on_final_result=lambda text: asyncio.run_coroutine_threadsafe(self.handle_final_result(text), loop),
+                on_interim_result=lambda text: asyncio.run_coroutine_threadsafe(self.handle_interim_result(text), loop),
+                on_partial_result=lambda text: loop.call_soon_threadsafe(self.handle_partial_result, text)
             )
+            # feed it live frames as they arrive, so recognition runs while the user speaks
+            if hasattr(self.audio_source, 'stream_frames') and hasattr(self.stt, 'process_audio_chunk'):
+                self.frame_task = asyncio.create_task(self.stream_frames_to_stt())
         
         # Main loop to continuously get audio
         while not self.conversation_ended:
             # Get audio bytes from source
+            # get_audio waits for the source's speech events, no polling needed
             audio_data = await self.audio_source.get_audio()
             if not audio_data:
-                await asyncio.sleep(0.1)
+                if not getattr(self.audio_source, 'running', True):
+                    break # the source stopped, there won't be more audio
                 continue
 
-            # For streaming STT, this feeds the audio chunk into the stream
-            # For legacy STT, this performs a full transcription
-            text = self.stt.transcribe(audio_data)
-
-            if self.audio_sink.isWebsocket:
-                await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.STT, text)
-
-            # Handle any text returned from the legacy method
-            # (streaming mode will handle results through callbacks)
-            if text and not hasattr(self.stt, 'start_streaming'):
-                last_response_flag, response, json_block = self.llm.process(text)
-                if response:
-                    if self.audio_sink.isWebsocket:
-                        await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.TTS, response)
-                    response_audio = self.tts.synthesize(response)
-                    if response_audio:
-                        await self.audio_sink.output_audio(response_audio, self.tts.get_output_type())
-                        
-                if last_response_flag:
-                    self.conversation_ended = True
-                    print("\n\nConversa encerrada. Adeus!")
-                    print("conversation output:\n", json_block)
-                    if self.finish:
-                        await self.finish.finish(json_block)
-                    await self.stop()
-                    break
+            # the streaming stt already heard this utterance live, results come through the callbacks
+            if self.frame_task:
+                continue
+
+            # in a replay, no audio is fed while the turn is processed (see clock.py)
+            with self.clock.hold():
+                # the turn starts when the user stopped speaking (VAD declares it silence_timeout later)
+                turn = None
+                if not hasattr(self.stt, 'start_streaming'):
+                    turn = self.metrics.start_turn(getattr(self.audio_source, 'current_speech_last_voice', None))
+                    await self.mark(turn, WebSocketProtocol.TimestampType.VAD, getattr(self.audio_source, 'current_speech_end', None))
+
+                # For streaming STT, this feeds the audio chunk into the stream
+                # For legacy STT, this performs a full transcription
+                text = await self.executor.call(self.stt, self.stt.transcribe, audio_data)
+                await self.mark(turn, WebSocketProtocol.TimestampType.STT)
+                self.record("stt", text=text, audio_seconds=round(audio_data.duration(), 3))
+
+                if self.audio_sink.isWebsocket:
+                    await WebSocketProtocol.send_websocket_text(self.audio_sink.websocket, WebSocketProtocol.TextType.STT, text)
+
+                # Handle any text returned from the legacy method
+                # (streaming mode will handle results through callbacks)
+                if text and not hasattr(self.stt, 'start_streaming'):
+                    await self.respond(text, turn)
 
+    # send the audio source's live frames to the streaming stt, until the source stops
+    async def stream_frames_to_stt(self):
+        async for frames in self.audio_source.stream_frames():
+            if self.conversation_ended:
+                break
+            self.stt.process_audio_chunk(frames)
+
+    # what the session left running after stop (tasks, or the stt's recognition thread), empty if it was torn down cleanly
+    def leftovers(self) -> list:
+        tasks = {
+            "stt frames": self.frame_task,
+            "recording": getattr(self.audio_source, 'recording_task', None),
+            "vad monitor": getattr(self.audio_source, 'monitor_task', None),
+        }
+        left = [name for name, task in tasks.items() if task and not task.done()]
+        thread = getattr(self.stt, 'streaming_thread', None)
+        if thread and thread.is_alive():
+            left.append("stt stream thread")
+        return left
+
+    # release the session: safe to call more than once (the conversation stops itself when it ends, the server always does)
     async def stop(self):
-        # Stop streaming if it's active
+        if self.stopped:
+            return
+        self.stopped = True
+        self.conversation_ended = True
+        if self.end_reason is None:
+            self.end_reason = getattr(self.audio_source, 'close_reason', None) or "stopped"
+
+        self.release_greeting_hold() # the session may stop before greeting
+        self.cancel_speculation()
+        if self.frame_task:
+            self.frame_task.cancel()
+            await asyncio.gather(self.frame_task, return_exceptions=True)
+
+        # Stop streaming if it's active (joins the recognition thread, so not on the loop)
         if hasattr(self.stt, 'stop_streaming'):
-            self.stt.stop_streaming()
-            
+            await asyncio.to_thread(self.stt.stop_streaming)
+
         await self.audio_source.stop()
-        await self.audio_sink.stop()
\ No newline at end of file
+        try:
+            await self.audio_sink.stop()
+        except Exception as e:
+            print(f"Error stopping audio sink: {e}") # e.g. the websocket is already gone
+
+        # providers holding connections or clients (google stt/tts, gemini) release them, off the loop
+        for provider in (self.stt, self.llm, self.tts):
+            if hasattr(provider, 'close'):
+                try:
+                    await asyncio.to_thread(provider.close)
+                except Exception as e:
+                    print(f"Error closing {type(provider).__name__}: {e}")
+
+        # write the session archive, off the loop (it compresses the inbound audio)
+        if self.recorder:
+            timeline = getattr(self.audio_source, 'timeline', None)
+            try:
+                await asyncio.to_thread(self.recorder.save, end_reason=self.end_reason, latency=self.metrics.summary(),
+                                        transcript=self.transcript, timeline=timeline.stats() if timeline else None)
+            except Exception as e:
+                print(f"Error saving session recording: {e}")
\ No newline at end of file
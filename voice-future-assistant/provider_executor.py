@@ -0,0 +1,92 @@
+import asyncio
+import os
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+##
+#  Runs the blocking STT/LLM/TTS adapters (google, azure, gemini, ...) on bounded thread pools,
+#  so one session waiting on an api does not freeze audio ingestion, VAD and barge-in of every other session
+##
+
+# max concurrent blocking calls per provider class, shared by every session in the process
+DEFAULT_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "16"))
+
+class ProviderExecutor:
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        self.pool_size = pool_size
+        self.pools: Dict[str, ThreadPoolExecutor] = {} # one pool per provider class (GeminiLLM, GoogleCloudTTS, ...)
+
+    # get (or create) the thread pool for the provider's class
+    def get_pool(self, provider: Any) -> ThreadPoolExecutor:
+        name = type(provider).__name__
+        if name not in self.pools:
+            self.pools[name] = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix=name)
+        return self.pools[name]
+
+    # start the call on the provider's pool, the returned future completes when the worker thread is done
+    def submit(self, provider: Any, fn: Callable, *args, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.get_pool(provider), functools.partial(fn, *args, **kwargs))
+
+    async def run(self, provider: Any, fn: Callable, *args, **kwargs) -> Any:
+        return await self.submit(provider, fn, *args, **kwargs)
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self.pools.clear()
+
+# process wide executor, shared by all sessions
+EXECUTOR = ProviderExecutor()
+
+# per session view of the executor
+# calls to the same provider object run one at a time, in the order they were made,
+# since the adapters are not thread safe (e.g. GeminiLLM.conversation_history)
+class SessionExecutor:
+    def __init__(self, executor: ProviderExecutor = EXECUTOR):
+        self.executor = executor
+        self.locks: Dict[int, asyncio.Lock] = {} # one lock per provider object, asyncio.Lock wakes waiters in FIFO order
+
+    def get_lock(self, provider: Any) -> asyncio.Lock:
+        return self.locks.setdefault(id(provider), asyncio.Lock())
+
+    # await a blocking provider call, e.g. await executor.call(self.tts, self.tts.synthesize, text)
+    # cancelling the await does not stop the worker thread, so the provider stays locked until the thread is done
+    async def call(self, provider: Any, fn: Callable, *args, **kwargs) -> Any:
+        lock = self.get_lock(provider)
+        await lock.acquire()
+        try:
+            future = self.executor.submit(provider, fn, *args, **kwargs)
+        except BaseException:
+            lock.release() # never started (e.g. executor already shut down)
+            raise
+        future.add_done_callback(functools.partial(release_when_done, lock))
+        return await asyncio.shield(future)
+
+    # iterate a blocking generator of the provider (e.g. GeminiLLM.process_stream) without blocking the event loop
+    # the provider stays locked for the whole iteration, so no other call of this session interleaves with it
+    async def iterate(self, provider: Any, generator: Iterator) -> AsyncIterator:
+        sentinel = object()
+        lock = self.get_lock(provider)
+        await lock.acquire()
+        future = None
+        try:
+            while True:
+                future = self.executor.submit(provider, next, generator, sentinel)
+                item = await asyncio.shield(future)
+                if item is sentinel:
+                    break
+                yield item
+        finally:
+            # cancelled or closed while a next() is still running in its thread, release once it returns
+            if future is None or future.done():
+                lock.release()
+            else:
+                future.add_done_callback(functools.partial(release_when_done, lock))
+
+# done callback of a locked provider call, also retrieves the error of a call nobody awaits anymore (it was cancelled)
+def release_when_done(lock: asyncio.Lock, future: asyncio.Future):
+    lock.release()
+    if not future.cancelled():
+        future.exception()
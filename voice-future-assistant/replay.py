@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import List, Optional
+from pipeline_manager import PipelineManager
+from provider_executor import EXECUTOR
+from vad_service import USE_SHARED_VAD, VAD_SERVICE
+from session_recorder import load_archive, session_turns
+from components.file_audio_source import FileAudioSource
+from components.null_audio_sink import NullAudioSink
+from components.null_finish import NullFinish
+from components.recorded_stt import RecordedSTT
+from components.recorded_llm import RecordedLLM
+from components.recorded_tts import RecordedTTS
+
+##
+#  Replays a recorded session (see session_recorder.py) through the current code, and diffs it turn by turn
+#  against the recording: transcripts, responses, final json, synthesized text (and audio hashes with a live tts),
+#  where the VAD ended every utterance, and the latency of every stage
+#  providers are the recorded ones by default (they answer instantly with the recorded outputs, so differences come
+#  from the pipeline itself: VAD, endpointing, turn handling), --live runs some of them for real instead
+#  exits with 1 if any output differs, so it can gate pipeline changes
+#
+#  usage: python replay.py recordings/20250101-120000-abcd1234.zip [--live stt,llm,tts] [--stt 6] [--pacing realtime] [--output report.json]
+##
+
+LATENCY_TOLERANCE = 0.001 # seconds, differences below this are the same timing
+
+# api class of a kind, by frontend index (modelConfigs.COMPONENT_MAPPINGS), or the default one
+def live_api(kind: str, index: Optional[int]):
+    from modelConfigs import COMPONENT_MAPPINGS, MODEL_MAPPINGS
+    return COMPONENT_MAPPINGS[kind][index] if index is not None else MODEL_MAPPINGS["default"][kind]
+
+def recorded_apis(events: List[dict]) -> dict:
+    greeting = next((event["text"] for event in events if event["type"] == "greeting"), None)
+    return {
+        "stt": lambda: RecordedSTT([event.get("text") for event in events if event["type"] == "stt"]),
+        "llm": lambda: RecordedLLM(greeting, [(event.get("final", False), event.get("response") or "", event.get("json") or "")
+                                              for event in events if event["type"] == "llm"]),
+        "tts": lambda: RecordedTTS([event.get("duration") if event.get("sha256") else None
+                                    for event in events if event["type"] == "tts"]),
+    }
+
+# differences between the recorded and the replayed turns
+def diff_turns(recorded: List[dict], replayed: List[dict], compare_audio: bool) -> List[dict]:
+    diffs = []
+    for i in range(max(len(recorded), len(replayed))):
+        before = recorded[i] if i < len(recorded) else {}
+        after = replayed[i] if i < len(replayed) else {}
+        diff = {"turn": i + 1, "outputs": {}, "latency": {}}
+
+        for field in ("stt", "response", "final", "json"):
+            if before.get(field) != after.get(field):
+                diff["outputs"][field] = [before.get(field), after.get(field)]
+        tts_field = "sha256" if compare_audio else "text"
+        tts_before = [tts[tts_field] for tts in before.get("tts", [])]
+        tts_after = [tts[tts_field] for tts in after.get("tts", [])]
+        if tts_before != tts_after:
+            diff["outputs"]["tts"] = [tts_before, tts_after]
+
+        # same audio in, so the utterance should end at the same point of the stream
+        if before.get("speech_end") != after.get("speech_end"):
+            diff["outputs"]["speech_end"] = [before.get("speech_end"), after.get("speech_end")]
+
+        marks_before = before.get("latency") or {}
+        marks_after = after.get("latency") or {}
+        for stage in sorted(set(marks_before) | set(marks_after)):
+            old, new = marks_before.get(stage), marks_after.get(stage)
+            if old is None or new is None or abs(new - old) >= LATENCY_TOLERANCE:
+                diff["latency"][stage] = [old, new, round(new - old, 3) if old is not None and new is not None else None]
+        diffs.append(diff)
+    return diffs
+
+def print_report(diffs: List[dict]):
+    for diff in diffs:
+        status = "DIFFERENT" if diff["outputs"] else "same"
+        print(f"turn {diff['turn']}: outputs {status}")
+        for field, (old, new) in diff["outputs"].items():
+            print(f"    {field}: {old!r} -> {new!r}")
+        for stage, (old, new, delta) in diff["latency"].items():
+            print(f"    latency {stage}: {old} -> {new}" + (f" ({delta:+.3f}s)" if delta is not None else ""))
+
+async def replay(args) -> int:
+    meta, events, pcm = load_archive(args.archive)
+    live = set(filter(None, args.live.split(","))) if args.live else set()
+    print(f"Replaying {meta.get('session_id')} ({len(pcm) / 32000:.1f}s of audio, recorded with {meta.get('providers')}), "
+          f"live providers: {', '.join(sorted(live)) or 'none'}")
+
+    apis = recorded_apis(events)
+    for kind in live:
+        apis[kind] = live_api(kind, getattr(args, kind))
+
+    if USE_SHARED_VAD:
+        VAD_SERVICE.start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        audio_path = os.path.join(directory, "inbound.pcm")
+        with open(audio_path, "wb") as f:
+            f.write(pcm)
+
+        finish = NullFinish()
+        config = {
+            "audio_source": lambda: FileAudioSource(audio_path, pacing=args.pacing),
+            "stt": apis["stt"],
+            "llm": apis["llm"],
+            "tts": apis["tts"],
+            "audio_sink": lambda audio_source=None: NullAudioSink(audio_source),
+            "finish": lambda: finish,
+            "stream_responses": meta.get("stream_responses", True), # same sentence by sentence synthesis as the recording
+            "record": directory, # the replay is recorded too, and diffed against the original
+        }
+        pipeline = PipelineManager(config)
+        try:
+            await pipeline.run()
+        finally:
+            await pipeline.stop()
+        _, replay_events, _ = load_archive(pipeline.recorder.path)
+
+    await VAD_SERVICE.stop()
+    EXECUTOR.shutdown()
+
+    diffs = diff_turns(session_turns(events), session_turns(replay_events), compare_audio="tts" in live)
+    print_report(diffs)
+    different = sum(1 for diff in diffs if diff["outputs"])
+    print(f"{len(diffs)} turns, {different} with different outputs")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"session_id": meta.get("session_id"), "live": sorted(live), "turns": diffs}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+    return 1 if different else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded session and diff it against the recording")
+    parser.add_argument("archive", help="session archive (.zip) written by the session recorder")
+    parser.add_argument("--live", default="", help="providers to run for real instead of the recorded outputs, e.g. stt,llm")
+    parser.add_argument("--stt", type=int, default=None, help="live STT index (see modelConfigs), default api if omitted")
+    parser.add_argument("--llm", type=int, default=None, help="live LLM index")
+    parser.add_argument("--tts", type=int, default=None, help="live TTS index")
+    parser.add_argument("--pacing", choices=("realtime", "virtual"), default="virtual")
+    parser.add_argument("--output", default=None, help="write the turn by turn diff as json")
+    sys.exit(asyncio.run(replay(parser.parse_args())))
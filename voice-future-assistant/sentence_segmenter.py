@@ -0,0 +1,101 @@
+import re
+from typing import List, Optional
+
+from components.llm_base import FINAL_RESPONSE_JSON
+
+##
+#  Splits streamed LLM text into sentences that can be sent to TTS one by one
+##
+
+# sentence ends at . ! ? … (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r'[.!?…]+["\')\]»]*\s+')
+
+# a backtick or brace may start the end of conversation json block, text from there is held until we know
+BLOCK_START = re.compile(r'[`{]')
+
+# key of the end of conversation json block, a block cut by the end of the stream is dropped if it has it
+FINAL_RESPONSE_KEY = '"identificacao_cliente"'
+
+class SentenceSegmenter:
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars # short sentences are merged with the next one, avoids tiny TTS requests ("Sim." or "Sr.")
+        self.buffer = "" # text to split into sentences
+        self.held = "" # text from a backtick or brace on, until the block closes
+
+    # add a text delta, returns the sentences completed by it
+    def push(self, delta: str) -> List[str]:
+        self.held += delta
+        self.release()
+
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars:
+                continue # merge with the next sentence
+            sentences.append(sentence)
+            start = match.end()
+
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    # moves held text to the buffer, up to the first block that is still open
+    # a closed block matching the final response json is dropped, any other is spoken as normal text
+    def release(self):
+        while self.held:
+            match = BLOCK_START.search(self.held)
+            if not match:
+                self.buffer += self.held
+                self.held = ""
+                return
+            self.buffer += self.held[:match.start()]
+            self.held = self.held[match.start():]
+
+            end = self.block_end(self.held)
+            if end is None:
+                return # wait for more text
+            block, self.held = self.held[:end], self.held[end:]
+            if not FINAL_RESPONSE_JSON.fullmatch(block.strip()):
+                self.buffer += block
+
+    # end of the block at the start of text, None while it is still open
+    @staticmethod
+    def block_end(text: str) -> Optional[int]:
+        if text[0] == '`':
+            if len(text) < 3 and text == '`' * len(text):
+                return None # might become a ``` fence
+            if not text.startswith('```'):
+                return 1 # a lone backtick, not a block
+            close = text.find('```', 3)
+            return None if close < 0 else close + 3
+
+        depth = 0
+        in_string = False
+        escaped = False
+        for i, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+        return None
+
+    # returns whatever text is left at the end of the stream (without the json block)
+    # a block that never closed is spoken, unless it is the start of the final response json
+    def flush(self) -> str:
+        if FINAL_RESPONSE_KEY not in self.held:
+            self.buffer += self.held
+        self.held = ""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return rest
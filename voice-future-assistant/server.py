@@ -1,10 +1,17 @@
 from contextlib import asynccontextmanager
+import asyncio
 import json
+import os
 import traceback
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.websockets import WebSocketState
 from pipeline_manager import PipelineManager
+from provider_executor import EXECUTOR
+from session_pool import SessionPool
+from loop_monitor import LoopLagMonitor
+from vad_service import USE_SHARED_VAD, VAD_SERVICE
+from endpointing import ENDPOINT_MIN_TIMEOUT, ENDPOINT_MAX_TIMEOUT
 from components.websocket_audio_source import WebSocketAudioSource
 from components.websocket_audio_sink import WebSocketAudioSink
 from components.websocket_finish import WebSocketFinish
@@ -16,12 +23,38 @@ import websocket_msg_protocol as WebSocketProtocol
 #  Module to load backend as a server, that can be accessed via WebSocket, to support LABS frontend page
 ##
 
+# pre-initialized providers, so new calls don't wait for cold starts
+session_pool = SessionPool()
+
+# event loop lag of the server, reported in /health (used by load_test.py)
+loop_monitor = LoopLagMonitor()
+active_sessions = 0
+
+# sessions whose teardown did not finish (timed out or failed) or left tasks or provider threads running
+zombie_sessions = 0
+# seconds a session teardown may take (stt stream, playback, provider clients) before it is abandoned
+TEARDOWN_TIMEOUT = float(os.getenv("SESSION_TEARDOWN_TIMEOUT", "5"))
+
 ### start FastAPI server
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # nothing to do on server setup
+    # keep warm sessions of the default apis ready, refilled in the background
+    default = MODEL_MAPPINGS["default"]
+    session_pool.register(default["stt"], default["llm"], default["tts"])
+    session_pool.start()
+    loop_monitor.start()
+    # load the shared VAD model before the first call
+    if USE_SHARED_VAD:
+        VAD_SERVICE.start()
+
     yield
 
+    await loop_monitor.stop()
+    await session_pool.stop()
+    await VAD_SERVICE.stop()
+    # stop the provider thread pools shared by all sessions
+    EXECUTOR.shutdown()
+
     # on server shutdown
     # for connection in connections:
     #     await connection.close()
@@ -59,18 +92,23 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"Error receiving config: {e}")
 
     final_stt, final_llm, final_tts = await setup_apis_from_config(websocket, frontend_config)
+    endpointing = await setup_endpointing_from_config(websocket, frontend_config)
+    session = await session_pool.acquire(final_stt, final_llm, final_tts)
     
     # configure pipeline with WebSocket components, and apis from frontend config (or default if not provided in frontend)
     config = {
-        "audio_source": lambda: WebSocketAudioSource(websocket),
-        "stt": final_stt,
-        "llm": final_llm,
-        "tts": final_tts,
+        "audio_source": lambda: WebSocketAudioSource(websocket, session["vad"]),
+        "stt": lambda: session["stt"],
+        "llm": lambda: session["llm"],
+        "tts": lambda: session["tts"],
         "audio_sink": lambda audio_source=None: WebSocketAudioSink(audio_source, websocket),
-        "finish": lambda: WebSocketFinish(websocket)
+        "finish": lambda: WebSocketFinish(websocket),
+        "endpointing": endpointing, # None: the ENDPOINT_* env defaults
     }
 
+    global active_sessions, zombie_sessions
     pipeline = PipelineManager(config)
+    active_sessions += 1
 
     try:
         await pipeline.run()
@@ -80,9 +118,22 @@ async def websocket_endpoint(websocket: WebSocket):
         traceback.print_exc()
 
     finally:
-        await pipeline.stop()
+        active_sessions -= 1
+        # a client hanging up is a normal end, only a session that could not be torn down is a zombie
+        leftovers = []
+        try:
+            await asyncio.wait_for(pipeline.stop(), timeout=TEARDOWN_TIMEOUT)
+        except Exception as e:
+            leftovers.append(f"teardown {e!r}")
+        leftovers += pipeline.leftovers()
+        if leftovers:
+            zombie_sessions += 1
+            print(f"Session ({pipeline.end_reason}) not torn down cleanly: {', '.join(leftovers)}, {zombie_sessions} so far")
         if websocket.client_state == WebSocketState.CONNECTED:
-            await websocket.close()
+            try:
+                await websocket.close()
+            except Exception:
+                pass
         print("WebSocket connection closed")
 
 
@@ -120,7 +171,47 @@ async def setup_apis_from_config(websocket, config):
     print(f"STT: {final_stt}, LLM: {final_llm}, TTS: {final_tts}")
     return final_stt, final_llm, final_tts
 
-# Health check endpoint, for debug
+# end of turn detection settings from the frontend config (optional), e.g. "endpointing": {"mode": "fixed", "fixed_timeout": 0.8}
+# only known settings with valid values are kept (see endpointing.EndpointDetector), None if there are none
+async def setup_endpointing_from_config(websocket, config):
+    if not isinstance(config, dict) or "endpointing" not in config:
+        return None
+    requested = config["endpointing"]
+    if not isinstance(requested, dict):
+        await WebSocketProtocol.send_websocket_error(websocket, "Invalid endpointing configuration, using default")
+        return None
+
+    endpointing = {}
+    for name, value in requested.items():
+        if name == "mode" and value in ("adaptive", "fixed"):
+            endpointing[name] = value
+        elif name in ("min_timeout", "max_timeout", "fixed_timeout") and isinstance(value, (int, float)) and 0 < value <= 5:
+            endpointing[name] = float(value)
+        else:
+            await WebSocketProtocol.send_websocket_error(websocket, f"Invalid endpointing setting {name}, ignoring it")
+            print(f"invalid endpointing setting {name}: {value!r}, ignoring it")
+
+    # the adaptive timeout is picked between min and max, an inverted pair (also against the default of the one not given) is rejected
+    min_timeout = endpointing.get("min_timeout", ENDPOINT_MIN_TIMEOUT)
+    max_timeout = endpointing.get("max_timeout", ENDPOINT_MAX_TIMEOUT)
+    if min_timeout > max_timeout:
+        endpointing.pop("min_timeout", None)
+        endpointing.pop("max_timeout", None)
+        message = f"Invalid endpointing configuration: min_timeout {min_timeout} is above max_timeout {max_timeout}, using the default timeouts"
+        await WebSocketProtocol.send_websocket_error(websocket, message)
+        print(message)
+    print(f"Endpointing: {endpointing or 'default'}")
+    return endpointing or None
+
+# Health check endpoint, for debug and load tests
+# loop lag is measured since the last call with ?reset=true
 @app.get("/health")
-async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+async def health_check(reset: bool = False):
+    return {
+        "status": "ok",
+        "active_sessions": active_sessions,
+        "zombie_sessions": zombie_sessions,
+        "loop_lag": loop_monitor.stats(reset),
+        "session_pool": session_pool.stats(),
+        "vad": VAD_SERVICE.stats(),
+    }
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+import traceback
+from typing import Dict, List, Tuple, Type
+from components.audio_source_base import load_vad_model
+from vad_service import USE_SHARED_VAD
+from greeting_cache import GREETING_CACHE
+
+##
+#  Pool of pre-initialized providers (stt, llm, tts + VAD model) per api combination,
+#  so a new call doesn't pay the cold start (gemini client, dataset download, greeting, VAD load)
+##
+
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "2")) # warm sessions kept per (stt, llm, tts) combination
+SESSION_POOL_MAX = int(os.getenv("SESSION_POOL_MAX", "8")) # cap on warm sessions across all combinations (memory)
+SESSION_POOL_MAX_AGE = float(os.getenv("SESSION_POOL_MAX_AGE", "600")) # seconds before a warm session is discarded
+SESSION_POOL_REFILL_INTERVAL = float(os.getenv("SESSION_POOL_REFILL_INTERVAL", "5"))
+
+Combination = Tuple[Type, Type, Type]
+
+# release the clients of a warm session that won't be used (see the providers' close)
+def close_providers(session: dict):
+    for name in ("stt", "llm", "tts"):
+        provider = session.get(name)
+        if hasattr(provider, 'close'):
+            try:
+                provider.close()
+            except Exception as e:
+                print(f"Error closing {type(provider).__name__}: {e}")
+
+class SessionPool:
+    def __init__(self, size: int = SESSION_POOL_SIZE, max_total: int = SESSION_POOL_MAX,
+                 max_age: float = SESSION_POOL_MAX_AGE, refill_interval: float = SESSION_POOL_REFILL_INTERVAL):
+        self.size = size
+        self.max_total = max_total
+        self.max_age = max_age
+        self.refill_interval = refill_interval
+        self.sessions: Dict[Combination, List[dict]] = {} # warm sessions per combination, oldest first
+        self.refill_task = None
+        self.hits = 0
+        self.misses = 0
+
+    # start warming a combination (the default one at startup, others the first time they are requested)
+    def register(self, stt: Type, llm: Type, tts: Type):
+        self.sessions.setdefault((stt, llm, tts), [])
+
+    def total(self) -> int:
+        return sum(len(sessions) for sessions in self.sessions.values())
+
+    # build a session's providers, blocking (runs in a worker thread)
+    def build(self, combination: Combination) -> dict:
+        stt, llm, tts = combination
+        session = {
+            "stt": stt(),
+            "llm": llm(),
+            "tts": tts(),
+            "vad": None if USE_SHARED_VAD else load_vad_model(), # the shared VAD service has its own model
+            "created": time.monotonic(),
+        }
+        # generate the greeting now (first build at startup fills the greeting cache), or seed it from the cache
+        GREETING_CACHE.get_greeting(session["llm"], session["tts"])
+        return session
+
+    # get providers for a new call, warm if available, otherwise built without blocking the event loop
+    async def acquire(self, stt: Type, llm: Type, tts: Type) -> dict:
+        combination = (stt, llm, tts)
+        self.register(*combination)
+        self.discard_expired()
+
+        sessions = self.sessions[combination]
+        if sessions:
+            self.hits += 1
+            print(f"Session pool hit for {[c.__name__ for c in combination]} ({len(sessions) - 1} left)")
+            return sessions.pop(0)
+
+        self.misses += 1
+        print(f"Session pool miss for {[c.__name__ for c in combination]}, building cold session")
+        return await asyncio.to_thread(self.build, combination)
+
+    def discard_expired(self):
+        now = time.monotonic()
+        for combination, sessions in self.sessions.items():
+            self.sessions[combination] = [s for s in sessions if now - s["created"] < self.max_age]
+            for session in sessions:
+                if now - session["created"] >= self.max_age:
+                    close_providers(session)
+
+    # build one missing session at a time, for the combination with fewest warm sessions, until the pool is full
+    async def refill(self):
+        while True:
+            self.discard_expired()
+            missing = [c for c, sessions in self.sessions.items() if len(sessions) < self.size]
+            if not missing or self.total() >= self.max_total:
+                return
+            combination = min(missing, key=lambda c: len(self.sessions[c]))
+            try:
+                session = await asyncio.to_thread(self.build, combination)
+                self.sessions[combination].append(session)
+            except Exception as e:
+                print(f"Session pool failed to build {[c.__name__ for c in combination]}: {e}")
+                traceback.print_exc()
+                return
+
+    async def run(self):
+        while True:
+            await self.refill()
+            await asyncio.sleep(self.refill_interval)
+
+    def start(self):
+        if self.size > 0 and self.max_total > 0:
+            self.refill_task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.refill_task:
+            self.refill_task.cancel()
+            try:
+                await self.refill_task
+            except asyncio.CancelledError:
+                pass
+        for sessions in self.sessions.values():
+            for session in sessions:
+                close_providers(session)
+        self.sessions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "warm": {"/".join(c.__name__ for c in combination): len(sessions) for combination, sessions in self.sessions.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+        }
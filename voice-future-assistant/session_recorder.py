@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+import zipfile
+from typing import List, Optional
+from clock import REAL_CLOCK
+
+##
+#  Opt-in recorder of a session, to reproduce slow or wrong calls (see replay.py)
+#  SESSION_RECORD_DIR: when set, every session writes <dir>/<session id>.zip on stop, with:
+#  - inbound.pcm: the audio received from the client (16kHz mono 16-bit), as it went into the buffer
+#  - events.jsonl: what happened, in order, with "t" in seconds since the session started (session clock):
+#    packet (inbound audio), speech_start / speech_end (VAD), stt, llm (input, response, final json),
+#    tts (text, sha256 and duration of the audio) and latency (marks of every finished turn)
+#  - meta.json: providers, end reason, latency summary, transcript, timeline stats
+##
+
+SESSION_RECORD_DIR = os.getenv("SESSION_RECORD_DIR")
+
+class SessionRecorder:
+    def __init__(self, directory: str, clock=REAL_CLOCK, session_id: Optional[str] = None):
+        self.directory = directory
+        self.clock = clock
+        self.session_id = session_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+        self.start = clock.time()
+        self.pcm = bytearray()
+        self.events: List[dict] = []
+        self.meta = {"session_id": self.session_id, "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.path = None # archive path, once saved
+
+    def record(self, kind: str, **fields):
+        self.events.append({"t": round(self.clock.time() - self.start, 4), "type": kind, **fields})
+
+    # inbound audio, as received (any length)
+    def audio(self, data: bytes):
+        self.record("packet", offset=len(self.pcm), bytes=len(data))
+        self.pcm += data
+
+    # synthesized audio is stored as a hash only, the text is in the event
+    def tts(self, text: str, audio: Optional[bytes], duration: Optional[float] = None):
+        self.record("tts", text=text, sha256=hashlib.sha256(audio).hexdigest() if audio else None,
+                    bytes=len(audio) if audio else 0, duration=round(duration, 3) if duration is not None else None)
+
+    # write the archive, blocking (call it off the event loop)
+    def save(self, **meta) -> str:
+        self.meta.update(meta)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.session_id}.zip")
+        with zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("meta.json", json.dumps(self.meta, ensure_ascii=False, indent=2, default=str))
+            archive.writestr("events.jsonl", "".join(json.dumps(event, ensure_ascii=False, default=str) + "\n" for event in self.events))
+            archive.writestr("inbound.pcm", bytes(self.pcm))
+        print(f"Session recorded to {self.path} ({len(self.events)} events, {len(self.pcm) / 32000:.1f}s of audio)")
+        return self.path
+
+# (meta, events, inbound pcm) of a recorded session
+def load_archive(path: str) -> tuple:
+    with zipfile.ZipFile(path, "r") as archive:
+        meta = json.loads(archive.read("meta.json"))
+        events = [json.loads(line) for line in archive.read("events.jsonl").decode("utf-8").splitlines() if line]
+        pcm = archive.read("inbound.pcm")
+    return meta, events, pcm
+
+# the turns of a session: every stt result starts one, with the llm response, tts and latency marks that followed it
+def session_turns(events: List[dict]) -> List[dict]:
+    turns = []
+    speech_end = None
+    for event in events:
+        kind = event["type"]
+        if kind == "speech_end":
+            speech_end = event.get("stream_time")
+        elif kind == "stt":
+            turns.append({"stt": event.get("text"), "speech_end": speech_end, "tts": []})
+        elif turns and kind == "llm":
+            turns[-1].update(response=event.get("response"), final=event.get("final"), json=event.get("json"))
+        elif turns and kind == "tts":
+            turns[-1]["tts"].append({"text": event.get("text"), "sha256": event.get("sha256")})
+        elif turns and kind == "latency":
+            turns[-1]["latency"] = event.get("marks")
+    return turns
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules live at the root of voice-future-assistant and import each other from there (like main.py does)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
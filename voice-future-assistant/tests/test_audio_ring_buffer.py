@@ -0,0 +1,51 @@
+import numpy as np
+from components.audio_ring_buffer import AudioRingBuffer
+
+def chunk(value: int, size: int = 4) -> bytes:
+    return np.full(size, value, dtype=np.int16).tobytes()
+
+def test_wraps_around_and_keeps_the_newest_chunks():
+    buffer = AudioRingBuffer(capacity=3, chunk=4)
+    for seq in range(5):
+        assert buffer.append(chunk(seq))
+    assert buffer.seq == 5
+    assert len(buffer) == 3
+    assert buffer.oldest() == 2
+    # chunks 2, 3, 4 live in slots 2, 0, 1
+    assert buffer.slot_ranges(2, 5) == [(2, 3), (0, 2)]
+    assert buffer.read(2, 5).tolist() == [2] * 4 + [3] * 4 + [4] * 4
+
+def test_sequence_addressing_clips_to_what_is_still_buffered():
+    buffer = AudioRingBuffer(capacity=3, chunk=4)
+    for seq in range(5):
+        buffer.append(chunk(seq))
+    assert buffer.read(0, 3).tolist() == [2] * 4 # chunks 0 and 1 were overwritten
+    assert buffer.read(4, 10).tolist() == [4] * 4 # nothing after the newest chunk
+    assert buffer.chunk_time(4, rate=16) == 1.0
+
+def test_read_without_wraparound_is_a_view():
+    buffer = AudioRingBuffer(capacity=4, chunk=4)
+    buffer.append(chunk(1))
+    buffer.append(chunk(2))
+    assert np.shares_memory(buffer.read(0, 2), buffer.samples)
+
+def test_read_float_normalizes_into_the_output():
+    buffer = AudioRingBuffer(capacity=2, chunk=4)
+    for value in (16384, -32768, 8192):
+        buffer.append(chunk(value))
+    out = np.zeros((2, 4), dtype=np.float32)
+    rows = buffer.read_float(1, 3, out)
+    assert rows.shape == (2, 4)
+    assert rows[:, 0].tolist() == [-1.0, 0.25]
+
+def test_ignores_chunks_of_another_size():
+    buffer = AudioRingBuffer(capacity=2, chunk=4)
+    assert not buffer.append(chunk(1, size=3))
+    assert buffer.seq == 0
+
+def test_clear_restarts_the_sequence():
+    buffer = AudioRingBuffer(capacity=2, chunk=4)
+    buffer.append(chunk(1))
+    buffer.clear()
+    assert buffer.seq == 0
+    assert len(buffer) == 0
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import types
+import wave
+import numpy as np
+import batch
+from components.audio_source_base import AudioSourceBase
+from components.stub_llm import StubLLM
+from components.stub_stt import DEFAULT_SCRIPT, StubSTT
+from components.stub_tts import StubTTS
+from greeting_cache import GREETING_CACHE
+
+# one second of a loud tone per user turn, the energy stand-in below hears it as speech
+def write_call(directory, turns: int):
+    directory.mkdir()
+    t = np.arange(16000) / 16000
+    pcm = (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16).tobytes()
+    for turn in range(turns):
+        with wave.open(str(directory / f"turn{turn}.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(pcm)
+
+# Silero needs real speech, the tone is scored by its energy instead
+async def energy_speech_probabilities(self, audio: np.ndarray) -> list:
+    return [1.0 if np.sqrt((chunk * chunk).mean()) > 0.05 else 0.0 for chunk in audio]
+
+def test_stub_calls_run_end_to_end(tmp_path, monkeypatch):
+    for provider in ("STUB_STT", "STUB_LLM", "STUB_TTS"):
+        monkeypatch.setenv(f"{provider}_LATENCY", "fixed:0:0")
+    monkeypatch.setenv("STUB_LLM_CHUNK_INTERVAL", "0")
+    monkeypatch.setattr(AudioSourceBase, "speech_probabilities", energy_speech_probabilities)
+    monkeypatch.setattr(batch, "pick_apis", lambda args: {"stt": StubSTT, "llm": StubLLM, "tts": StubTTS})
+    monkeypatch.setattr(GREETING_CACHE, "directory", str(tmp_path / "greetings"))
+
+    calls = tmp_path / "calls"
+    calls.mkdir()
+    write_call(calls / "call0", turns=2)
+    write_call(calls / "call1", turns=3)
+    output = tmp_path / "results.jsonl"
+    args = types.SimpleNamespace(calls=str(calls), output=str(output), parallel=2, pacing="virtual",
+                                 call_timeout=60, stt=None, llm=None, tts=None)
+    asyncio.run(batch.run_batch(args))
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    results = sorted((line for line in lines if line["type"] == "call"), key=lambda line: line["call"])
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert summary["calls"] == 2
+    assert summary["errors"] == 0
+
+    for result, turns in zip(results, (2, 3)):
+        assert "error" not in result
+        assert result["end_reason"] == "end of input"
+        user_lines = [entry["text"] for entry in result["transcript"] if entry["role"] == "user"]
+        assert user_lines == DEFAULT_SCRIPT[:turns]
+        # greeting plus one response per turn, every turn measured
+        assert len(result["outputs"]) >= turns + 1
+        assert result["latency"]["stages"]["stt"]["count"] == turns
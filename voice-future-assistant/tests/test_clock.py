@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from clock import RealClock, VirtualClock
+from components.audio_source_base import AudioSourceBase
+
+# audio source fed only through feed_pcm, no recording or VAD task
+class FedAudioSource(AudioSourceBase):
+    def start_recording(self):
+        self.running = True
+
+    def get_sample_width(self):
+        return 2
+
+def test_virtual_clock_advances_with_the_audio_fed():
+    async def run():
+        clock = VirtualClock()
+        clock.advance(1.5)
+        assert clock.time() == 1.5
+        await clock.sleep(10) # playback ends right away
+        assert clock.time() == 1.5
+    asyncio.run(run())
+
+def test_virtual_clock_hold_counts_the_time_spent_on_the_turn():
+    async def run():
+        clock = VirtualClock()
+        clock.advance(1.0)
+        with clock.hold():
+            assert not clock.released.is_set()
+            with clock.hold(): # nested holds release once, at the end of the outer one
+                await asyncio.sleep(0.05)
+            assert not clock.released.is_set()
+            await asyncio.sleep(0.05)
+        assert clock.released.is_set()
+        assert clock.holds == 0
+        assert clock.paused == pytest.approx(0.1, abs=0.05)
+        assert clock.time() == pytest.approx(1.0 + clock.paused)
+    asyncio.run(run())
+
+def test_feed_pcm_is_paced_in_real_time():
+    async def run():
+        source = FedAudioSource(clock=RealClock())
+        source.start_recording()
+        start = source.clock.time()
+        # consecutive calls, like a replay feeding one packet at a time, don't drift behind
+        for _ in range(5):
+            await source.feed_pcm(bytes(2048 * 4))
+        return source.clock.time() - start, source
+    elapsed, source = asyncio.run(run())
+    assert source.timeline.now() == pytest.approx(1.28)
+    assert 1.28 - 0.256 <= elapsed <= 1.28 + 0.15 # the first packet is due right away
+    assert source.timeline.stats()["gaps"] == 0
+    assert source.buffer.seq == 40
+
+def test_feed_pcm_waits_for_the_turn_in_virtual_time():
+    async def run():
+        source = FedAudioSource(clock=VirtualClock())
+        source.start_recording()
+        with source.clock.hold():
+            feed = asyncio.create_task(source.feed_pcm(bytes(32000)))
+            await asyncio.sleep(0.05)
+            assert source.buffer.seq == 0 # nothing is fed while the session works on a turn
+        await feed
+        return source
+    source = asyncio.run(run())
+    assert source.timeline.now() == 1.0
+    assert source.clock.time() == pytest.approx(1.0 + source.clock.paused)
+    assert source.timeline.stats()["gaps"] == 0 # the pause for the turn is not a gap in the audio
@@ -0,0 +1,48 @@
+import pytest
+from endpointing import EndpointDetector
+
+def detector() -> EndpointDetector:
+    return EndpointDetector(mode="adaptive", min_timeout=0.3, max_timeout=1.2)
+
+def test_fixed_mode_always_uses_the_fixed_timeout():
+    endpointer = EndpointDetector(mode="fixed", fixed_timeout=0.8)
+    assert endpointer.timeout(10.0, 5.0) == (0.8, {})
+
+def test_done_cues_give_the_min_timeout():
+    endpointer = detector()
+    for prob in [1.0] * 5 + [0.6] * 5: # speech fading out
+        endpointer.observe(prob)
+    endpointer.update_transcript("Sim.", 0.0)
+    timeout, cues = endpointer.timeout(0.5, 1.0)
+    assert cues == {"vad_trend": 1.0, "length": 1.0, "transcript": 1.0}
+    assert timeout == pytest.approx(0.3)
+
+def test_pause_cues_give_the_max_timeout():
+    endpointer = detector()
+    for _ in range(10): # abrupt stop
+        endpointer.observe(0.9)
+    endpointer.update_transcript("queria devolver um artigo e", 0.0)
+    timeout, cues = endpointer.timeout(8.0, 1.0)
+    assert cues == {"vad_trend": 0.0, "length": 0.0, "transcript": 0.0}
+    assert timeout == pytest.approx(1.2)
+
+def test_timeout_stays_between_min_and_max():
+    endpointer = detector()
+    for utterance_seconds in (0.0, 0.5, 2.0, 4.0, 6.0, 30.0):
+        for text in ("", "Sim.", "encomenda", "mas"):
+            endpointer.reset()
+            endpointer.update_transcript(text, 0.0)
+            timeout, _ = endpointer.timeout(utterance_seconds, 0.1)
+            assert 0.3 - 1e-9 <= timeout <= 1.2 + 1e-9
+
+def test_transcript_still_changing_counts_half():
+    endpointer = detector()
+    endpointer.update_transcript("Sim.", 1.0)
+    assert endpointer.transcript_score(1.1) == 0.5
+    assert endpointer.transcript_score(2.0) == 1.0
+
+def test_transcript_score_without_a_timeline():
+    endpointer = detector()
+    assert endpointer.transcript_score(None) is None
+    endpointer.update_transcript("Sim.", 0.0)
+    assert endpointer.transcript_score(None) == 1.0
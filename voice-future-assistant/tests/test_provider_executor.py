@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from provider_executor import ProviderExecutor, SessionExecutor
+
+class Provider:
+    def __init__(self):
+        self.running = 0
+        self.overlaps = 0
+        self.lock = threading.Lock()
+
+    # blocking call that records whether another call of the same provider ran at the same time
+    def call(self, seconds: float, result=None):
+        with self.lock:
+            self.running += 1
+            self.overlaps += self.running > 1
+        threading.Event().wait(seconds)
+        with self.lock:
+            self.running -= 1
+        return result
+
+    def stream(self, items: int):
+        for item in range(items):
+            yield self.call(0.05, item)
+
+def test_cancelled_call_keeps_the_provider_locked_until_its_thread_returns():
+    async def run():
+        executor = SessionExecutor(ProviderExecutor(pool_size=4))
+        provider = Provider()
+        call = asyncio.create_task(executor.call(provider, provider.call, 0.2))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        assert executor.get_lock(provider).locked()
+        assert await executor.call(provider, provider.call, 0.0, "next") == "next"
+        assert not executor.get_lock(provider).locked()
+        return provider
+    assert asyncio.run(run()).overlaps == 0
+
+def test_cancelled_iteration_keeps_the_provider_locked_until_its_thread_returns():
+    async def run():
+        executor = SessionExecutor(ProviderExecutor(pool_size=4))
+        provider = Provider()
+
+        async def consume():
+            return [item async for item in executor.iterate(provider, provider.stream(10))]
+
+        iteration = asyncio.create_task(consume())
+        await asyncio.sleep(0.08)
+        iteration.cancel()
+        await asyncio.gather(iteration, return_exceptions=True)
+        await executor.call(provider, provider.call, 0.0)
+        assert not executor.get_lock(provider).locked()
+        return provider
+    assert asyncio.run(run()).overlaps == 0
+
+def test_errors_release_the_provider():
+    def fail():
+        raise ValueError("api down")
+
+    async def run():
+        executor = SessionExecutor(ProviderExecutor(pool_size=4))
+        provider = Provider()
+        try:
+            await executor.call(provider, fail)
+        except ValueError:
+            pass
+        assert not executor.get_lock(provider).locked()
+        items = [item async for item in executor.iterate(provider, provider.stream(3))]
+        assert items == [0, 1, 2]
+        assert not executor.get_lock(provider).locked()
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+from sentence_segmenter import SentenceSegmenter
+
+FINAL_JSON = ('{"identificacao_cliente": {"numero_encomenda": "12345", "email": null}, '
+              '"resumo": "Devolução de um artigo", "tipificacao": "A", "redirecionamento": false}')
+
+# feed the text in small deltas, like the llm stream, and collect everything that would be spoken
+def segment(text: str, step: int = 3, min_chars: int = 20) -> list:
+    segmenter = SentenceSegmenter(min_chars)
+    sentences = []
+    for i in range(0, len(text), step):
+        sentences += segmenter.push(text[i:i + step])
+    rest = segmenter.flush()
+    return sentences + ([rest] if rest else [])
+
+def test_splits_sentences():
+    assert segment("Olá, bem-vindo ao Continente Online. Em que posso ajudar hoje? ") == [
+        "Olá, bem-vindo ao Continente Online.", "Em que posso ajudar hoje?"]
+
+def test_merges_short_sentences():
+    assert segment("Sim. Qual é o número da encomenda? ") == ["Sim. Qual é o número da encomenda?"]
+
+def test_flush_returns_the_unfinished_sentence():
+    segmenter = SentenceSegmenter()
+    assert segmenter.push("Obrigado pela sua chamada, ") == []
+    assert segmenter.flush() == "Obrigado pela sua chamada,"
+    assert segmenter.flush() == ""
+
+def test_drops_the_final_json_block():
+    assert segment("Obrigado pela sua chamada, tenha um bom dia. " + FINAL_JSON) == [
+        "Obrigado pela sua chamada, tenha um bom dia."]
+
+def test_drops_a_fenced_final_json_block_and_speaks_what_follows():
+    text = "Obrigado pela sua chamada. ```json\n" + FINAL_JSON + "\n``` Até à próxima e obrigado."
+    assert segment(text) == ["Obrigado pela sua chamada.", "Até à próxima e obrigado."]
+
+def test_speaks_text_after_the_block():
+    text = "Vou registar o pedido agora. " + FINAL_JSON + " Mais alguma coisa em que possa ajudar?"
+    assert segment(text) == ["Vou registar o pedido agora.", "Mais alguma coisa em que possa ajudar?"]
+
+def test_speaks_braces_that_are_not_the_final_json():
+    assert segment("Use o código {abc} no site por favor. Obrigado e bom dia! ") == [
+        "Use o código {abc} no site por favor.", "Obrigado e bom dia!"]
+
+def test_flushes_a_brace_that_never_closes():
+    assert segment("Um texto com chaveta { que nunca fecha. Mais texto aqui.") == [
+        "Um texto com chaveta { que nunca fecha. Mais texto aqui."]
+
+def test_drops_a_final_json_block_cut_by_the_end_of_the_stream():
+    assert segment("Adeus e obrigado pela chamada. " + FINAL_JSON[:60]) == ["Adeus e obrigado pela chamada."]
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from components.telephony_audio import MULAW_TABLE, Upsampler2x, decode_mulaw
+
+# G.711 μ-law reference values (ITU-T G.711 table 2, 14 bit linear scaled to 16 bit)
+REFERENCE = {0x00: -32124, 0x0F: -16764, 0x7E: -8, 0x7F: 0, 0x80: 32124, 0x8F: 16764, 0xFE: 8, 0xFF: 0}
+
+def test_decode_mulaw_matches_the_reference_values():
+    codes = bytes(REFERENCE)
+    assert decode_mulaw(codes).tolist() == list(REFERENCE.values())
+
+def test_decode_mulaw_matches_audioop_for_every_code():
+    audioop = pytest.importorskip("audioop") # removed in python 3.13
+    expected = np.frombuffer(audioop.ulaw2lin(bytes(range(256)), 2), dtype=np.int16)
+    assert MULAW_TABLE.tolist() == expected.tolist()
+
+def test_upsampler_doubles_the_rate_and_keeps_a_constant_level():
+    out = Upsampler2x().process(np.full(400, 1000, dtype=np.int16))
+    assert len(out) == 800
+    assert np.abs(out[100:].astype(int) - 1000).max() <= 10 # after the filter's warm up
+
+def test_upsampler_keeps_the_amplitude_of_a_tone():
+    t = np.arange(8000) / 8000
+    out = Upsampler2x().process((10000 * np.sin(2 * np.pi * 1000 * t)).astype(np.int16))
+    assert np.abs(out[200:]).max() == pytest.approx(10000, rel=0.02)
+
+def test_upsampler_frames_join_like_one_stream():
+    samples = (10000 * np.sin(2 * np.pi * 440 * np.arange(1600) / 8000)).astype(np.int16)
+    whole = Upsampler2x().process(samples)
+    upsampler = Upsampler2x()
+    framed = np.concatenate([upsampler.process(samples[i:i + 160]) for i in range(0, len(samples), 160)])
+    assert framed.tolist() == whole.tolist()
@@ -0,0 +1,59 @@
+import asyncio
+import numpy as np
+import pytest
+from vad_service import CHUNK_SAMPLES, VADService
+
+pytest.importorskip("onnxruntime")
+
+# a few seconds of "audio" per stream: a tone with bursts of noise, different for every stream
+def stream_audio(seed: int, chunks: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(chunks * CHUNK_SAMPLES) / 16000
+    audio = 0.3 * np.sin(2 * np.pi * (150 + 50 * seed) * t) * (np.sin(2 * np.pi * 2 * t) > 0)
+    audio += 0.05 * rng.standard_normal(len(t))
+    return audio.astype(np.float32).reshape(chunks, CHUNK_SAMPLES)
+
+# each stream scored on its own service, one chunk at a time
+def single_stream_probs(audio: np.ndarray) -> list:
+    service = VADService()
+    stream = service.register()
+    probs = []
+    for row in audio:
+        probs += service.infer([(stream, row[np.newaxis], None)])[0]
+    return probs
+
+def test_batched_results_equal_single_stream_results():
+    audios = [stream_audio(seed, chunks) for seed, chunks in ((1, 40), (2, 25), (3, 40))]
+    expected = [single_stream_probs(audio) for audio in audios]
+
+    service = VADService()
+    streams = [service.register() for _ in audios]
+    results = [[] for _ in audios]
+    # the streams submit backlogs of different sizes, and stop at different times
+    for start in range(0, 40, 7):
+        requests = [(stream, audio[start:start + 7], None) for stream, audio in zip(streams, audios) if start < len(audio)]
+        for request, probs in zip(requests, service.infer(requests)):
+            results[streams.index(request[0])] += probs
+
+    for result, single in zip(results, expected):
+        assert len(result) == len(single)
+        assert np.allclose(result, single, atol=1e-5)
+    assert service.scored_chunks == sum(len(audio) for audio in audios)
+
+def test_concurrent_sessions_share_batches():
+    audios = [stream_audio(seed, 20) for seed in (4, 5)]
+    expected = [single_stream_probs(audio) for audio in audios]
+
+    async def run():
+        service = VADService()
+        streams = [service.register() for _ in audios]
+        try:
+            results = await asyncio.gather(*(stream.score(audio) for stream, audio in zip(streams, audios)))
+        finally:
+            await service.stop()
+        return service, results
+
+    service, results = asyncio.run(run())
+    for result, single in zip(results, expected):
+        assert np.allclose(result, single, atol=1e-5)
+    assert service.batches == 20 # one batch per round, both sessions in it
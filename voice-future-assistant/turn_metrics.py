@@ -0,0 +1,54 @@
+from typing import Dict, List, Optional
+from websocket_msg_protocol import TimestampType
+from clock import REAL_CLOCK
+
+##
+#  Per turn latency measurements (end of user speech -> first audio sent back), kept per session
+##
+
+# one user turn, every mark is stored in seconds since the reference point (the moment the user stopped speaking)
+class TurnMetrics:
+    def __init__(self, reference_time: Optional[float] = None, clock=REAL_CLOCK):
+        self.clock = clock
+        self.reference_time = reference_time if reference_time is not None else clock.time()
+        self.marks: Dict[str, float] = {}
+
+    # record a stage, returns the elapsed seconds. only the first mark of each stage counts (e.g. first token)
+    def mark(self, stage: TimestampType, at: Optional[float] = None) -> float:
+        if stage.value not in self.marks:
+            now = at if at is not None else self.clock.time()
+            self.marks[stage.value] = round(now - self.reference_time, 3)
+        return self.marks[stage.value]
+
+    def has(self, stage: TimestampType) -> bool:
+        return stage.value in self.marks
+
+class SessionMetrics:
+    def __init__(self, clock=REAL_CLOCK):
+        self.clock = clock
+        self.turns: List[TurnMetrics] = []
+
+    def start_turn(self, reference_time: Optional[float] = None) -> TurnMetrics:
+        turn = TurnMetrics(reference_time, self.clock)
+        self.turns.append(turn)
+        return turn
+
+    # per stage count/avg/p50/p90/max over every turn, plus the raw marks of each turn
+    def summary(self) -> dict:
+        stages = {}
+        for stage in TimestampType:
+            values = sorted(turn.marks[stage.value] for turn in self.turns if stage.value in turn.marks)
+            if not values:
+                continue
+            stages[stage.value] = {
+                "count": len(values),
+                "avg": round(sum(values) / len(values), 3),
+                "p50": values[int(0.5 * (len(values) - 1))],
+                "p90": values[int(0.9 * (len(values) - 1))],
+                "max": values[-1],
+            }
+        return {
+            "turns": len(self.turns),
+            "stages": stages,
+            "per_turn": [turn.marks for turn in self.turns],
+        }
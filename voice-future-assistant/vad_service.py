@@ -0,0 +1,210 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import numpy as np
+
+##
+#  Process wide VAD service: one Silero model shared by every session
+#  sessions submit the chunks they haven't scored yet, the service collects the pending chunks of all sessions
+#  and scores them as one batch (one row per session), keeping the recurrent state of each stream separately
+##
+
+USE_SHARED_VAD = os.getenv("VAD_SHARED", "1") == "1"
+VAD_BACKEND = os.getenv("VAD_BACKEND", "onnx") # onnx (onnxruntime, no torch) or torch (torch.hub), the other one is the fallback
+VAD_ONNX_MODEL = os.getenv("VAD_ONNX_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vad_models", "silero_vad.onnx")) # silero-vad v5.1.2
+VAD_THREADS = int(os.getenv("VAD_THREADS", "1")) # intra-op threads for inference
+
+SAMPLE_RATE = 16000
+CHUNK_SAMPLES = 512 # Silero window at 16kHz
+CONTEXT_SAMPLES = 64 # samples of the previous window Silero v5 prepends to each window
+
+# Silero ONNX export run with onnxruntime, loaded from the bundled model file (vad_models/)
+# the recurrent state is an explicit input/output of the model, and the context is kept here
+class SileroOnnxBackend:
+    def __init__(self, path: str = VAD_ONNX_MODEL):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = VAD_THREADS
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.sample_rate = np.array(SAMPLE_RATE, dtype=np.int64)
+        print(f"Silero VAD ONNX model loaded from {path}")
+
+    def init_state(self):
+        return (np.zeros((2, 1, 128), dtype=np.float32), np.zeros((1, CONTEXT_SAMPLES), dtype=np.float32))
+
+    def forward(self, audio: np.ndarray, states: list) -> tuple:
+        context = np.concatenate([state[1] for state in states], axis=0)
+        inputs = {
+            "input": np.concatenate([context, audio], axis=1),
+            "state": np.concatenate([state[0] for state in states], axis=1),
+            "sr": self.sample_rate,
+        }
+        output, state = self.session.run(None, inputs)
+        new_states = [(state[:, i:i + 1], audio[i:i + 1, -CONTEXT_SAMPLES:]) for i in range(len(states))]
+        return output[:, 0].tolist(), new_states
+
+# Silero torch (jit) model, run with an explicit state per stream instead of the model's internal one
+class SileroTorchBackend:
+    def __init__(self):
+        import torch
+        from components.audio_source_base import load_vad_model
+        self.torch = torch
+        torch.set_num_threads(VAD_THREADS)
+        self.model, _ = load_vad_model()
+        if not self.model:
+            raise RuntimeError("Silero VAD model could not be loaded")
+
+    def init_state(self):
+        return (self.torch.zeros(2, 1, 128), self.torch.zeros(1, CONTEXT_SAMPLES))
+
+    # audio: (batch, CHUNK_SAMPLES) float32, states: one per row. returns the speech probabilities and new states
+    def forward(self, audio: np.ndarray, states: list) -> tuple:
+        torch = self.torch
+        model = self.model
+        with torch.inference_mode():
+            # load the streams' states into the model, as if it had been running with this batch all along
+            model._state = torch.cat([state[0] for state in states], dim=1)
+            model._context = torch.cat([state[1] for state in states], dim=0)
+            model._last_sr = SAMPLE_RATE
+            model._last_batch_size = len(states)
+
+            probs = model(torch.from_numpy(audio), SAMPLE_RATE).squeeze(1).tolist()
+            new_states = [(model._state[:, i:i + 1].clone(), model._context[i:i + 1].clone()) for i in range(len(states))]
+        return probs, new_states
+
+# one session's view of the service
+class VADStream:
+    def __init__(self, service: "VADService"):
+        self.service = service
+        self.state = None # recurrent state, created by the backend on first use
+
+    # speech probability of each row of audio (float32, shape (n, CHUNK_SAMPLES), normalized to [-1, 1]), in order
+    # the audio is read until the result is returned, so it can be a reused buffer
+    async def score(self, audio: np.ndarray) -> List[float]:
+        return await self.service.submit(self, audio)
+
+    def close(self):
+        self.service.unregister(self)
+
+class VADService:
+    def __init__(self):
+        self.backend = None
+        self.load_error: Optional[Exception] = None
+        self.streams = set()
+        self.pending = [] # (stream, float32 audio (n, CHUNK_SAMPLES), future)
+        self.pending_event: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad") # inference runs one batch at a time
+
+        # stats
+        self.batches = 0
+        self.scored_chunks = 0
+
+    def register(self) -> VADStream:
+        stream = VADStream(self)
+        self.streams.add(stream)
+        return stream
+
+    def unregister(self, stream: VADStream):
+        self.streams.discard(stream)
+
+    # the configured backend, or the other one if it can't be loaded. if neither loads, load_error is set
+    # and sessions fail (see AudioSourceBase.monitor_audio) instead of running without turn detection
+    def load_backend(self):
+        if self.backend is None and self.load_error is None:
+            backends = [SileroOnnxBackend, SileroTorchBackend]
+            if VAD_BACKEND != "onnx":
+                backends.reverse()
+            for backend in backends:
+                try:
+                    self.backend = backend()
+                    break
+                except Exception as e:
+                    print(f"VAD service failed to load {backend.__name__}: {e}")
+                    self.load_error = e
+            if self.backend:
+                self.load_error = None
+        return self.backend
+
+    # start the batching task on the running loop (the model is loaded in the vad thread, not on the loop)
+    def start(self):
+        if self.task is None or self.task.done():
+            self.pending_event = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def submit(self, stream: VADStream, audio: np.ndarray) -> List[float]:
+        if not len(audio):
+            return []
+        if self.load_error:
+            raise RuntimeError(f"VAD model not available: {self.load_error}")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((stream, audio, future))
+        self.pending_event.set()
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.thread, self.load_backend)
+        while True:
+            await self.pending_event.wait()
+            self.pending_event.clear()
+            requests, self.pending = self.pending, []
+            try:
+                results = await loop.run_in_executor(self.thread, self.infer, requests)
+                for (_, _, future), probs in zip(requests, results):
+                    if not future.done():
+                        future.set_result(probs)
+            except Exception as e:
+                print(f"VAD service error: {e}")
+                for _, _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+
+    # score every request, window by window: round i batches the i-th pending chunk of every stream
+    def infer(self, requests: list) -> List[List[float]]:
+        backend = self.load_backend()
+        if backend is None:
+            raise RuntimeError(f"VAD model not available: {self.load_error}")
+        results = [[] for _ in requests]
+        rounds = max(len(audio) for _, audio, _ in requests)
+
+        for i in range(rounds):
+            rows = [r for r, (_, audio, _) in enumerate(requests) if i < len(audio)]
+            streams = [requests[r][0] for r in rows]
+            for stream in streams:
+                if stream.state is None:
+                    stream.state = backend.init_state()
+
+            batch = np.stack([requests[r][1][i] for r in rows])
+            probs, states = backend.forward(batch, [stream.state for stream in streams])
+            for r, stream, prob, state in zip(rows, streams, probs, states):
+                stream.state = state
+                results[r].append(prob)
+
+            self.batches += 1
+            self.scored_chunks += len(rows)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "streams": len(self.streams),
+            "batches": self.batches,
+            "scored_chunks": self.scored_chunks,
+            "avg_batch_size": round(self.scored_chunks / self.batches, 2) if self.batches else 0.0,
+        }
+
+# process wide service
+VAD_SERVICE = VADService()
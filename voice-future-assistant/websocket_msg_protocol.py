@@ -9,20 +9,32 @@ from pipeline import TTSOutputType
 # 1. command: for sending commands to the client - "EXIT", "STOP_AUDIO"
 # 2. data: for sending data to the client (e.g., text, timestamp, audio_metadata, etc.)
     # "data" type messages can be further divided into:
-    # 2.1 text: for sending text results from processes - "stt","tts","output"
-    # 2.2 timestamp: for sending timestamps-"stt","llm","tts"
+    # 2.1 text: for sending text results from processes - "stt","tts","output","latency"
+    # 2.2 timestamp: for sending per turn latency, in seconds since the user stopped speaking
+    #     "vad","stt","llm_first_token","llm","tts_first_byte","tts","audio"
 
 # 3. binary: for sending binary data (e.g., audio data)
 
+# messages from the client:
+# 1. config: {"type": "config", "payload": {...}}, first message, selects the apis and endpointing
+# 2. binary: microphone audio, 16 kHz 16 bit mono PCM
+# 3. keepalive: {"type": "keepalive"}, sent every 10 s while the mic is paused, no audio is streamed
+#    with SESSION_IDLE_TIMEOUT set, a session that receives nothing at all (audio or keepalive) for that long is closed as "idle"
+
 class TextType(str, Enum):
     STT = "stt"
     TTS = "tts"
     OUTPUT = "output"
+    LATENCY = "latency" # json summary of the session latency, sent at the end of the call
 
 class TimestampType(str, Enum):
-    STT = "stt"
-    LLM = "llm"
-    TTS = "tts"
+    VAD = "vad" # VAD declared end of speech
+    STT = "stt" # transcription complete
+    LLM_FIRST_TOKEN = "llm_first_token"
+    LLM = "llm" # llm response complete
+    TTS_FIRST_BYTE = "tts_first_byte" # first synthesized audio ready
+    TTS = "tts" # all audio of the response synthesized
+    AUDIO = "audio" # first audio sent to the client
 
 class CommandType(str, Enum):
     EXIT = "EXIT"